@@ -0,0 +1,272 @@
+# benchmarks/bench_api.py
+"""
+End-to-end load test: starts benchmarks/mock_kite.py and the API server (src/main.py) pointed
+at it, then drives /api/get_positions and /api/place_order at fixed concurrency levels and
+reports throughput and p50/p99 latency per scenario.
+
+Results can be saved as a baseline and later runs compared against it; a run that is slower
+than the baseline by more than the tolerance exits with status 1, so it can gate a change:
+
+    python benchmarks/bench_api.py --save-baseline          # once, on the machine that will compare
+    python benchmarks/bench_api.py                          # fails if throughput or p99 regressed
+    python benchmarks/bench_api.py --workers 2 --duration 20 --output results.json
+    python benchmarks/bench_api.py --workers 1,2,4 --save-baseline   # sweeps worker counts
+
+With several worker counts, each runs every scenario against a fresh server and mock broker,
+results are named "<scenario>@w<workers>", and a throughput table by worker count is printed.
+
+Baselines depend on the machine, so keep one per machine. By default the mock broker answers
+every call after about 5 ms and the server's rate limits are lifted, so the numbers measure
+the server rather than Kite's limits; --kite-limits keeps both at Kite's real rates.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "api.json"
+
+# (name, method, path, concurrency)
+SCENARIOS = [
+    ("get_positions-c1", "GET", "/api/get_positions", 1),
+    ("get_positions-c8", "GET", "/api/get_positions", 8),
+    ("get_positions-c32", "GET", "/api/get_positions", 32),
+    ("place_order-c1", "POST", "/api/place_order", 1),
+    ("place_order-c8", "POST", "/api/place_order", 8),
+]
+
+ORDER = {
+    "tradingsymbol": "INFY", "exchange": "NSE", "transaction_type": "BUY",
+    "order_type": "MARKET", "quantity": 1, "product": "MIS",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{process.args[1]} exited with status {process.returncode} before listening.")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{process.args[1]} did not listen on port {port} within {timeout:.0f}s.")
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def run_scenario(client: httpx.AsyncClient, method: str, path: str, concurrency: int, duration: float) -> dict:
+    """Keeps `concurrency` requests in flight for `duration` seconds."""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if method == "POST":
+                    response = await client.post(path, json=ORDER)
+                else:
+                    response = await client.get(path)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def run_all(base_url: str, scenarios: list, duration: float, warmup: float) -> dict:
+    limits = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        results = {}
+        for name, method, path, concurrency in scenarios:
+            await run_scenario(client, method, path, concurrency, warmup)
+            results[name] = await run_scenario(client, method, path, concurrency, duration)
+            result = results[name]
+            print(f"{name:<20} {result['throughput']:>9.1f} req/s   p50 {result['p50_ms']:>8.2f} ms   "
+                  f"p99 {result['p99_ms']:>8.2f} ms   errors {result['errors']}")
+        return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float, latency_tolerance: float) -> list:
+    """Returns a message for every scenario that regressed beyond the tolerances."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        if result["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {result['throughput']} req/s, baseline {base['throughput']} req/s")
+        if result["p99_ms"] > base["p99_ms"] * (1 + latency_tolerance):
+            regressions.append(f"{name}: p99 {result['p99_ms']} ms, baseline {base['p99_ms']} ms")
+        if result["errors"] and not base.get("errors"):
+            regressions.append(f"{name}: {result['errors']} failed requests, baseline had none")
+    return regressions
+
+
+def print_sweep(results: dict, scenarios: list, worker_counts: list):
+    """Prints throughput per scenario and worker count, with the speedup over the first count."""
+    print()
+    print(f"{'req/s':<20}" + "".join(f"{f'{workers} worker(s)':>18}" for workers in worker_counts))
+    for name, *_ in scenarios:
+        first = results[f"{name}@w{worker_counts[0]}"]["throughput"]
+        cells = []
+        for workers in worker_counts:
+            throughput = results[f"{name}@w{workers}"]["throughput"]
+            cells.append(f"{throughput:>10.1f} ({throughput / first if first else 0:.2f}x)")
+        print(f"{name:<20}" + "".join(f"{cell:>18}" for cell in cells))
+
+
+def start_processes(args, data_dir: str, workers: int):
+    mock_port, api_port = free_port(), free_port()
+    mock_args = [sys.executable, str(Path(__file__).parent / "mock_kite.py"), "--port", str(mock_port),
+                 "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms), "--seed", "1"]
+    if not args.kite_limits:
+        mock_args.append("--no-rate-limits")
+
+    env = dict(os.environ, KITE_API_ROOT=f"http://127.0.0.1:{mock_port}", KITE_API_KEY="mock",
+               KITE_ACCESS_TOKEN="mock", KITE_DATA_DIR=data_dir, KITE_LOG_LEVEL="WARNING")
+    if not args.kite_limits:
+        env.update({f"KITE_{name}_RATE": "100000" for name in ("ORDERS", "QUOTES", "HISTORICAL", "PORTFOLIO")})
+        env.setdefault("KITE_MAX_IN_FLIGHT", "64")
+
+    devnull = subprocess.DEVNULL
+    mock = subprocess.Popen(mock_args, cwd=project_root, stdout=devnull, stderr=devnull)
+    wait_for_port(mock_port, mock)
+    server = subprocess.Popen(
+        [sys.executable, str(project_root / "src" / "main.py"), str(api_port), "--workers", str(workers)],
+        cwd=project_root, env=env, stdout=devnull, stderr=devnull,
+    )
+    return mock, server, mock_port, api_port
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end API load test against the mock Kite broker.")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario (default: 10)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario (default: 2)")
+    parser.add_argument("--scenarios", default=None, help="comma-separated scenario names (default: all)")
+    parser.add_argument("--workers", default="1", help="API worker processes, or a comma-separated list to sweep, e.g. 1,2,4 (default: 1)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="mock broker latency (default: 5)")
+    parser.add_argument("--jitter-ms", type=float, default=1.0, help="mock broker latency jitter (default: 1)")
+    parser.add_argument("--kite-limits", action="store_true", help="keep Kite's real rate limits on both sides")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help=f"baseline file (default: {DEFAULT_BASELINE.relative_to(project_root)})")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed drop in throughput, as a fraction (default: 0.2)")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5, help="allowed rise in p99, as a fraction (default: 0.5)")
+    parser.add_argument("--output", type=Path, default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [scenario for scenario in SCENARIOS if scenario[0] in wanted]
+        if not scenarios:
+            parser.error(f"No such scenarios. Choose from: {', '.join(s[0] for s in SCENARIOS)}")
+    try:
+        worker_counts = [int(count) for count in args.workers.split(",")]
+    except ValueError:
+        parser.error("--workers takes a number or a comma-separated list of numbers.")
+    if any(count < 1 for count in worker_counts):
+        parser.error("--workers must be at least 1.")
+
+    results = {}
+    for workers in worker_counts:
+        # A fresh server and broker per worker count, so earlier runs' positions and caches don't carry over.
+        with tempfile.TemporaryDirectory(prefix="kite-bench-") as data_dir:
+            mock, server, mock_port, api_port = start_processes(args, data_dir, workers)
+            try:
+                wait_for_port(api_port, server)
+                print(f"Mock broker on port {mock_port}, API server on port {api_port} ({workers} worker(s)).")
+                run = asyncio.run(run_all(f"http://127.0.0.1:{api_port}", scenarios, args.duration, args.warmup))
+            finally:
+                for process in (server, mock):
+                    process.terminate()
+                    try:
+                        process.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+        if len(worker_counts) == 1:
+            results = run
+        else:
+            results.update({f"{name}@w{workers}": result for name, result in run.items()})
+
+    if len(worker_counts) > 1:
+        print_sweep(results, scenarios, worker_counts)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "duration": args.duration,
+        # Results are only comparable between runs with the same settings.
+        "settings": dict(
+            {key: getattr(args, key) for key in ("latency_ms", "jitter_ms", "kite_limits")},
+            workers=worker_counts[0] if len(worker_counts) == 1 else worker_counts,
+        ),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {args.baseline}.")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("settings") != report["settings"]:
+        print(f"Warning: the baseline was recorded with different settings: {baseline.get('settings')}")
+    regressions = compare(results, baseline, args.tolerance, args.latency_tolerance)
+    if regressions:
+        print("Regressions against the baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions against the baseline from {baseline.get('created_at')}.")
+
+
+if __name__ == "__main__":
+    main()
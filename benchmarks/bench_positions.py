@@ -0,0 +1,143 @@
+# benchmarks/bench_positions.py
+"""
+Measures CPU per /api/get_positions request, comparing the fast path (positions validated once
+when fetched, encoded once per snapshot with orjson) with the previous path, where FastAPI
+validated the dict again through `response_model` and re-encoded it on every request.
+
+Requests go through the real ASGI apps in-process, so no network or broker is involved.
+
+    python benchmarks/bench_positions.py --positions 200 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# The helper is never started, so no broker is contacted; these only satisfy its constructor.
+os.environ.setdefault("KITE_API_KEY", "bench")
+os.environ.setdefault("KITE_ACCESS_TOKEN", "bench")
+os.environ["KITE_POSITIONS_TTL"] = "3600"
+os.environ["KITE_JOURNAL"] = "0"
+
+import httpx
+from fastapi import FastAPI, Response
+
+import src.main
+from src.kite_utils import KiteHelper
+from src.schemas import GetPositionsOutput
+
+
+def make_positions(count: int, tick: int = 0) -> dict:
+    """A broker-shaped positions payload with `count` rows per segment. `tick` moves the prices."""
+    def row(i):
+        last_price = 1500.0 + i + tick * 0.05
+        return {
+            "tradingsymbol": f"SYM{i:04d}", "exchange": "NSE", "instrument_token": 400000 + i,
+            "product": "CNC" if i % 2 else "MIS", "quantity": 10 + i, "overnight_quantity": i % 7,
+            "multiplier": 1, "average_price": 1490.0 + i, "close_price": 1495.5 + i,
+            "last_price": last_price, "value": -(1490.0 + i) * (10 + i), "pnl": (last_price - 1490.0 - i) * (10 + i),
+            "m2m": 12.5, "unrealised": 10.0 + i, "realised": 0.0,
+            # Fields the broker sends that the schema drops.
+            "buy_quantity": 10 + i, "sell_quantity": 0, "buy_price": 1490.0 + i, "day_buy_value": 0.0,
+        }
+    rows = [row(i) for i in range(count)]
+    return {"net": rows, "day": [dict(r) for r in rows]}
+
+
+def build_legacy_app(helper: KiteHelper) -> FastAPI:
+    """The endpoint as it was: the cached dict goes back through response_model and the JSON encoder."""
+    app = FastAPI()
+
+    @app.get("/api/get_positions", response_model=GetPositionsOutput)
+    async def get_positions(response: Response):
+        cached = await helper.get_positions_cached()
+        response.headers["X-Cache"] = cached.status.upper()
+        response.headers["Age"] = str(int(cached.age))
+        response.headers["X-Cache-Age-Ms"] = f"{cached.age * 1000:.0f}"
+        return cached.value
+
+    return app
+
+
+async def seed(helper: KiteHelper, raw: dict):
+    """Puts a freshly fetched snapshot in the positions cache, validated as a broker fetch would be."""
+    async def load():
+        return GetPositionsOutput.model_validate(raw).model_dump()
+
+    helper.positions_cache.invalidate()
+    await helper.positions_cache.get(load)
+
+
+async def measure(app, requests: int, headers=None, new_snapshot=None) -> dict:
+    """CPU and wall time per request. `new_snapshot(i)` runs untimed before each request."""
+    cpu = wall = 0.0
+    size = 0
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await client.get("/api/get_positions", headers=headers)  # warm up
+        for i in range(requests):
+            if new_snapshot:
+                await new_snapshot(i)
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            r = await client.get("/api/get_positions", headers=headers)
+            cpu += time.process_time() - cpu_started
+            wall += time.perf_counter() - wall_started
+            size = len(r.content) if r.status_code == 200 else 0
+    return {"cpu_us": cpu / requests * 1e6, "wall_us": wall / requests * 1e6, "status": r.status_code,
+            "bytes": int(r.headers.get("content-length", size))}
+
+
+async def run(positions: int, requests: int) -> dict:
+    helper = KiteHelper()
+    src.main.kite_helper = helper
+    legacy, fast = build_legacy_app(helper), src.main.app
+    raw = make_positions(positions)
+
+    async def changed(i):
+        await seed(helper, make_positions(positions, tick=i + 1))
+
+    # httpx asks for gzip by default; decompressing it would be counted as request CPU.
+    plain = {"Accept-Encoding": "identity"}
+    await seed(helper, raw)
+    results = {"legacy, unchanged": await measure(legacy, requests, plain)}
+    results["fast, unchanged"] = await measure(fast, requests, plain)
+    etag = (await helper.get_positions_encoded()).value.etag
+    results["fast, If-None-Match (304)"] = await measure(fast, requests, dict(plain, **{"If-None-Match": etag}))
+    results["fast, gzip"] = await measure(fast, requests, {"Accept-Encoding": "gzip"})
+    results["legacy, changed every request"] = await measure(legacy, requests, plain, new_snapshot=changed)
+    results["fast, changed every request"] = await measure(fast, requests, plain, new_snapshot=changed)
+    await helper.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the /api/get_positions response path.")
+    parser.add_argument("--positions", type=int, default=200, help="rows per segment (default: 200)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario (default: 2000)")
+    args = parser.parse_args()
+
+    # The endpoint's per-request log line is not what is being measured.
+    stdout, sys.stdout = sys.stdout, open(os.devnull, "w")
+    try:
+        results = asyncio.run(run(args.positions, args.requests))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"{args.positions} positions per segment, {args.requests} requests per scenario\n")
+    print(f"{'scenario':32} {'CPU/req':>10} {'wall/req':>10} {'status':>7} {'bytes':>8}")
+    for name, r in results.items():
+        print(f"{name:32} {r['cpu_us']:8.0f}us {r['wall_us']:8.0f}us {r['status']:>7} {r['bytes']:>8}")
+    print()
+    for scenario in ("unchanged", "changed every request"):
+        speedup = results[f"legacy, {scenario}"]["cpu_us"] / results[f"fast, {scenario}"]["cpu_us"]
+        print(f"CPU per request, snapshot {scenario}: {speedup:.1f}x less than before")
+
+
+if __name__ == "__main__":
+    main()
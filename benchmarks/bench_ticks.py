@@ -0,0 +1,176 @@
+# benchmarks/bench_ticks.py
+"""
+Measures tick ingestion throughput and checks the bars it builds.
+
+A known tick sequence (benchmarks/mock_ticker.py's `generate_ticks`) is encoded as Kite binary
+messages, decoded by KiteTicker's own parser and fed to TickEngine.ingest. The 1s and 1m bars
+the engine builds, including volumes derived from Kite's cumulative `volume_traded`, are then
+compared with bars computed directly from the sequence, and ticks/s is reported for decoding
+and ingestion separately.
+
+With --live, the sequence is instead replayed by mock_ticker.py over a real WebSocket and
+received through KiteTicker, as the server receives it, and ticks/s is measured end to end.
+
+    python benchmarks/bench_ticks.py --ticks 200000
+    python benchmarks/bench_ticks.py --live --ticks 100000 --rate 0
+"""
+import argparse
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from benchmarks.mock_ticker import DEFAULT_TOKENS, generate_ticks, pack_message, pack_tick
+from src.ticks import BAR_INTERVALS, TickEngine
+
+
+def reference_bars(ticks, interval: int) -> dict:
+    """
+    Bars per token computed the plain way: group ticks by bar start, and take each tick's volume
+    as the change in cumulative volume since the token's previous tick (0 for its first tick).
+    Returns token -> list of (start, open, high, low, close, volume).
+    """
+    bars, last_volume = {}, {}
+    for timestamp, token, price, cumulative in ticks:
+        price = price / 100
+        volume = cumulative - last_volume[token] if token in last_volume else 0
+        last_volume[token] = cumulative
+        start = timestamp - timestamp % interval
+        series = bars.setdefault(token, [])
+        if series and series[-1][0] == start:
+            bar = series[-1]
+            bar[2], bar[3], bar[4], bar[5] = max(bar[2], price), min(bar[3], price), price, bar[5] + volume
+        else:
+            series.append([start, price, price, price, price, volume])
+    return bars
+
+
+def check_bars(engine: TickEngine, ticks) -> list:
+    """Compares the engine's bars with reference_bars. Returns a description of each mismatch."""
+    mismatches = []
+    for name, seconds in BAR_INTERVALS.items():
+        for token, expected in reference_bars(ticks, seconds).items():
+            got = engine.bars(token, name, len(expected))
+            # Only the most recent bars fit in the ring.
+            expected = np.array(expected[-len(got):], dtype=np.float64)
+            if got.shape != expected.shape or not np.allclose(got, expected):
+                rows = np.flatnonzero(~np.isclose(got, expected).all(axis=1)) if got.shape == expected.shape else []
+                detail = f"first differing bar {rows[0]}: got {got[rows[0]].tolist()}, expected {expected[rows[0]].tolist()}" \
+                    if len(rows) else f"shape {got.shape}, expected {expected.shape}"
+                mismatches.append(f"{token} {name}: {detail}")
+    return mismatches
+
+
+def decoder():
+    """KiteTicker's binary parser, without opening a connection."""
+    from kiteconnect import KiteTicker
+    return KiteTicker("bench", "bench")._parse_binary
+
+
+def run_offline(ticks, batch: int) -> dict:
+    messages = [pack_message([pack_tick("full", *tick) for tick in ticks[i:i + batch]]) for i in range(0, len(ticks), batch)]
+    parse = decoder()
+
+    started = time.perf_counter()
+    parsed = [parse(message) for message in messages]
+    decode_seconds = time.perf_counter() - started
+
+    engine = TickEngine("bench", "bench", instruments=DEFAULT_TOKENS, mode="full")
+    started = time.perf_counter()
+    for message in parsed:
+        engine.ingest(message)
+    ingest_seconds = time.perf_counter() - started
+
+    return {
+        "engine": engine,
+        "decode_ticks_per_second": len(ticks) / decode_seconds,
+        "ingest_ticks_per_second": len(ticks) / ingest_seconds,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_live(ticks, args, start: int) -> dict:
+    port = free_port()
+    replay = subprocess.Popen(
+        [sys.executable, str(Path(__file__).parent / "mock_ticker.py"), "--port", str(port), "--ticks", str(len(ticks)),
+         "--rate", str(args.rate), "--batch", str(args.batch), "--start", str(start)],
+        cwd=project_root,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or replay.poll() is not None:
+                    raise RuntimeError("The tick replay server did not start.")
+                time.sleep(0.2)
+
+        engine = TickEngine("bench", "bench", instruments=DEFAULT_TOKENS, mode="full")
+        engine.root = f"ws://127.0.0.1:{port}"
+        engine.start()
+        while engine.ticks_received == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        started = time.perf_counter()
+        last, idle_since = 0, time.monotonic()
+        while engine.ticks_received < len(ticks):
+            time.sleep(0.01)
+            if engine.ticks_received != last:
+                last, idle_since = engine.ticks_received, time.monotonic()
+            elif time.monotonic() - idle_since > 5:
+                break
+        elapsed = time.perf_counter() - started
+        engine.stop()
+        time.sleep(0.5)  # Let the ticker close the connection before the replay server goes away.
+        return {"engine": engine, "received": engine.ticks_received, "live_ticks_per_second": engine.ticks_received / elapsed}
+    finally:
+        replay.terminate()
+        replay.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and check tick ingestion and bar building.")
+    parser.add_argument("--ticks", type=int, default=200000, help="ticks in the sequence (default: 200000)")
+    parser.add_argument("--batch", type=int, default=50, help="ticks per message (default: 50)")
+    parser.add_argument("--live", action="store_true", help="replay over a WebSocket through KiteTicker")
+    parser.add_argument("--rate", type=float, default=0, help="--live replay rate in ticks/s; 0 is as fast as possible")
+    args = parser.parse_args()
+
+    start = int(time.time()) - 86400
+    ticks = list(generate_ticks(DEFAULT_TOKENS, args.ticks, start))
+    if args.live:
+        result = run_live(ticks, args, start)
+        print(f"received {result['received']}/{len(ticks)} ticks, {result['live_ticks_per_second']:,.0f} ticks/s end to end")
+        if result["received"] < len(ticks):
+            print("FAIL: ticks were lost")
+            sys.exit(1)
+    else:
+        result = run_offline(ticks, args.batch)
+        print(f"{len(ticks)} ticks over {len(DEFAULT_TOKENS)} instruments, {args.batch} per message")
+        print(f"decode (KiteTicker parser): {result['decode_ticks_per_second']:>12,.0f} ticks/s")
+        print(f"ingest (TickEngine):        {result['ingest_ticks_per_second']:>12,.0f} ticks/s")
+
+    mismatches = check_bars(result["engine"], ticks)
+    if mismatches:
+        print("FAIL: bars differ from the tick sequence")
+        for mismatch in mismatches[:20]:
+            print(f"  {mismatch}")
+        sys.exit(1)
+    print("bars OK: 1s and 1m OHLCV match the sequence for every instrument")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+# benchmarks/mock_kite.py
+"""
+A local stand-in for the Kite Connect REST API, for load tests and benchmarks that must not
+touch a real account. It serves orders, positions, holdings, quotes, the instruments dump and
+historical candles, with configurable latency, jitter, error rate and Kite's per-second rate
+limits (answered with 429, as Kite does). Point the server at it with KITE_API_ROOT:
+
+    python benchmarks/mock_kite.py --port 9100 --latency-ms 30 --jitter-ms 10 --error-rate 0.01
+    KITE_API_ROOT=http://127.0.0.1:9100 KITE_API_KEY=mock KITE_ACCESS_TOKEN=mock python src/main.py
+
+Placed MARKET orders fill at once and show up in positions; LIMIT orders stay open until cancelled.
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import math
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from src.history import INTERVALS, IST
+from src.rate_limit import TokenBucket
+from src.scheduler import DEFAULT_RATE_LIMITS
+
+INSTRUMENT_COLUMNS = ("instrument_token,exchange_token,tradingsymbol,name,last_price,expiry,strike,"
+                      "tick_size,lot_size,instrument_type,segment,exchange")
+NAMED_SYMBOLS = ("INFY", "TCS", "RELIANCE", "HDFCBANK", "ICICIBANK", "SBIN", "ITC", "LT", "WIPRO", "AXISBANK")
+
+
+class MockBroker:
+    """
+    The mock broker's state and failure settings. Every call first waits `latency_ms` (normally
+    distributed with `jitter_ms`), then may be rejected with 429 if its endpoint class is over
+    its rate limit, or fail with a 503 at `error_rate`.
+    """
+
+    def __init__(self, latency_ms=20.0, jitter_ms=5.0, error_rate=0.0, rate_limits=True,
+                 symbols=200, positions=20, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # Kite's limits, with a burst of one second's worth, as Kite counts per second.
+        self.buckets = {
+            name: TokenBucket(rate=rate, capacity=max(1.0, rate)) for name, rate in DEFAULT_RATE_LIMITS.items()
+        } if rate_limits else {}
+
+        self.symbols = list(NAMED_SYMBOLS) + [f"SYM{i:04d}" for i in range(max(0, symbols - len(NAMED_SYMBOLS)))]
+        self.tokens = {}
+        for exchange_index, exchange in enumerate(("NSE", "BSE")):
+            for i, symbol in enumerate(self.symbols):
+                self.tokens[(exchange, symbol)] = 100000 * (exchange_index + 1) + i
+
+        self.orders = {}
+        self.order_ids = itertools.count(250000000000000)
+        self.fills = {}  # (exchange, symbol, product) -> [net quantity, buy value, sell value]
+        for symbol in self.symbols[:positions]:
+            self.fills[("NSE", symbol, "CNC")] = [10, 10 * self.base_price(symbol), 0.0]
+
+        self.calls = {}
+        self.rate_limited = 0
+        self.errors = 0
+        self.started = time.monotonic()
+
+    def base_price(self, symbol: str) -> float:
+        return 100.0 + zlib.crc32(symbol.encode()) % 4900
+
+    def last_price(self, symbol: str) -> float:
+        """Drifts slowly and deterministically, so positions change between polls."""
+        phase = zlib.crc32(symbol.encode()) % 360
+        return round(self.base_price(symbol) * (1 + 0.01 * math.sin(time.time() / 60 + phase)), 2)
+
+    async def simulate(self, request: Request, endpoint_class: str):
+        """Applies latency, rate limits and injected errors. Returns an error response, or None to proceed."""
+        route = f"{request.method} {request.scope['route'].path}"
+        self.calls[route] = self.calls.get(route, 0) + 1
+
+        if not request.headers.get("authorization", "").startswith("token "):
+            return _error(403, "TokenException", "Incorrect `api_key` or `access_token`.")
+        delay = self.random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms else self.latency_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        bucket = self.buckets.get(endpoint_class)
+        if bucket is not None and not bucket.try_acquire():
+            self.rate_limited += 1
+            return _error(429, "NetworkException", "Too many requests")
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return _error(503, "NetworkException", "Mock broker: injected error.")
+        return None
+
+    def position_rows(self) -> list:
+        rows = []
+        for (exchange, symbol, product), (quantity, buy_value, sell_value) in self.fills.items():
+            last_price = self.last_price(symbol)
+            bought = max(quantity, 0) or 1
+            average_price = round(buy_value / bought, 2) if quantity > 0 else 0.0
+            pnl = round(sell_value - buy_value + quantity * last_price, 2)
+            rows.append({
+                "tradingsymbol": symbol, "exchange": exchange, "instrument_token": self.tokens[(exchange, symbol)],
+                "product": product, "quantity": quantity, "overnight_quantity": 0, "multiplier": 1,
+                "average_price": average_price, "close_price": self.base_price(symbol), "last_price": last_price,
+                "value": round(sell_value - buy_value, 2), "pnl": pnl, "m2m": pnl, "unrealised": pnl, "realised": 0.0,
+                "buy_quantity": max(quantity, 0), "sell_quantity": max(-quantity, 0),
+            })
+        return rows
+
+    def stats(self) -> dict:
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "injected_errors": self.errors,
+            "orders": len(self.orders),
+        }
+
+
+def _error(status: int, error_type: str, message: str) -> JSONResponse:
+    return JSONResponse({"status": "error", "message": message, "data": None, "error_type": error_type}, status_code=status)
+
+
+def _ok(data) -> dict:
+    return {"status": "success", "data": data}
+
+
+def create_app(broker: MockBroker) -> FastAPI:
+    app = FastAPI(title="Mock Kite Connect API")
+
+    @app.get("/")
+    async def health():
+        # The server warms its connection pool with this; any response will do.
+        return {"status": "success", "data": "mock"}
+
+    @app.post("/orders/{variety}")
+    async def place_order(variety: str, request: Request):
+        if error := await broker.simulate(request, "orders"):
+            return error
+        form = {key: values[-1] for key, values in parse_qs((await request.body()).decode()).items()}
+        exchange, symbol = form.get("exchange"), form.get("tradingsymbol")
+        if (exchange, symbol) not in broker.tokens:
+            return _error(400, "InputException", "Invalid `tradingsymbol`.")
+        try:
+            quantity = int(form.get("quantity", "0"))
+        except ValueError:
+            quantity = 0
+        if quantity <= 0:
+            return _error(400, "InputException", "Invalid `quantity`.")
+
+        order_id = str(next(broker.order_ids))
+        market = form.get("order_type") == "MARKET"
+        price = broker.last_price(symbol) if market else float(form.get("price") or 0)
+        broker.orders[order_id] = {
+            "order_id": order_id, "variety": variety, "status": "COMPLETE" if market else "OPEN",
+            "exchange": exchange, "tradingsymbol": symbol, "instrument_token": broker.tokens[(exchange, symbol)],
+            "transaction_type": form.get("transaction_type"), "order_type": form.get("order_type"),
+            "product": form.get("product"), "quantity": quantity, "price": price, "tag": form.get("tag"),
+            "filled_quantity": quantity if market else 0, "average_price": price if market else 0.0,
+            "order_timestamp": datetime.datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if market:
+            fill = broker.fills.setdefault((exchange, symbol, form.get("product")), [0, 0.0, 0.0])
+            if form.get("transaction_type") == "SELL":
+                fill[0] -= quantity
+                fill[2] += quantity * price
+            else:
+                fill[0] += quantity
+                fill[1] += quantity * price
+        return _ok({"order_id": order_id})
+
+    @app.delete("/orders/{variety}/{order_id}")
+    async def cancel_order(variety: str, order_id: str, request: Request):
+        if error := await broker.simulate(request, "orders"):
+            return error
+        order = broker.orders.get(order_id)
+        if order is None:
+            return _error(400, "InputException", "Invalid `order_id`.")
+        if order["status"] != "OPEN":
+            return _error(400, "InputException", f"Order cannot be cancelled as it is {order['status']}.")
+        order["status"] = "CANCELLED"
+        return _ok({"order_id": order_id})
+
+    @app.get("/orders")
+    async def orders(request: Request):
+        if error := await broker.simulate(request, "portfolio"):
+            return error
+        return _ok(list(broker.orders.values()))
+
+    @app.get("/portfolio/positions")
+    async def positions(request: Request):
+        if error := await broker.simulate(request, "portfolio"):
+            return error
+        rows = broker.position_rows()
+        return _ok({"net": rows, "day": [dict(row) for row in rows]})
+
+    @app.get("/portfolio/holdings")
+    async def holdings(request: Request):
+        if error := await broker.simulate(request, "portfolio"):
+            return error
+        return _ok([
+            {
+                "tradingsymbol": symbol, "exchange": "NSE", "instrument_token": broker.tokens[("NSE", symbol)],
+                "isin": f"INE{i:06d}01", "product": "CNC", "quantity": 5, "t1_quantity": 0,
+                "average_price": broker.base_price(symbol), "last_price": broker.last_price(symbol),
+                "close_price": broker.base_price(symbol),
+                "pnl": round(5 * (broker.last_price(symbol) - broker.base_price(symbol)), 2),
+            }
+            for i, symbol in enumerate(NAMED_SYMBOLS)
+        ])
+
+    def _quotes(request: Request, full: bool) -> dict:
+        data = {}
+        for key in request.query_params.getlist("i"):
+            exchange, _, symbol = key.partition(":")
+            if (exchange, symbol) not in broker.tokens:
+                continue  # Kite leaves unknown instruments out.
+            last_price = broker.last_price(symbol)
+            quote = {"instrument_token": broker.tokens[(exchange, symbol)], "last_price": last_price}
+            if full:
+                close = broker.base_price(symbol)
+                quote.update({
+                    "timestamp": datetime.datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
+                    "volume": 100000, "net_change": round(last_price - close, 2),
+                    "ohlc": {"open": close, "high": max(close, last_price), "low": min(close, last_price), "close": close},
+                })
+            data[key] = quote
+        return data
+
+    @app.get("/quote")
+    async def quote(request: Request):
+        if error := await broker.simulate(request, "quotes"):
+            return error
+        return _ok(_quotes(request, full=True))
+
+    @app.get("/quote/ltp")
+    async def ltp(request: Request):
+        if error := await broker.simulate(request, "quotes"):
+            return error
+        return _ok(_quotes(request, full=False))
+
+    @app.get("/instruments")
+    async def instruments(request: Request):
+        if error := await broker.simulate(request, "portfolio"):
+            return error
+        lines = [INSTRUMENT_COLUMNS] + [
+            f"{token},{token % 100000},{symbol},{symbol},0,,0,0.05,1,EQ,{exchange},{exchange}"
+            for (exchange, symbol), token in broker.tokens.items()
+        ]
+        return PlainTextResponse("\n".join(lines) + "\n", media_type="text/csv")
+
+    @app.get("/instruments/historical/{instrument_token}/{interval}")
+    async def historical(instrument_token: int, interval: str, request: Request):
+        if error := await broker.simulate(request, "historical"):
+            return error
+        if interval not in INTERVALS:
+            return _error(400, "InputException", "Invalid `interval`.")
+        step = INTERVALS[interval][0]
+        try:
+            start, end = (datetime.datetime.strptime(request.query_params[key], "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+                          for key in ("from", "to"))
+        except (KeyError, ValueError):
+            return _error(400, "InputException", "Invalid `from` or `to` date.")
+
+        candles = []
+        day = start.replace(hour=0, minute=0, second=0)
+        while day <= end:
+            if day.weekday() < 5:
+                session_open, session_close = day.replace(hour=9, minute=15), day.replace(hour=15, minute=30)
+                moment = session_open
+                while moment < session_close and (step < 86400 or moment == session_open):
+                    if start <= moment <= end:
+                        base = 100 + instrument_token % 900 + moment.timestamp() % 97 / 10
+                        candles.append([moment.strftime("%Y-%m-%dT%H:%M:%S%z"), base, base + 1, base - 1, base + 0.5, 1000])
+                    moment += datetime.timedelta(seconds=step)
+            day += datetime.timedelta(days=1)
+        return _ok({"candles": candles})
+
+    @app.get("/_mock/stats")
+    async def mock_stats():
+        return broker.stats()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock Kite Connect REST API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mean added latency per call (default: 20)")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="standard deviation of the latency (default: 5)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with 503 (default: 0)")
+    parser.add_argument("--no-rate-limits", action="store_true", help="never answer 429")
+    parser.add_argument("--symbols", type=int, default=200, help="instruments per exchange (default: 200)")
+    parser.add_argument("--positions", type=int, default=20, help="open positions at start (default: 20)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for latency and errors")
+    args = parser.parse_args()
+
+    import uvicorn
+    broker = MockBroker(args.latency_ms, args.jitter_ms, args.error_rate, not args.no_rate_limits,
+                        args.symbols, args.positions, args.seed)
+    uvicorn.run(create_app(broker), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
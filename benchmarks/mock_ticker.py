@@ -0,0 +1,166 @@
+# benchmarks/mock_ticker.py
+"""
+A local stand-in for the Kite ticker WebSocket, for exercising the tick engine without a live
+market. It replays a generated tick sequence in Kite's binary format (ltp, quote or full packets,
+as each connection asks with `mode`), only for subscribed tokens, with a heartbeat every second.
+Point the server at it with KITE_TICKER_ROOT:
+
+    python benchmarks/mock_ticker.py --port 9200 --rate 5000
+    KITE_TICKER_ROOT=ws://127.0.0.1:9200 KITE_TICKER_INSTRUMENTS=408065,738561 python src/main.py
+
+The same tick sequence (see `generate_ticks`) is used by benchmarks/bench_ticks.py and the tests,
+so bars built from a replay can be checked against bars computed directly from the sequence.
+"""
+import argparse
+import asyncio
+import json
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Tokens whose low byte is 1 are NSE equities, so prices are sent in paise.
+DEFAULT_TOKENS = (408065, 738561, 341249, 2953217, 1270529)
+
+_QUOTE = struct.Struct(">11i")
+_FULL_EXTRA = struct.Struct(">5i")
+_DEPTH_ENTRY = struct.Struct(">iiHxx")
+
+
+def generate_ticks(tokens, count: int, start: int = None, ticks_per_second: int = 50, seed: int = 1):
+    """
+    Yields `count` ticks as (exchange timestamp in whole seconds, token, price in paise,
+    cumulative volume), cycling through `tokens`. Prices take a random walk; cumulative volume
+    only grows, as Kite's `volume_traded` does.
+    """
+    rng = random.Random(seed)
+    start = int(time.time()) if start is None else start
+    prices = {token: 100000 + rng.randrange(400000) for token in tokens}
+    volumes = {token: rng.randrange(1000000) for token in tokens}
+    for i in range(count):
+        token = tokens[i % len(tokens)]
+        prices[token] = max(5, prices[token] + rng.randint(-20, 20) * 5)
+        volumes[token] += rng.randint(1, 50)
+        yield start + i // ticks_per_second, token, prices[token], volumes[token]
+
+
+def pack_tick(mode: str, timestamp: int, token: int, price: int, volume: int) -> bytes:
+    """Encodes one tick as a Kite binary packet. `price` is in paise."""
+    if mode == "ltp":
+        return struct.pack(">ii", token, price)
+    quote = _QUOTE.pack(token, price, 1, price, volume, 500, 500, price, price, price, price)
+    if mode == "quote":
+        return quote
+    depth = b"".join(_DEPTH_ENTRY.pack(100, price, 1) for _ in range(10))
+    return quote + _FULL_EXTRA.pack(timestamp, 0, 0, 0, timestamp) + depth
+
+
+def pack_message(packets) -> bytes:
+    """Frames packets as one WebSocket message: a packet count, then each packet with its length."""
+    parts = [struct.pack(">H", len(packets))]
+    for packet in packets:
+        parts.append(struct.pack(">H", len(packet)))
+        parts.append(packet)
+    return b"".join(parts)
+
+
+class TickReplay:
+    """Replays the generated tick sequence to one connection, honouring subscribe, unsubscribe and mode."""
+
+    def __init__(self, tokens, count: int, rate: float, batch: int, seed: int, start: int = None):
+        self.tokens = tuple(tokens)
+        # Every connection replays the same sequence, stamped from the same start second.
+        self.start = int(time.time()) if start is None else start
+        self.count = count
+        self.rate = rate
+        self.batch = batch
+        self.seed = seed
+        self.sent = 0
+
+    async def serve(self, websocket):
+        modes = {}  # token -> mode, for subscribed tokens
+        reader = asyncio.create_task(self._read_commands(websocket, modes))
+        heartbeat = asyncio.create_task(self._heartbeat(websocket))
+        try:
+            while not modes:
+                await asyncio.sleep(0.01)
+            started = time.perf_counter()
+            sent = 0
+            batch = []
+            for tick in generate_ticks(self.tokens, self.count, self.start, seed=self.seed):
+                mode = modes.get(tick[1])
+                if mode is None:
+                    continue
+                batch.append(pack_tick(mode, *tick))
+                if len(batch) >= self.batch:
+                    await websocket.send(pack_message(batch))
+                    sent += len(batch)
+                    batch = []
+                    if self.rate:
+                        ahead = sent / self.rate - (time.perf_counter() - started)
+                        if ahead > 0:
+                            await asyncio.sleep(ahead)
+            if batch:
+                await websocket.send(pack_message(batch))
+                sent += len(batch)
+            self.sent += sent
+            await reader  # Stay connected until the client leaves.
+        finally:
+            reader.cancel()
+            heartbeat.cancel()
+
+    async def _read_commands(self, websocket, modes: dict):
+        async for message in websocket:
+            try:
+                command = json.loads(message)
+            except (TypeError, ValueError):
+                continue
+            action, value = command.get("a"), command.get("v")
+            if action == "subscribe":
+                for token in value:
+                    modes.setdefault(token, "quote")  # Kite's default mode on subscribe.
+            elif action == "unsubscribe":
+                for token in value:
+                    modes.pop(token, None)
+            elif action == "mode":
+                mode, tokens = value
+                for token in tokens:
+                    if token in modes:
+                        modes[token] = mode
+
+    async def _heartbeat(self, websocket):
+        while True:
+            await asyncio.sleep(1)
+            await websocket.send(b"\x00")
+
+
+async def serve(host: str, port: int, replay: TickReplay):
+    from websockets.asyncio.server import serve as serve_websocket
+
+    async with serve_websocket(replay.serve, host, port, max_size=None):
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay generated ticks over a mock Kite ticker WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--tokens", default=",".join(map(str, DEFAULT_TOKENS)), help="comma-separated instrument tokens")
+    parser.add_argument("--ticks", type=int, default=1000000, help="ticks replayed per connection (default: 1000000)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="ticks per second; 0 sends as fast as possible (default: 1000)")
+    parser.add_argument("--batch", type=int, default=50, help="ticks per WebSocket message (default: 50)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--start", type=int, default=None, help="exchange timestamp of the first tick (default: now)")
+    args = parser.parse_args()
+
+    tokens = [int(token) for token in args.tokens.split(",") if token.strip()]
+    asyncio.run(serve(args.host, args.port, TickReplay(tokens, args.ticks, args.rate, args.batch, args.seed, args.start)))
+
+
+if __name__ == "__main__":
+    main()
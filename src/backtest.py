@@ -0,0 +1,302 @@
+# src/backtest.py
+import functools
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.schemas import PlaceOrderInput, Position, GetPositionsOutput
+from src.history import IST_OFFSET
+
+# One simulated execution. Square-offs are the automatic MIS exits at the end of each day.
+FILL_DTYPE = np.dtype([
+    ("bar", np.int64),
+    ("timestamp", np.int64),
+    ("quantity", np.int64),  # Signed: positive for buys, negative for sells.
+    ("price", np.float64),
+    ("product", "U3"),
+    ("squareoff", np.bool_),
+])
+
+
+class Intent(NamedTuple):
+    """An order to simulate: the same PlaceOrderInput sent to /api/place_order, plus when it was sent."""
+    timestamp: int  # Unix seconds.
+    order: PlaceOrderInput
+
+
+class BacktestResult(NamedTuple):
+    """Simulated fills, rejected intents, per-bar P&L and end-of-run positions."""
+    positions: GetPositionsOutput
+    fills: Dict[str, np.ndarray]          # FILL_DTYPE records per 'EXCHANGE:TRADINGSYMBOL'.
+    equity: Dict[str, np.ndarray]         # Mark-to-market P&L after every bar, per symbol.
+    rejected: List[tuple]                 # (Intent, reason) pairs.
+
+    def summary(self) -> dict:
+        drawdowns = [float(np.max(np.maximum.accumulate(curve) - curve)) for curve in self.equity.values() if len(curve)]
+        return {
+            "pnl": sum(position.pnl for position in self.positions.net),
+            "fills": sum(len(f) for f in self.fills.values()),
+            "rejected": len(self.rejected),
+            "worst_symbol_drawdown": max(drawdowns, default=0.0),
+        }
+
+
+def symbol_key(order: PlaceOrderInput) -> str:
+    return f"{order.exchange}:{order.tradingsymbol}"
+
+
+def _simulate_fills(bars: np.ndarray, intents: List[Intent]):
+    """
+    Simulates fills for one symbol, vectorized across all of its intents.
+
+    Orders fill no earlier than the bar after they are sent. MARKET orders fill at that bar's
+    open. LIMIT orders fill at the first bar of the same trading day whose range touches the
+    limit, at the better of the open and the limit. Unfilled orders expire at the end of the day.
+    """
+    timestamps = bars["timestamp"]
+    n = len(timestamps)
+    day = (timestamps + IST_OFFSET) // 86400
+    day_end = np.searchsorted(day, day, side="right") - 1
+
+    sent_at = np.array([intent.timestamp for intent in intents], dtype=np.int64)
+    side = np.array([1 if intent.order.transaction_type == "BUY" else -1 for intent in intents], dtype=np.int64)
+    quantity = np.array([intent.order.quantity for intent in intents], dtype=np.int64) * side
+    is_limit = np.array([intent.order.order_type == "LIMIT" for intent in intents])
+    limit_price = np.array([intent.order.price or np.nan for intent in intents], dtype=np.float64)
+
+    first_bar = np.searchsorted(timestamps, sent_at, side="right")
+    has_bar = first_bar < n
+    first_bar = np.minimum(first_bar, n - 1)
+
+    fill_bar = np.where(has_bar, first_bar, -1)
+    fill_price = bars["open"][first_bar].astype(np.float64)
+
+    limits = np.flatnonzero(is_limit & has_bar)
+    if limits.size:
+        start = first_bar[limits]
+        end = day_end[start]
+        width = int((end - start).max()) + 1
+        window = start[:, None] + np.arange(width)[None, :]
+        in_day = window <= end[:, None]
+        window = np.minimum(window, n - 1)
+
+        price = limit_price[limits][:, None]
+        buying = side[limits][:, None] > 0
+        touched = np.where(buying, bars["low"][window] <= price, bars["high"][window] >= price) & in_day
+        hit = touched.any(axis=1)
+        bar = start + touched.argmax(axis=1)
+
+        opens = bars["open"][bar]
+        fill_bar[limits] = np.where(hit, bar, -1)
+        fill_price[limits] = np.where(side[limits] > 0, np.minimum(opens, limit_price[limits]),
+                                      np.maximum(opens, limit_price[limits]))
+
+    return fill_bar, fill_price, quantity, day, day_end
+
+
+def _apply_product_rules(bars, intents, fill_bar, fill_price, quantity, day, day_end):
+    """
+    Applies CNC and MIS rules to simulated fills and returns (fills, rejected).
+    CNC sells may not exceed the delivery quantity held. MIS positions are squared off at
+    the close of the last bar of each trading day.
+    """
+    rejected = []
+    filled = fill_bar >= 0
+    for i in np.flatnonzero(~filled):
+        reason = "Limit price was not reached before the end of the day." if intents[i].order.order_type == "LIMIT" \
+            else "No bar after the order was sent."
+        rejected.append((intents[i], reason))
+
+    products = np.array([intent.order.product for intent in intents])
+    cnc = np.flatnonzero(filled & (products == "CNC"))
+    if cnc.size:
+        # Holdings depend on every earlier fill, so reject oversells one at a time; usually none.
+        cnc = cnc[np.argsort(fill_bar[cnc], kind="stable")]
+        while True:
+            holdings = np.cumsum(quantity[cnc])
+            short = np.flatnonzero(holdings < 0)
+            if not short.size:
+                break
+            i = cnc[short[0]]
+            filled[i] = False
+            rejected.append((intents[i], "CNC sell exceeds the delivery quantity held."))
+            cnc = np.delete(cnc, short[0])
+
+    keep = np.flatnonzero(filled)
+    fills = np.zeros(len(keep), dtype=FILL_DTYPE)
+    fills["bar"] = fill_bar[keep]
+    fills["timestamp"] = bars["timestamp"][fill_bar[keep]]
+    fills["quantity"] = quantity[keep]
+    fills["price"] = fill_price[keep]
+    fills["product"] = products[keep]
+
+    mis = fills[fills["product"] == "MIS"]
+    if len(mis):
+        days, first, inverse = np.unique(day[mis["bar"]], return_index=True, return_inverse=True)
+        net = np.bincount(inverse, weights=mis["quantity"]).astype(np.int64)
+        open_days = np.flatnonzero(net != 0)
+        squareoffs = np.zeros(len(open_days), dtype=FILL_DTYPE)
+        close_bar = day_end[mis["bar"][first[open_days]]]
+        squareoffs["bar"] = close_bar
+        squareoffs["timestamp"] = bars["timestamp"][close_bar]
+        squareoffs["quantity"] = -net[open_days]
+        squareoffs["price"] = bars["close"][close_bar]
+        squareoffs["product"] = "MIS"
+        squareoffs["squareoff"] = True
+        fills = np.concatenate([fills, squareoffs])
+
+    fills = fills[np.argsort(fills["bar"], kind="stable")]
+    return fills, rejected
+
+
+def _position(key: str, product: str, fills: np.ndarray, bars: np.ndarray, last_day_start: int,
+              instrument_token: int, day_only: bool) -> Position:
+    """Builds a Kite-style Position from fills, marked at the last close."""
+    if day_only:
+        fills = fills[fills["bar"] >= last_day_start]
+    quantity = int(fills["quantity"].sum())
+    buys, sells = fills[fills["quantity"] > 0], fills[fills["quantity"] < 0]
+    buy_quantity, sell_quantity = int(buys["quantity"].sum()), int(-sells["quantity"].sum())
+    buy_value = float((buys["quantity"] * buys["price"]).sum())
+    sell_value = float((-sells["quantity"] * sells["price"]).sum())
+
+    last_price = float(bars["close"][-1])
+    close_price = float(bars["close"][last_day_start - 1]) if last_day_start > 0 else 0.0
+    overnight_quantity = 0 if day_only else int(fills["quantity"][fills["bar"] < last_day_start].sum())
+
+    if quantity > 0:
+        average_price = buy_value / buy_quantity
+    elif quantity < 0:
+        average_price = sell_value / sell_quantity
+    else:
+        average_price = 0.0
+    value = sell_value - buy_value
+    pnl = value + quantity * last_price
+    unrealised = quantity * (last_price - average_price)
+
+    today = fills[fills["bar"] >= last_day_start]
+    m2m = float(-(today["quantity"] * today["price"]).sum()) + quantity * last_price - overnight_quantity * close_price
+
+    exchange, tradingsymbol = key.split(":", 1)
+    return Position(
+        tradingsymbol=tradingsymbol, exchange=exchange, instrument_token=instrument_token, product=product,
+        quantity=quantity, overnight_quantity=overnight_quantity, multiplier=1, average_price=average_price,
+        close_price=close_price, last_price=last_price, value=value, pnl=pnl, m2m=m2m,
+        unrealised=unrealised, realised=pnl - unrealised,
+    )
+
+
+def run_backtest(bars: Dict[str, np.ndarray], intents: List[Intent], instrument_tokens=None) -> BacktestResult:
+    """
+    Simulates `intents` against historical bars and returns fills, P&L and Position-shaped results.
+
+    `bars` maps 'EXCHANGE:TRADINGSYMBOL' to candle arrays in the candle store's format
+    (src.history.CANDLE_DTYPE), sorted by timestamp. All work per symbol is done with array
+    operations over its bars; the only Python loop is over symbols.
+    """
+    instrument_tokens = instrument_tokens or {}
+    by_symbol = {}
+    rejected = []
+    for intent in intents:
+        key = symbol_key(intent.order)
+        if key not in bars or not len(bars[key]):
+            rejected.append((intent, f"No bars for {key}."))
+            continue
+        by_symbol.setdefault(key, []).append(intent)
+
+    net, day_positions, all_fills, equity = [], [], {}, {}
+    for key, symbol_intents in by_symbol.items():
+        symbol_bars = bars[key]
+        fill_bar, fill_price, quantity, day, day_end = _simulate_fills(symbol_bars, symbol_intents)
+        fills, symbol_rejected = _apply_product_rules(
+            symbol_bars, symbol_intents, fill_bar, fill_price, quantity, day, day_end
+        )
+        rejected.extend(symbol_rejected)
+        all_fills[key] = fills
+
+        # P&L after each bar: cash from fills so far plus the open position at that bar's close.
+        n = len(symbol_bars)
+        position_change, cash_change = np.zeros(n), np.zeros(n)
+        np.add.at(position_change, fills["bar"], fills["quantity"])
+        np.add.at(cash_change, fills["bar"], -fills["quantity"] * fills["price"])
+        equity[key] = np.cumsum(cash_change) + np.cumsum(position_change) * symbol_bars["close"]
+
+        last_day_start = int(np.searchsorted(day, day[-1], side="left"))
+        token = instrument_tokens.get(key, 0)
+        for product in ("CNC", "MIS"):
+            product_fills = fills[fills["product"] == product]
+            if not len(product_fills):
+                continue
+            net.append(_position(key, product, product_fills, symbol_bars, last_day_start, token, False))
+            if (product_fills["bar"] >= last_day_start).any():
+                day_positions.append(_position(key, product, product_fills, symbol_bars, last_day_start, token, True))
+
+    return BacktestResult(GetPositionsOutput(net=net, day=day_positions), all_fills, equity, rejected)
+
+
+# --- Parameter sweeps ---
+# Bars are sent to each worker process once, when it starts, rather than with every task.
+_worker_bars = None
+
+
+def _init_sweep_worker(bars):
+    global _worker_bars
+    _worker_bars = bars
+
+
+def _run_sweep_point(strategy, params: dict) -> dict:
+    result = run_backtest(_worker_bars, strategy(_worker_bars, **params))
+    return {"params": params, **result.summary()}
+
+
+def sweep(strategy, bars: Dict[str, np.ndarray], param_grid: Dict[str, list], processes=None) -> List[dict]:
+    """
+    Runs `strategy(bars, **params) -> List[Intent]` for every combination in `param_grid`
+    across a process pool and returns one summary per combination, in grid order.
+    `strategy` must be a module-level function so it can be sent to worker processes.
+    """
+    names = list(param_grid)
+    points = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_sweep_worker, initargs=(bars,)) as pool:
+        return list(pool.map(functools.partial(_run_sweep_point, strategy), points))
+
+
+def moving_average_crossover(bars: Dict[str, np.ndarray], fast: int = 10, slow: int = 30,
+                             quantity: int = 1, product: str = "MIS") -> List[Intent]:
+    """
+    An example strategy: buy when the fast moving average crosses above the slow one and sell
+    when it crosses back below. Signals are computed with array operations for every symbol.
+    Raises ValueError unless 0 < fast < slow.
+    """
+    if not 0 < fast < slow:
+        raise ValueError(f"moving_average_crossover needs 0 < fast < slow, got fast={fast} and slow={slow}.")
+    intents = []
+    for key, symbol_bars in bars.items():
+        close = symbol_bars["close"]
+        if len(close) <= slow:
+            continue
+        cumulative = np.concatenate([[0.0], np.cumsum(close)])
+        fast_ma = (cumulative[slow:] - cumulative[slow - fast:-fast]) / fast
+        slow_ma = (cumulative[slow:] - cumulative[:-slow]) / slow
+        above = fast_ma > slow_ma
+        crosses = np.flatnonzero(above[1:] != above[:-1]) + 1
+
+        exchange, tradingsymbol = key.split(":", 1)
+        for i in crosses:
+            # The fields are known to be valid, so skip re-validating every generated order.
+            intents.append(Intent(
+                int(symbol_bars["timestamp"][i + slow - 1]),
+                PlaceOrderInput.model_construct(
+                    tradingsymbol=tradingsymbol, exchange=exchange, quantity=quantity, product=product,
+                    transaction_type="BUY" if above[i] else "SELL", order_type="MARKET", price=None,
+                ),
+            ))
+    return intents
@@ -0,0 +1,114 @@
+# src/batching.py
+import asyncio
+import time
+
+
+class QuoteBatcher:
+    """
+    Coalesces quote lookups from concurrent requests into batched broker calls.
+
+    Instrument keys requested within a short window are collected into one set and fetched with
+    a single call (split only if it exceeds the broker's per-call limit). Each instrument's quote
+    is then cached for a short TTL, so broker calls grow with the number of distinct symbols per
+    window rather than with the number of requests.
+    """
+
+    def __init__(self, fetch, window: float, ttl: float, max_batch: int, max_cache: int = 10000):
+        self._fetch = fetch  # async callable: list of keys -> {key: quote}
+        self.window = window
+        self.ttl = ttl
+        self.max_batch = max_batch
+        self.max_cache = max_cache
+
+        self._pending = {}  # key -> future shared by every caller waiting for it
+        self._cache = {}    # key -> (quote, fetched_at)
+        self._flush_handle = None
+        self._sending = set()  # references to in-flight _send tasks, so they are not collected
+        self.batches_sent = 0
+
+    async def get(self, keys) -> dict:
+        """Returns quotes for `keys`. Instruments the broker does not know are left out."""
+        now = time.monotonic()
+        result = {}
+        waiting = {}
+
+        for key in keys:
+            cached = self._cache.get(key)
+            if cached is not None and now - cached[1] < self.ttl:
+                result[key] = cached[0]
+                continue
+            future = self._pending.get(key)
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._pending[key] = future
+            waiting[key] = future
+
+        if waiting:
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+            for key, future in waiting.items():
+                # Shield the shared future so one caller giving up does not cancel it for others.
+                quote = await asyncio.shield(future)
+                if quote is not None:
+                    result[key] = quote
+
+        return result
+
+    def last_price(self, key: str):
+        """Returns the last price from the most recent cached quote for `key`, however old, or None."""
+        cached = self._cache.get(key)
+        return cached[0].get("last_price") if cached is not None else None
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: dict):
+        try:
+            await self._send_chunks(batch)
+        except BaseException as e:
+            # Nobody may be left to wake the callers of chunks not sent yet, so fail them here.
+            if not isinstance(e, Exception):
+                e = RuntimeError("The quote batch was cancelled before it was fetched.")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        finally:
+            # Mark errors as retrieved even if every waiter went away.
+            for future in batch.values():
+                if future.done() and not future.cancelled():
+                    future.exception()
+
+    async def _send_chunks(self, batch: dict):
+        keys = list(batch)
+        for start in range(0, len(keys), self.max_batch):
+            chunk = keys[start:start + self.max_batch]
+            self.batches_sent += 1
+            try:
+                quotes = await self._fetch(chunk)
+            except Exception as e:
+                for key in chunk:
+                    if not batch[key].done():
+                        batch[key].set_exception(e)
+                continue
+
+            fetched_at = time.monotonic()
+            if len(self._cache) > self.max_cache:
+                self._cache = {k: v for k, v in self._cache.items() if fetched_at - v[1] < self.ttl}
+            for key in chunk:
+                quote = quotes.get(key)
+                if quote is not None:
+                    self._cache[key] = (quote, fetched_at)
+                if not batch[key].done():
+                    batch[key].set_result(quote)
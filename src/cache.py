@@ -0,0 +1,62 @@
+# src/cache.py
+import asyncio
+import time
+from typing import Any, NamedTuple
+
+
+class CacheResult(NamedTuple):
+    """A cached value plus where it came from and how old it is."""
+    value: Any
+    age: float      # Seconds since the broker call that produced the value started.
+    status: str     # "hit", "miss" (this caller loaded it), "shared" (joined an in-flight load)
+                    # or "local" (served by the portfolio engine; age is since the last reconciliation).
+
+
+class CachedValue:
+    """
+    Holds one broker response for a short TTL, with single-flight loading.
+
+    While a load is in flight, concurrent callers wait for that same call instead of starting
+    their own. `invalidate()` drops the cached value and detaches any in-flight load, so a
+    response that started before the invalidation is never served afterwards.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value = None
+        self._fetched_at = None
+        self._inflight = None
+        self._generation = 0
+
+    async def get(self, loader) -> CacheResult:
+        """Returns the cached value if fresh, otherwise awaits `loader()` (shared by concurrent callers)."""
+        now = time.monotonic()
+        if self._fetched_at is not None and now - self._fetched_at < self.ttl:
+            return CacheResult(self._value, now - self._fetched_at, "hit")
+
+        status = "shared"
+        if self._inflight is None:
+            status = "miss"
+            self._inflight = asyncio.ensure_future(self._load(loader, self._generation))
+
+        # Shield the shared load so one caller giving up does not cancel it for everyone.
+        value, fetched_at = await asyncio.shield(self._inflight)
+        return CacheResult(value, time.monotonic() - fetched_at, status)
+
+    def invalidate(self):
+        """Forgets the cached value. The next `get` always goes to the broker."""
+        self._generation += 1
+        self._value = None
+        self._fetched_at = None
+        self._inflight = None
+
+    async def _load(self, loader, generation):
+        started_at = time.monotonic()
+        try:
+            value = await loader()
+            if generation == self._generation:
+                self._value, self._fetched_at = value, started_at
+            return value, started_at
+        finally:
+            if self._inflight is asyncio.current_task():
+                self._inflight = None
@@ -0,0 +1,237 @@
+# src/coordinator.py
+import asyncio
+import hmac
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import secrets
+import struct
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.logs import configure_logging
+from src.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+# The KiteHelper methods API workers may call. Everything else stays inside the coordinator.
+PROXIED_METHODS = frozenset({
+    "place_order_async", "place_orders_async", "cancel_order_async", "get_positions_cached",
+    "get_positions_encoded", "get_quotes", "lookup_instrument", "get_ltp", "get_bars",
+    "get_historical", "apply_postback", "update_credentials", "journal_orders", "scheduler_stats",
+    "portfolio_stats", "risk_stats", "render_metrics",
+})
+
+# Proxied methods with side effects at the broker or in shared state. They are left to finish
+# when the worker that called them disconnects; every other call is cancelled.
+FINISH_ON_DISCONNECT = frozenset({
+    "place_order_async", "place_orders_async", "cancel_order_async", "apply_postback", "update_credentials",
+})
+
+_HEADER = struct.Struct("!I")
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return await reader.readexactly(size)
+
+
+def _frame(payload: bytes) -> bytes:
+    return _HEADER.pack(len(payload)) + payload
+
+
+class Coordinator:
+    """
+    Owns the one KiteHelper shared by every API worker process.
+
+    Workers forward KiteHelper calls over a local socket, so the rate-limit scheduler, the
+    positions cache, idempotency keys and the broker connection pool exist once, however many
+    workers serve HTTP. Request parsing, validation and JSON encoding stay in the workers.
+    Each connection must first send the shared secret; nothing is unpickled before that.
+    """
+
+    def __init__(self, helper, secret: bytes):
+        self.helper = helper
+        self.secret = secret
+        self._finishing = set()  # calls from disconnected workers that are left to finish
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        await self.helper.start()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # The loop only keeps weak references to tasks, so calls in flight are held here until done.
+        tasks = {}  # task -> method
+        try:
+            if not hmac.compare_digest(await _read_frame(reader), self.secret):
+                return
+            while True:
+                call_id, method, args, kwargs = pickle.loads(await _read_frame(reader))
+                task = asyncio.create_task(self._dispatch(writer, call_id, method, args, kwargs))
+                tasks[task] = method
+                task.add_done_callback(lambda done: tasks.pop(done, None))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # Nobody is left to receive the results. Orders already on their way to the broker
+            # still finish, so their idempotency and journal entries are resolved, as they would
+            # be in a single process; only the reply is dropped.
+            for task, method in list(tasks.items()):
+                if method in FINISH_ON_DISCONNECT:
+                    self._finishing.add(task)
+                    task.add_done_callback(self._finishing.discard)
+                else:
+                    task.cancel()
+            writer.close()
+
+    async def _dispatch(self, writer, call_id, method, args, kwargs):
+        try:
+            if method not in PROXIED_METHODS:
+                raise AttributeError(f"KiteHelper.{method} cannot be called from a worker.")
+            response = (call_id, True, await getattr(self.helper, method)(*args, **kwargs))
+        except Exception as e:
+            response = (call_id, False, e)
+
+        try:
+            payload = pickle.dumps(response)
+        except Exception:
+            # An exception type that cannot cross processes is sent as its message.
+            payload = pickle.dumps((call_id, False, RuntimeError(str(response[2]))))
+        if not writer.is_closing():
+            writer.write(_frame(payload))
+
+
+def _run_coordinator(secret: bytes, ready):
+    """Entry point of the coordinator process. Sends its port through `ready` once listening."""
+    from src.kite_utils import KiteHelper
+    configure_logging("coordinator")
+
+    async def main():
+        server = await Coordinator(KiteHelper(), secret).serve()
+        ready.send(server.sockets[0].getsockname()[1])
+        ready.close()
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
+
+
+def start_coordinator():
+    """
+    Starts the coordinator process and exports its address and secret to the environment,
+    where API worker processes started afterwards pick them up.
+    Raises RuntimeError if the coordinator exits before it is listening.
+    """
+    secret = secrets.token_bytes(32)
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_coordinator, args=(secret, sender), daemon=True, name="kite-coordinator")
+    process.start()
+    # Only the child may hold the sending end, so its exit ends the wait below.
+    sender.close()
+    try:
+        port = receiver.recv()
+    except EOFError:
+        process.join(5)
+        raise RuntimeError(
+            f"The broker coordinator exited during startup (exit code {process.exitcode}); see its error above."
+        ) from None
+    finally:
+        receiver.close()
+    os.environ["KITE_COORDINATOR"] = f"127.0.0.1:{port}"
+    os.environ["KITE_COORDINATOR_SECRET"] = secret.hex()
+    logger.info("Broker coordinator listening on 127.0.0.1:%s (pid %s; send it SIGHUP to reload credentials).",
+                port, process.pid)
+    return process
+
+
+class RemoteKiteHelper:
+    """
+    Stands in for KiteHelper inside an API worker. Every proxied method is forwarded to the
+    coordinator over one multiplexed connection and awaited like the local coroutine.
+    """
+
+    def __init__(self, address: str, secret: bytes):
+        host, port = address.rsplit(":", 1)
+        self.host, self.port = host, int(port)
+        self.secret = secret
+        self._writer = None
+        self._reader_task = None
+        self._pending = {}
+        self._ids = itertools.count()
+        self._connect_lock = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ["KITE_COORDINATOR"], bytes.fromhex(os.environ["KITE_COORDINATOR_SECRET"]))
+
+    async def start(self):
+        await self._connect()
+        logger.info("Worker %s connected to the broker coordinator at %s:%s.", os.getpid(), self.host, self.port)
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    async def _connect(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            writer.write(_frame(self.secret))
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read_responses(reader))
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                call_id, ok, result = pickle.loads(await _read_frame(reader))
+                future = self._pending.pop(call_id, None)
+                if future is None or future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            error = ConnectionError(f"Lost the connection to the broker coordinator: {e}")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._writer = None
+
+    async def _call(self, method: str, *args, **kwargs):
+        if self._writer is None or self._writer.is_closing():
+            await self._connect()
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = future
+        self._writer.write(_frame(pickle.dumps((call_id, method, args, kwargs))))
+        started = time.perf_counter()
+        try:
+            return await future
+        finally:
+            self._pending.pop(call_id, None)
+            # Broker timings are recorded by the coordinator; the worker sees the round trip.
+            record_stage("coordinator", time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        if name not in PROXIED_METHODS:
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            return await self._call(name, *args, **kwargs)
+
+        return call
@@ -0,0 +1,92 @@
+# src/encoding.py
+import gzip
+import hashlib
+import os
+from typing import NamedTuple, Optional
+
+import orjson
+
+
+class EncodedJSON(NamedTuple):
+    """A value encoded to JSON bytes, with its ETag and, for large bodies, a gzipped copy."""
+    body: bytes
+    etag: str
+    gzipped: Optional[bytes]
+
+    @property
+    def gzip_etag(self) -> str:
+        """The gzipped copy's ETag. It is a different representation, so it needs a tag of its own."""
+        return self.etag[:-1] + '-gz"'
+
+
+class SnapshotEncoder:
+    """
+    Encodes successive snapshots of one value (e.g. positions) to JSON bytes with orjson,
+    reusing the last encoding while the snapshot is unchanged.
+
+    The same object served again (a cache hit) is recognised by identity and not re-encoded.
+    An equal snapshot built afresh is recognised by its bytes, so its ETag stays the same and
+    its gzipped copy is reused.
+    """
+
+    def __init__(self, gzip_min_bytes=None):
+        self.gzip_min_bytes = gzip_min_bytes if gzip_min_bytes is not None else int(os.getenv("KITE_GZIP_MIN_BYTES", "1024"))
+        self._value = None
+        self._encoded = None
+
+    def encode(self, value, compress: bool = False) -> EncodedJSON:
+        """
+        Returns `value` as JSON bytes. With `compress`, bodies of at least `gzip_min_bytes` also
+        get a gzipped copy, made on the first such request for each snapshot and then kept.
+        """
+        encoded = self._encode(value)
+        if compress and encoded.gzipped is None and len(encoded.body) >= self.gzip_min_bytes:
+            # Level 1 compresses JSON well enough at a fraction of the default level's CPU cost.
+            encoded = self._encoded = encoded._replace(gzipped=gzip.compress(encoded.body, compresslevel=1, mtime=0))
+        return encoded
+
+    def _encode(self, value) -> EncodedJSON:
+        if self._encoded is not None and value is self._value:
+            return self._encoded
+
+        body = orjson.dumps(value)
+        self._value = value
+        if self._encoded is not None and body == self._encoded.body:
+            return self._encoded
+
+        self._encoded = EncodedJSON(body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"', None)
+        return self._encoded
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    True if an Accept-Encoding header allows gzip: named with a q-value above 0, or covered by
+    "*" when gzip is not named. "gzip;q=0" refuses it, and an unreadable q-value counts as 0.
+    """
+    wildcard = None
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding != "*":
+            return q > 0
+        wildcard = q > 0
+    return bool(wildcard)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header names `etag` (weak comparison, as HTTP requires for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,63 @@
+# src/executor.py
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the broker execution queue is full and a call is rejected."""
+
+
+class BrokerExecutor:
+    """
+    Runs blocking broker calls on a bounded worker pool so they never block the event loop.
+
+    Every call occupies a queue slot from the moment it is submitted until it finishes,
+    so at most `max_workers` calls run at once and at most `max_queue` more wait for a worker.
+    Calls beyond that are rejected immediately instead of piling up behind a slow broker.
+    """
+
+    def __init__(self, max_workers=None, max_queue=None, timeout=None):
+        self.max_workers = max_workers or int(os.getenv("KITE_WORKER_POOL_SIZE", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("KITE_WORKER_QUEUE_DEPTH", "64"))
+        self.timeout = timeout or float(os.getenv("KITE_CALL_TIMEOUT", "10"))
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kite-broker")
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of calls that are currently running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """
+        Runs `func(*args, **kwargs)` on the worker pool and awaits its result.
+        Raises ExecutorBusyError if the queue is full and asyncio.TimeoutError if the
+        call does not finish within the timeout.
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            raise ExecutorBusyError(
+                f"Broker queue is full ({self._pending} calls pending). Try again shortly."
+            )
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        future = loop.run_in_executor(self._pool, functools.partial(func, *args, **kwargs))
+        # The slot is released when the worker finishes, not when the caller stops waiting,
+        # so a timed-out call still counts against the queue until the broker returns.
+        future.add_done_callback(self._release)
+
+        # Shield the worker future so a timeout does not try to cancel a running thread.
+        return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+
+    def _release(self, future):
+        self._pending -= 1
+        # Mark the result as retrieved so abandoned (timed-out) calls do not log warnings.
+        if not future.cancelled():
+            future.exception()
+
+    def shutdown(self):
+        """Stops accepting new calls and waits for running ones to finish."""
+        self._pool.shutdown(wait=True)
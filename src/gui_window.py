@@ -0,0 +1,453 @@
+# src/gui_window.py
+import sys
+import os
+import signal
+import webbrowser
+import time
+import logging
+import multiprocessing
+import queue
+from collections import deque
+from pathlib import Path
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout, 
+                           QWidget, QTextEdit, QLabel, QGridLayout, QGroupBox,
+                           QHBoxLayout, QLineEdit, QTabWidget, QStatusBar, QMessageBox,
+                           QListView, QComboBox)
+from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot, QProcess, QAbstractListModel, QModelIndex, QTimer
+from PyQt5.QtGui import QFont, QIcon, QTextCursor, QColor
+
+from dotenv import load_dotenv
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.gui import KiteLoginManager, APIServerProcess
+
+
+class LogRedirector:
+    """Redirects standard output and error to the log view, without touching widgets on write"""
+    
+    def __init__(self, log_view):
+        self.log_view = log_view
+        self.original_stdout = sys.__stdout__
+    
+    def write(self, text):
+        # Write both to the original stdout and to the log view's pending lines
+        self.original_stdout.write(text)
+        for line in text.splitlines():
+            if line.strip():
+                self.log_view.add_local(line)
+    
+    def flush(self):
+        self.original_stdout.flush()
+
+
+class LogModel(QAbstractListModel):
+    """
+    The log lines that pass the current filter, as a list model for QListView.
+
+    All lines are kept in a ring buffer of `capacity` lines, and the lines that pass the filter
+    in a second one, so memory stays flat however long the window is open. New lines arrive in
+    batches; each batch is one insert (and, once full, one removal) for the view.
+    """
+
+    LEVEL_COLORS = {logging.WARNING: QColor("#b36b00"), logging.ERROR: QColor("#c62828"), logging.CRITICAL: QColor("#c62828")}
+
+    def __init__(self, capacity, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self._lines = deque(maxlen=capacity)  # (level number, text)
+        self._visible = deque(maxlen=capacity)
+        self._min_level = logging.NOTSET
+        self._needle = ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        level, text = self._visible[index.row()]
+        if role == Qt.DisplayRole:
+            return text
+        if role == Qt.ForegroundRole:
+            return self.LEVEL_COLORS.get(level)
+        return None
+
+    def _matches(self, line):
+        level, text = line
+        return level >= self._min_level and (not self._needle or self._needle in text.lower())
+
+    def append_batch(self, lines):
+        """Adds lines to the buffer and shows those that pass the filter."""
+        self._lines.extend(lines)
+        shown = [line for line in lines if self._matches(line)][-self.capacity:]
+        if not shown:
+            return
+
+        overflow = len(self._visible) + len(shown) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._visible.popleft()
+            self.endRemoveRows()
+
+        first = len(self._visible)
+        self.beginInsertRows(QModelIndex(), first, first + len(shown) - 1)
+        self._visible.extend(shown)
+        self.endInsertRows()
+
+    def set_filter(self, text, min_level):
+        """Shows only lines containing `text` (case-insensitive) at `min_level` or above."""
+        self.beginResetModel()
+        self._needle = text.strip().lower()
+        self._min_level = min_level
+        self._visible = deque((line for line in self._lines if self._matches(line)), maxlen=self.capacity)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines.clear()
+        self._visible.clear()
+        self.endResetModel()
+
+
+class LogViewer(QWidget):
+    """
+    Shows log lines from the server process and from this window. Lines are collected as they
+    arrive and added to the view in one batch per timer tick, and only the rows on screen are
+    drawn, so the window stays responsive at thousands of lines per second.
+    """
+
+    LEVELS = [("All levels", logging.NOTSET), ("Info and above", logging.INFO),
+              ("Warnings and errors", logging.WARNING), ("Errors only", logging.ERROR)]
+
+    def __init__(self, parent=None, capacity=None, interval_ms=100, max_batch=20000):
+        super().__init__(parent)
+        capacity = capacity or int(os.getenv("KITE_GUI_LOG_LINES", "50000"))
+        # Lists of lines from the server process. Bounded, so a window that falls behind makes
+        # the server drop lines rather than grow memory.
+        self.log_queue = multiprocessing.Queue(maxsize=1000)
+        self.max_batch = max_batch
+        self._local = deque(maxlen=capacity)  # Lines written in this process, e.g. by print.
+
+        self.model = LogModel(capacity, self)
+        self.view = QListView()
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)  # Row heights need not be measured line by line.
+        self.view.setFont(QFont("Consolas", 10))
+        self.view.setSelectionMode(QListView.ExtendedSelection)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter lines...")
+        self.filter_input.textChanged.connect(self.apply_filter)
+        self.level_box = QComboBox()
+        for label, _ in self.LEVELS:
+            self.level_box.addItem(label)
+        self.level_box.currentIndexChanged.connect(self.apply_filter)
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.model.clear)
+
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(self.filter_input)
+        filter_layout.addWidget(self.level_box)
+        filter_layout.addWidget(clear_button)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.view)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.drain)
+        self.timer.start(interval_ms)
+
+    def add_local(self, text, level=logging.INFO):
+        """Queues a line from this process. Safe to call from any thread."""
+        self._local.append((level, text))
+
+    def drain(self):
+        """Moves the lines that arrived since the last tick into the view."""
+        batch = []
+        while self._local and len(batch) < self.max_batch:
+            batch.append(self._local.popleft())
+        while len(batch) < self.max_batch:
+            try:
+                batch.extend(self.log_queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+
+        scrollbar = self.view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.model.append_batch(batch)
+        if at_bottom:
+            self.view.scrollToBottom()
+
+    def apply_filter(self, *_):
+        self.model.set_filter(self.filter_input.text(), self.LEVELS[self.level_box.currentIndex()][1])
+        self.view.scrollToBottom()
+
+
+class ClaudeTraderGUI(QMainWindow):
+    """Main GUI window for the Claude-Python Trading Bot"""
+    
+    def __init__(self):
+        super().__init__()
+        self.login_manager = KiteLoginManager()
+        self.server_process = None
+        
+        load_dotenv()  # Load environment variables
+        
+        self.init_ui()
+        self.update_server_status()
+        
+    def init_ui(self):
+        """Initialize the user interface"""
+        self.setWindowTitle("Claude-Python Trading Bot")
+        self.setGeometry(100, 100, 800, 600)
+        
+        # Create main layout
+        main_widget = QWidget()
+        self.setCentralWidget(main_widget)
+        main_layout = QVBoxLayout(main_widget)
+        
+        # Create tab widget
+        tab_widget = QTabWidget()
+        main_layout.addWidget(tab_widget)
+        
+        # Create tabs
+        self.server_tab = QWidget()
+        self.token_tab = QWidget()
+        self.help_tab = QWidget()
+        
+        tab_widget.addTab(self.server_tab, "Server Control")
+        tab_widget.addTab(self.token_tab, "Token Management")
+        tab_widget.addTab(self.help_tab, "Help")
+        
+        # Set up the server control tab
+        self.setup_server_tab()
+        
+        # Set up the token management tab
+        self.setup_token_tab()
+        
+        # Set up the help tab
+        self.setup_help_tab()
+        
+        # Create status bar
+        self.status_bar = QStatusBar()
+        self.setStatusBar(self.status_bar)
+        
+        # Create server status label in status bar
+        self.server_status_label = QLabel("Server status: Not running")
+        self.status_bar.addPermanentWidget(self.server_status_label)
+        
+    def setup_server_tab(self):
+        """Set up the server control tab"""
+        layout = QVBoxLayout(self.server_tab)
+        
+        # Create controls
+        control_group = QGroupBox("Server Control")
+        control_layout = QHBoxLayout()
+        
+        self.start_button = QPushButton("Start Trading API Server")
+        self.start_button.clicked.connect(self.start_server)
+        control_layout.addWidget(self.start_button)
+        
+        self.stop_button = QPushButton("Stop Trading API Server")
+        self.stop_button.clicked.connect(self.stop_server)
+        self.stop_button.setEnabled(False)
+        control_layout.addWidget(self.stop_button)
+        
+        control_group.setLayout(control_layout)
+        layout.addWidget(control_group)
+        
+        # Create log output
+        log_group = QGroupBox("Server Log")
+        log_layout = QVBoxLayout()
+        
+        self.log_view = LogViewer()
+        log_layout.addWidget(self.log_view)
+        
+        # Redirect stdout to log output
+        sys.stdout = LogRedirector(self.log_view)
+        sys.stderr = LogRedirector(self.log_view)
+        
+        log_group.setLayout(log_layout)
+        layout.addWidget(log_group)
+        
+    def setup_token_tab(self):
+        """Set up the token management tab"""
+        layout = QVBoxLayout(self.token_tab)
+        
+        # Create step-by-step instructions
+        instructions_group = QGroupBox("How to Generate an Access Token")
+        instructions_layout = QVBoxLayout()
+        
+        instructions = QLabel("""
+        <ol>
+            <li>Click the "Open Zerodha Login" button below.</li>
+            <li>Log in to your Zerodha account.</li>
+            <li>After successful login, you'll be redirected to a new page.</li>
+            <li>Copy the request token from the URL parameter.</li>
+            <li>Paste the request token in the field below and click Generate.</li>
+        </ol>
+        """)
+        instructions.setWordWrap(True)
+        instructions_layout.addWidget(instructions)
+        
+        instructions_group.setLayout(instructions_layout)
+        layout.addWidget(instructions_group)
+        
+        # Create login button
+        login_group = QGroupBox("Step 1: Login to Zerodha")
+        login_layout = QVBoxLayout()
+        
+        login_button = QPushButton("Open Zerodha Login")
+        login_button.clicked.connect(self.open_kite_login)
+        login_layout.addWidget(login_button)
+        
+        login_group.setLayout(login_layout)
+        layout.addWidget(login_group)
+        
+        # Create token input field
+        token_group = QGroupBox("Step 2: Generate Access Token")
+        token_layout = QGridLayout()
+        
+        token_label = QLabel("Request Token:")
+        token_layout.addWidget(token_label, 0, 0)
+        
+        self.token_input = QLineEdit()
+        token_layout.addWidget(self.token_input, 0, 1)
+        
+        token_button = QPushButton("Generate Access Token")
+        token_button.clicked.connect(self.generate_access_token)
+        token_layout.addWidget(token_button, 1, 1, Qt.AlignRight)
+        
+        current_token_label = QLabel("Current Token:")
+        token_layout.addWidget(current_token_label, 2, 0)
+        
+        self.current_token_display = QLineEdit()
+        self.current_token_display.setReadOnly(True)
+        self.current_token_display.setText(os.getenv("KITE_ACCESS_TOKEN", "No token found"))
+        token_layout.addWidget(self.current_token_display, 2, 1)
+        
+        token_group.setLayout(token_layout)
+        layout.addWidget(token_group)
+        
+    def setup_help_tab(self):
+        """Set up the help tab"""
+        layout = QVBoxLayout(self.help_tab)
+        
+        help_text = QTextEdit()
+        help_text.setReadOnly(True)
+        
+        help_content = """
+        <h1>Claude-Python Trading Bot Help</h1>
+        
+        <h2>Getting Started</h2>
+        <ol>
+            <li>First, generate a Zerodha access token in the Token Management tab.</li>
+            <li>Then, start the API server in the Server Control tab.</li>
+            <li>Finally, open Claude in the desktop app and initiate a conversation.</li>
+        </ol>
+        
+        <h2>Using Claude with the Trading Bot</h2>
+        <p>Once the server is running, you can ask Claude to perform trading actions like:</p>
+        <ul>
+            <li>"Buy 10 shares of INFY at market price."</li>
+            <li>"Show me my current holdings."</li>
+            <li>"Sell 5 shares of TCS at limit price 3600."</li>
+        </ul>
+        
+        <h2>Troubleshooting</h2>
+        <p>If you encounter issues:</p>
+        <ul>
+            <li>Check that your Zerodha API key and access token are valid</li>
+            <li>Make sure the API server is running before connecting with Claude</li>
+            <li>Remember that access tokens expire daily</li>
+        </ul>
+        """
+        
+        help_text.setHtml(help_content)
+        layout.addWidget(help_text)
+    
+    def open_kite_login(self):
+        """Open Kite login page in the default browser"""
+        login_url = self.login_manager.get_login_url()
+        webbrowser.open(login_url)
+    
+    def generate_access_token(self):
+        """Generate and save a new access token"""
+        request_token = self.token_input.text().strip()
+        
+        if not request_token:
+            QMessageBox.warning(self, "Token Error", "Please enter a request token.")
+            return
+            
+        try:
+            access_token = self.login_manager.generate_access_token(request_token)
+            self.login_manager.update_env_file(access_token)
+            self.current_token_display.setText(access_token)
+            
+            QMessageBox.information(
+                self, "Success", 
+                "Access token generated and saved to .env file successfully!"
+            )
+            
+            # Clear the request token input
+            self.token_input.clear()
+            
+            # Reload environment variables
+            load_dotenv(override=True)
+
+            # A running server picks up the new token from .env on its own; SIGHUP makes it immediate.
+            if hasattr(signal, "SIGHUP") and self.server_process is not None and self.server_process.is_alive():
+                os.kill(self.server_process.pid, signal.SIGHUP)
+        except Exception as e:
+            QMessageBox.critical(self, "Token Error", f"Error generating access token: {e}")
+    
+    def start_server(self):
+        """Start the API server in a separate process"""
+        if self.server_process is None or not self.server_process.running:
+            self.server_process = APIServerProcess(self, self.log_view.log_queue)
+            self.server_process.start()
+            
+            # Wait a moment for the server to start
+            time.sleep(1.0)
+            self.update_server_status()
+            
+            self.log_view.add_local("Starting Trading API server...")
+    
+    def stop_server(self):
+        """Stop the API server"""
+        if self.server_process is not None and self.server_process.running:
+            self.log_view.add_local("Stopping Trading API server...")
+            self.server_process.stop()
+            self.update_server_status()
+    def update_server_status(self):
+        """Update the server status display"""
+        running = hasattr(self, 'server_process') and self.server_process is not None and self.server_process.is_alive()
+        
+        if running:
+            self.server_status_label.setText("Server status: Running")
+            self.start_button.setEnabled(False)
+            self.stop_button.setEnabled(True)
+        else:
+            self.server_status_label.setText("Server status: Not running")
+            self.start_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
+    
+    def closeEvent(self, event):
+        """Handle window close event"""
+        if self.server_process is not None and self.server_process.is_alive():
+            # Stop the server before closing
+            self.stop_server()
+        
+        # Restore the original stdout and stderr
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
+        
+        event.accept()
@@ -0,0 +1,226 @@
+# src/history.py
+import asyncio
+import datetime
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CANDLE_DTYPE = np.dtype([
+    ("timestamp", np.int64),  # Candle start, Unix seconds.
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.int64),
+])
+
+# Candle length and the longest range Kite returns in one historical call, per interval.
+INTERVALS = {
+    "minute": (60, 60),
+    "3minute": (180, 100),
+    "5minute": (300, 100),
+    "10minute": (600, 100),
+    "15minute": (900, 200),
+    "30minute": (1800, 200),
+    "60minute": (3600, 400),
+    "day": (86400, 2000),
+}
+
+IST_OFFSET = 19800  # Kite candles align to Indian Standard Time.
+IST = datetime.timezone(datetime.timedelta(seconds=IST_OFFSET))
+
+
+def parse_ist(value: str, end_of_day: bool = False) -> int:
+    """
+    Parses 'YYYY-MM-DD' or an ISO datetime to Unix seconds. Naive values are taken as IST.
+    A bare date used as the end of a range means the end of that day.
+    """
+    moment = datetime.datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=IST)
+    timestamp = int(moment.timestamp())
+    if end_of_day and len(value) == 10:
+        timestamp += 86399
+    return timestamp
+
+
+def format_ist(timestamp: int) -> str:
+    """Formats Unix seconds the way the Kite historical API expects (IST wall time)."""
+    return datetime.datetime.fromtimestamp(timestamp, IST).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _merge_ranges(ranges):
+    """Merges overlapping or touching [start, end] ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(covered, start: int, end: int):
+    """Returns the parts of [start, end] not inside any covered range."""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - 1))
+        cursor = max(cursor, covered_end + 1)
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def to_candle_records(candles) -> np.ndarray:
+    """
+    Converts broker candles to the on-disk record format. Accepts the REST form
+    ([timestamp, o, h, l, c, v] lists) and kiteconnect's dicts with a `date` field.
+    """
+    records = np.zeros(len(candles), dtype=CANDLE_DTYPE)
+    for i, candle in enumerate(candles):
+        if isinstance(candle, dict):
+            candle = [candle["date"], candle["open"], candle["high"], candle["low"], candle["close"], candle["volume"]]
+        moment = candle[0]
+        if isinstance(moment, str):
+            moment = datetime.datetime.fromisoformat(moment)
+        records[i] = (int(moment.timestamp()), candle[1], candle[2], candle[3], candle[4], candle[5])
+    return records
+
+
+class CandleSeries:
+    """The stored candles and covered time ranges for one instrument and interval."""
+
+    def __init__(self, candles: np.ndarray, covered: list):
+        self.candles = candles
+        self.covered = covered
+        self.lock = asyncio.Lock()
+
+    def slice(self, start: int, end: int) -> np.ndarray:
+        """Returns candles starting within [start, end] as a view into the memory map (no copy)."""
+        timestamps = self.candles["timestamp"]
+        lo = np.searchsorted(timestamps, start, side="left")
+        hi = np.searchsorted(timestamps, end, side="right")
+        return self.candles[lo:hi]
+
+
+class CandleStore:
+    """
+    A local columnar cache of historical candles, one memory-mapped file per instrument and interval.
+
+    Alongside each file it records which time ranges have already been fetched, so a query
+    only asks the broker for the gaps and merges them in. A repeat query for a covered range
+    is answered by slicing the memory map, with no network call and no copy.
+    """
+
+    def __init__(self, fetch, data_dir=None, max_open=None):
+        self._fetch = fetch  # async (instrument_token, interval, from_ts, to_ts) -> candles
+        default_dir = Path(__file__).parent.parent / "data"
+        self.data_dir = Path(data_dir or os.getenv("KITE_DATA_DIR", default_dir)) / "history"
+        self.max_open = max_open or int(os.getenv("KITE_HISTORY_MAX_OPEN", "256"))
+        self._series = OrderedDict()
+
+    def _paths(self, instrument_token: int, interval: str):
+        stem = self.data_dir / f"{instrument_token}-{interval}"
+        return stem.with_suffix(".npy"), stem.with_suffix(".json")
+
+    def _open(self, instrument_token: int, interval: str) -> CandleSeries:
+        key = (instrument_token, interval)
+        series = self._series.get(key)
+        if series is not None:
+            self._series.move_to_end(key)
+            return series
+
+        data_path, ranges_path = self._paths(instrument_token, interval)
+        if data_path.exists() and ranges_path.exists():
+            candles = np.load(data_path, mmap_mode="r")
+            covered = json.loads(ranges_path.read_text())
+        else:
+            candles, covered = np.zeros(0, dtype=CANDLE_DTYPE), []
+
+        series = CandleSeries(candles, covered)
+        self._series[key] = series
+        if len(self._series) > self.max_open:
+            # Skip series with a fetch in flight: reopening one would give it a second lock,
+            # and two fetches could then write the same file at once.
+            idle = next((k for k, s in self._series.items() if k != key and not s.lock.locked()), None)
+            if idle is not None:
+                del self._series[idle]
+        return series
+
+    def _write(self, instrument_token: int, interval: str, series: CandleSeries, new_candles: np.ndarray, new_ranges):
+        """Merges fetched candles into the stored file and remaps it. Runs in a worker thread."""
+        # Fresh candles go first so np.unique keeps them over stored ones with the same timestamp.
+        combined = np.concatenate([new_candles, np.asarray(series.candles)])
+        _, first = np.unique(combined["timestamp"], return_index=True)
+        merged = combined[first]  # np.unique returns timestamps sorted.
+        covered = _merge_ranges(series.covered + [list(r) for r in new_ranges])
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        data_path, ranges_path = self._paths(instrument_token, interval)
+        tmp_data, tmp_ranges = data_path.with_suffix(".npy.tmp"), ranges_path.with_suffix(".json.tmp")
+        with open(tmp_data, "wb") as f:
+            np.save(f, merged)
+        tmp_ranges.write_text(json.dumps(covered))
+        # Windows cannot replace a memory-mapped file, so drop the map and serve the merged
+        # copy until the new file is mapped.
+        series.candles = merged
+        # Data first: coverage must never claim candles that are not on disk yet.
+        os.replace(tmp_data, data_path)
+        os.replace(tmp_ranges, ranges_path)
+
+        series.candles = np.load(data_path, mmap_mode="r")
+        series.covered = covered
+
+    async def get(self, instrument_token: int, interval: str, start: int, end: int) -> np.ndarray:
+        """
+        Returns candles for [start, end] (Unix seconds), fetching only ranges not stored yet.
+        """
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported interval '{interval}'. Use one of: {', '.join(INTERVALS)}.")
+        if start > end:
+            raise ValueError("The start of the range must not be after its end.")
+
+        candle_seconds, max_days = INTERVALS[interval]
+        series = self._open(instrument_token, interval)
+
+        async with series.lock:
+            gaps = missing_ranges(series.covered, start, end)
+            if gaps:
+                # The candle still forming may change, so coverage stops before it.
+                now = int(datetime.datetime.now(IST).timestamp())
+                complete_before = (now + IST_OFFSET) // candle_seconds * candle_seconds - IST_OFFSET
+
+                chunks = []
+                for gap_start, gap_end in gaps:
+                    chunk_start = gap_start
+                    while chunk_start <= gap_end:
+                        chunk_end = min(gap_end, chunk_start + max_days * 86400 - 1)
+                        chunks.append((chunk_start, chunk_end))
+                        chunk_start = chunk_end + 1
+
+                results = await asyncio.gather(*[
+                    self._fetch(instrument_token, interval, chunk_start, chunk_end)
+                    for chunk_start, chunk_end in chunks
+                ])
+                new_candles = np.concatenate([to_candle_records(candles) for candles in results])
+                new_ranges = [
+                    (chunk_start, min(chunk_end, complete_before - 1))
+                    for chunk_start, chunk_end in chunks
+                    if chunk_start < complete_before
+                ]
+                await asyncio.to_thread(self._write, instrument_token, interval, series, new_candles, new_ranges)
+                logger.info("Fetched %s missing ranges (%s candles) for %s/%s.", len(chunks), len(new_candles), instrument_token, interval)
+
+            return series.slice(start, end)
@@ -0,0 +1,165 @@
+# src/idempotency.py
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyKeyReusedError(ValueError):
+    """Raised when an idempotency key is sent again with a different request."""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Idempotency key '{key}' was already used for a different order.")
+
+    def __reduce__(self):
+        return (self.__class__, (self.key,))
+
+
+def order_tag(key: str) -> str:
+    """
+    The Kite order `tag` sent with an order placed under an idempotency key, so the order can
+    be found in the order book later. Tags are at most 20 alphanumeric characters.
+    """
+    return "ik" + hashlib.sha256(key.encode()).hexdigest()[:18]
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "task", "completed_at", "unknown")
+
+    def __init__(self, fingerprint, task):
+        self.fingerprint = fingerprint
+        self.task = task
+        self.completed_at = None
+        self.unknown = False  # Timed out: the order may or may not have reached the broker.
+
+
+class IdempotencyCache:
+    """
+    Remembers requests by client idempotency key so retries never reach the broker twice.
+
+    A retry that arrives while the first call is still in flight waits for that same call.
+    One that arrives after it finished gets the same result, for `ttl` seconds. Calls that
+    failed outright are forgotten so they can be retried.
+
+    A call that timed out is kept for the full TTL with an unknown outcome: the order may have
+    reached the broker. A retry first asks `resolve(key)` whether it did (by looking the
+    order's tag up in the order book). If it did, the retry gets that order; if it did not, the
+    order is sent again. While the outcome cannot be determined, or without `resolve`, retries
+    get the timeout again rather than risk a duplicate.
+    At most `max_keys` finished entries are kept; the oldest are evicted first, known outcomes
+    before unknown ones.
+    """
+
+    def __init__(self, ttl=None, max_keys=None, resolve=None):
+        self.ttl = ttl or float(os.getenv("KITE_IDEMPOTENCY_TTL", "300"))
+        self.max_keys = max_keys or int(os.getenv("KITE_IDEMPOTENCY_MAX_KEYS", "10000"))
+        self.resolve = resolve  # async (key) -> the order's result if it reached the broker, else None
+        # key -> _Entry. Finished entries are moved to the end, so they are in completion order.
+        self._entries = OrderedDict()
+
+        self.calls = 0
+        self.replays = 0
+        self.attached = 0
+        self.resolved = 0
+
+    async def run(self, key: str, fingerprint, func, *args):
+        """
+        Returns the result of `await func(*args)` for the first request with `key`, and the same
+        result (or timeout) for any retry with the same key and `fingerprint` within the TTL.
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint != fingerprint:
+            raise IdempotencyKeyReusedError(key)
+        if entry is not None and entry.unknown and self.resolve is not None:
+            # Concurrent retries attach to this one check instead of each making their own.
+            entry = self._start(key, fingerprint, self._resolve_or_send(key, func, *args))
+        elif entry is not None:
+            if entry.completed_at is None:
+                self.attached += 1
+            else:
+                self.replays += 1
+            logger.debug("Idempotency key '%s' matched an earlier request; not sending it again.", key)
+        else:
+            entry = self._start(key, fingerprint, func(*args))
+            self.calls += 1
+
+        return await asyncio.shield(entry.task)
+
+    def _start(self, key: str, fingerprint, coroutine) -> _Entry:
+        # The call runs as its own task, so a client disconnecting does not cancel it for retries.
+        entry = _Entry(fingerprint, asyncio.ensure_future(coroutine))
+        entry.task.add_done_callback(lambda task: self._finished(key, entry))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        return entry
+
+    async def _resolve_or_send(self, key: str, func, *args):
+        """Settles a timed-out call: returns the order if it reached the broker, else sends it again."""
+        try:
+            found = await self.resolve(key)
+        except Exception as e:
+            logger.warning("Could not check whether the order for idempotency key '%s' was placed: %s", key, e)
+            raise asyncio.TimeoutError(f"The outcome of the order for idempotency key '{key}' is still unknown.") from e
+        if found is not None:
+            self.resolved += 1
+            logger.info("Order for idempotency key '%s' had reached the broker: %s", key, found)
+            return found
+        logger.info("Order for idempotency key '%s' never reached the broker; sending it again.", key)
+        self.calls += 1
+        return await func(*args)
+
+    def _finished(self, key: str, entry: _Entry):
+        error = None if entry.task.cancelled() else entry.task.exception()
+        if entry.task.cancelled() or (error is not None and not isinstance(error, asyncio.TimeoutError)):
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            return
+        entry.completed_at = time.monotonic()
+        entry.unknown = error is not None
+        if self._entries.get(key) is entry:
+            self._entries.move_to_end(key)
+        self._evict()
+
+    def _expire(self, now: float):
+        # In-flight entries are skipped; the first finished entry still within the TTL ends the scan.
+        expired = []
+        for key, entry in self._entries.items():
+            if entry.completed_at is None:
+                continue
+            if now - entry.completed_at < self.ttl:
+                break
+            expired.append(key)
+        for key in expired:
+            del self._entries[key]
+
+    def _evict(self):
+        # Only finished entries can go; in-flight ones must still catch their retries.
+        while len(self._entries) > self.max_keys:
+            oldest = oldest_unknown = None
+            for key, entry in self._entries.items():
+                if entry.completed_at is None:
+                    continue
+                if not entry.unknown:
+                    oldest = key
+                    break
+                if oldest_unknown is None:
+                    oldest_unknown = key
+            oldest = oldest if oldest is not None else oldest_unknown
+            if oldest is None:
+                break
+            del self._entries[oldest]
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._entries), "calls": self.calls, "replays": self.replays,
+            "attached": self.attached, "resolved": self.resolved,
+            "unknown": sum(1 for entry in self._entries.values() if entry.unknown),
+        }
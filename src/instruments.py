@@ -0,0 +1,262 @@
+# src/instruments.py
+import csv
+import datetime
+import io
+import logging
+import os
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Compact fixed-width record for one row of the Kite instruments dump.
+INSTRUMENT_DTYPE = np.dtype([
+    ("instrument_token", np.int64),
+    ("exchange_token", np.int64),
+    ("tradingsymbol", "S40"),
+    ("name", "S48"),
+    ("exchange", "S8"),
+    ("segment", "S16"),
+    ("instrument_type", "S8"),
+    ("expiry", "S10"),
+    ("strike", np.float64),
+    ("tick_size", np.float64),
+    ("lot_size", np.int32),
+])
+
+# Kite publishes a fresh dump every morning; dates are tracked in Indian Standard Time.
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+# A dump fetched before this time of day (IST) is still the previous day's.
+DUMP_PUBLISH_TIME = datetime.time.fromisoformat(os.getenv("KITE_INSTRUMENTS_PUBLISH_TIME", "08:30"))
+
+# Exchanges orders can be placed on (see PlaceOrderInput.exchange). Suggestions only cover these.
+ORDER_EXCHANGES = ("NSE", "BSE")
+
+
+class UnknownInstrumentError(ValueError):
+    """Raised when an order names an instrument that is not in the instrument master."""
+
+    def __init__(self, exchange, tradingsymbol, suggestions):
+        self.exchange = exchange
+        self.tradingsymbol = tradingsymbol
+        self.suggestions = suggestions
+        message = f"Unknown instrument {exchange}:{tradingsymbol}."
+        if suggestions:
+            message += f" Did you mean: {', '.join(suggestions)}?"
+        super().__init__(message)
+
+    def __reduce__(self):
+        # Rebuilt from its own arguments when passed between worker processes.
+        return (self.__class__, (self.exchange, self.tradingsymbol, self.suggestions))
+
+
+def _deletes(word: str) -> set:
+    """The word itself plus every variant with one character removed."""
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def today_ist() -> datetime.date:
+    return datetime.datetime.now(IST).date()
+
+
+def dump_date(now: datetime.datetime = None) -> datetime.date:
+    """The date of the newest dump the broker has published: yesterday's until DUMP_PUBLISH_TIME."""
+    now = now or datetime.datetime.now(IST)
+    if now.time() < DUMP_PUBLISH_TIME:
+        return now.date() - datetime.timedelta(days=1)
+    return now.date()
+
+
+def seconds_until_publish(now: datetime.datetime = None) -> float:
+    """Seconds until the broker next publishes a dump."""
+    now = now or datetime.datetime.now(IST)
+    publish = datetime.datetime.combine(now.date(), DUMP_PUBLISH_TIME, tzinfo=IST)
+    if publish <= now:
+        publish += datetime.timedelta(days=1)
+    return (publish - now).total_seconds()
+
+
+# One loaded dump with its indexes, swapped in as a whole so readers never mix two dumps.
+_Snapshot = namedtuple("_Snapshot", ["records", "by_symbol", "by_token"])
+
+
+class InstrumentMaster:
+    """
+    A local copy of the Kite instruments dump, for validating symbols without a broker round-trip.
+
+    The dump is stored once a day as a NumPy structured array and memory-mapped at startup.
+    Hash indexes on (exchange, tradingsymbol) and instrument_token point into it, so lookups
+    are plain dict hits. The array and its indexes are published together as one snapshot, so
+    a lookup running while a new dump loads reads one dump or the other, never a mix.
+    "Did you mean" suggestions come from a precomputed single-edit deletion index over the
+    order exchanges' symbols.
+    """
+
+    def __init__(self, data_dir=None):
+        default_dir = Path(__file__).parent.parent / "data"
+        self.data_dir = Path(data_dir or os.getenv("KITE_DATA_DIR", default_dir)) / "instruments"
+        self._snapshot = _Snapshot(None, {}, {})
+        self.loaded_date = None
+        self.path = None  # The file `records` is memory-mapped from.
+        self._suggestion_index = None
+
+    @property
+    def records(self):
+        return self._snapshot.records
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot.records is not None
+
+    def path_for(self, date: datetime.date) -> Path:
+        return self.data_dir / f"instruments-{date.isoformat()}.npy"
+
+    def is_current(self) -> bool:
+        """True if the newest published dump is loaded."""
+        return self.loaded_date is not None and self.loaded_date >= dump_date()
+
+    def latest_file(self):
+        """Returns the newest stored dump, or None."""
+        files = sorted(self.data_dir.glob("instruments-*.npy"))
+        return files[-1] if files else None
+
+    def save(self, rows, date: datetime.date) -> Path:
+        """
+        Converts instrument rows (CSV bytes from the broker, or dicts from kiteconnect) to the
+        compact on-disk format and writes it atomically. Older dumps are removed once the new one
+        is loaded.
+        """
+        if isinstance(rows, (bytes, str)):
+            text = rows.decode("utf-8") if isinstance(rows, bytes) else rows
+            rows = list(csv.DictReader(io.StringIO(text)))
+
+        records = np.zeros(len(rows), dtype=INSTRUMENT_DTYPE)
+        for i, row in enumerate(rows):
+            records[i] = (
+                int(row["instrument_token"]),
+                int(row["exchange_token"] or 0),
+                str(row["tradingsymbol"]).encode(),
+                # Cut to the field's 48 bytes on a character boundary.
+                str(row.get("name") or "").encode()[:48].decode("utf-8", errors="ignore").encode(),
+                str(row["exchange"]).encode(),
+                str(row.get("segment") or "").encode(),
+                str(row.get("instrument_type") or "").encode(),
+                str(row.get("expiry") or "").encode(),
+                float(row.get("strike") or 0),
+                float(row.get("tick_size") or 0),
+                int(float(row.get("lot_size") or 0)),
+            )
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(date)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, records)
+        if self.path == path and self.loaded:
+            # Windows cannot replace a memory-mapped file, so serve from a copy until load().
+            self._snapshot = self._snapshot._replace(records=np.array(self._snapshot.records))
+            self.path = None
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, path: Path):
+        """Memory-maps a stored dump and builds the hash indexes over it."""
+        records = np.load(path, mmap_mode="r")
+        symbols = np.char.decode(records["tradingsymbol"]).tolist()
+        exchanges = np.char.decode(records["exchange"]).tolist()
+
+        by_symbol = {key: i for i, key in enumerate(zip(exchanges, symbols))}
+        by_token = {token: i for i, token in enumerate(records["instrument_token"].tolist())}
+        self._suggestion_index = None
+        self._snapshot = _Snapshot(records, by_symbol, by_token)
+        self.path = path
+        self.loaded_date = datetime.date.fromisoformat(path.stem.replace("instruments-", ""))
+        logger.info("Loaded %s instruments from %s.", len(records), path.name)
+        self._remove_old_dumps()
+
+    def _remove_old_dumps(self):
+        """
+        Deletes stored dumps other than the loaded one. Runs after the swap, so the previous map is
+        released first; a file Windows still has open is left for the next load.
+        """
+        for old in self.data_dir.glob("instruments-*.npy"):
+            if old != self.path:
+                try:
+                    old.unlink()
+                except OSError as e:
+                    logger.debug("Could not remove old instruments dump %s yet: %s", old.name, e)
+
+    def build_suggestion_index(self):
+        """
+        Precomputes the deletion index used for "did you mean" suggestions.
+        Two symbols within one edit of each other share at least one deletion variant.
+        """
+        index = {}
+        for exchange, symbol in self._snapshot.by_symbol:
+            if exchange not in ORDER_EXCHANGES:
+                continue
+            for variant in _deletes(symbol):
+                index.setdefault((exchange, variant), []).append(symbol)
+        self._suggestion_index = index
+
+    def suggest(self, exchange: str, tradingsymbol: str, limit: int = 5) -> list:
+        """Returns known symbols on `exchange` within one edit of `tradingsymbol`."""
+        if self._suggestion_index is None:
+            return []
+        matches = set()
+        for variant in _deletes(tradingsymbol):
+            matches.update(self._suggestion_index.get((exchange, variant), ()))
+        matches.discard(tradingsymbol)
+        return sorted(matches)[:limit]
+
+    def normalize(self, exchange: str, tradingsymbol: str) -> str:
+        """
+        Returns the canonical tradingsymbol for an order, or raises UnknownInstrumentError.
+        Accepts any case, surrounding whitespace and an optional 'EXCHANGE:' prefix.
+        """
+        return self._normalize(self._snapshot, exchange, tradingsymbol)
+
+    def _normalize(self, snapshot: _Snapshot, exchange: str, tradingsymbol: str) -> str:
+        symbol = tradingsymbol.strip().upper()
+        if symbol.startswith(f"{exchange}:"):
+            symbol = symbol[len(exchange) + 1:]
+        if (exchange, symbol) not in snapshot.by_symbol:
+            raise UnknownInstrumentError(exchange, symbol, self.suggest(exchange, symbol))
+        return symbol
+
+    @staticmethod
+    def _row(records, i: int) -> dict:
+        record = records[i]
+        return {
+            "instrument_token": int(record["instrument_token"]),
+            "exchange_token": int(record["exchange_token"]),
+            "tradingsymbol": record["tradingsymbol"].decode(),
+            "name": record["name"].decode(),
+            "exchange": record["exchange"].decode(),
+            "segment": record["segment"].decode(),
+            "instrument_type": record["instrument_type"].decode(),
+            "expiry": record["expiry"].decode() or None,
+            "strike": float(record["strike"]),
+            "tick_size": float(record["tick_size"]),
+            "lot_size": int(record["lot_size"]),
+        }
+
+    def lookup(self, exchange: str, tradingsymbol: str) -> dict:
+        """Returns the instrument row for a symbol, or raises UnknownInstrumentError."""
+        snapshot = self._snapshot
+        symbol = self._normalize(snapshot, exchange, tradingsymbol)
+        return self._row(snapshot.records, snapshot.by_symbol[(exchange, symbol)])
+
+    def token_for(self, exchange: str, tradingsymbol: str):
+        """Returns the instrument token for an exact (exchange, tradingsymbol), or None."""
+        snapshot = self._snapshot
+        i = snapshot.by_symbol.get((exchange, tradingsymbol))
+        return None if i is None else int(snapshot.records[i]["instrument_token"])
+
+    def lookup_token(self, instrument_token: int):
+        """Returns the instrument row for a token, or None."""
+        snapshot = self._snapshot
+        i = snapshot.by_token.get(instrument_token)
+        return None if i is None else self._row(snapshot.records, i)
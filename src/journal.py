@@ -0,0 +1,298 @@
+# src/journal.py
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.instruments import IST, today_ist
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_RETRY_INTERVAL = 1.0  # seconds between attempts to write a batch after a failed write
+
+# Errors after which the order may still have reached the broker.
+UNKNOWN_OUTCOME_ERRORS = ("TimeoutError", "CancelledError")
+
+
+class OrderJournal:
+    """
+    A durable, append-only record of every order request, its broker response and its latency.
+
+    Each day has one JSON Lines file. Recording an event only updates an in-memory index and
+    puts the event on a queue, so nothing on the order path waits for the disk. A background
+    thread drains whatever has queued up, writes it with a single write call (group commit)
+    and fsyncs at most every `fsync_interval` seconds, so a crash loses at most that much.
+
+    If a write fails (e.g. the disk is full), the writer logs it, reports `healthy: false` in
+    stats() and retries the same batch every second, leaving new events on the queue meanwhile.
+    The queue holds at most `queue_size` events; beyond that, events are dropped and counted
+    rather than blocking the order path or growing without bound.
+
+    On startup today's file is replayed to rebuild the index. A torn last line from a crash is
+    truncated. Requests with no recorded outcome, or that timed out, are reported as 'unknown':
+    they may or may not have reached the broker and should be checked against the order book.
+    """
+
+    def __init__(self, data_dir=None, fsync_interval=None, queue_size=None):
+        default_dir = Path(__file__).parent.parent / "data"
+        self.data_dir = Path(data_dir or os.getenv("KITE_DATA_DIR", default_dir)) / "journal"
+        self.fsync_interval = fsync_interval if fsync_interval is not None else float(os.getenv("KITE_JOURNAL_FSYNC_INTERVAL", "0.2"))
+        self.queue_size = queue_size or int(os.getenv("KITE_JOURNAL_QUEUE_SIZE", "100000"))
+
+        self._queue = queue.Queue(self.queue_size)
+        self._stop = threading.Event()
+        self._writer = None
+        self._day = None
+        self._orders = OrderedDict()  # ref -> today's order entry
+        self._refs_by_order_id = {}
+
+        self.events_written = 0
+        self.batches_written = 0
+        self.fsyncs = 0
+        self.recovered = 0
+        self.healthy = True
+        self.write_errors = 0
+        self.events_dropped = 0
+
+    def path_for(self, date: datetime.date) -> Path:
+        return self.data_dir / f"orders-{date.isoformat()}.jsonl"
+
+    def start(self):
+        """Recovers today's journal and starts the background writer."""
+        if self._writer is not None:
+            return
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._day = today_ist()
+        self._orders, self._refs_by_order_id = self._replay(self.path_for(self._day), truncate=True)
+        self.recovered = len(self._orders)
+        unknown = sum(1 for entry in self._orders.values() if entry["status"] == "unknown")
+        if self.recovered:
+            logger.info("Recovered %s journaled orders for today (%s with unknown outcome).", self.recovered, unknown)
+
+        self._stop.clear()
+        self._writer = threading.Thread(target=self._write_loop, name="order-journal", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        """Writes and fsyncs everything queued, then stops the writer."""
+        if self._writer is not None:
+            self._stop.set()
+            try:
+                self._queue.put_nowait(_STOP)  # Wakes the writer; a full queue wakes it anyway.
+            except queue.Full:
+                pass
+            self._writer.join()
+            self._writer = None
+
+    def record_request(self, kind: str, params: dict) -> str:
+        """
+        Records an order request ("place" or "cancel") before it is sent.
+        Returns a reference for recording its outcome. Never touches the disk.
+        """
+        ref = uuid.uuid4().hex[:16]
+        self._record({"type": "request", "ref": ref, "kind": kind, "params": params})
+        return ref
+
+    def record_response(self, ref: str, order_id: str, latency: float):
+        self._record({"type": "response", "ref": ref, "order_id": order_id, "latency_ms": round(latency * 1000, 3)})
+
+    def record_error(self, ref: str, error: BaseException, latency: float):
+        self._record({
+            "type": "error", "ref": ref, "error": str(error) or type(error).__name__,
+            "error_type": type(error).__name__, "latency_ms": round(latency * 1000, 3),
+        })
+
+    def record_update(self, order: dict):
+        """Records a broker order update (status change or fill) for an order."""
+        self._record({
+            "type": "update", "order_id": str(order.get("order_id")), "status": order.get("status"),
+            "filled_quantity": order.get("filled_quantity"), "average_price": order.get("average_price"),
+        })
+
+    def _record(self, event: dict):
+        event["ts"] = time.time()
+        day = today_ist()
+        if day != self._day:
+            self._day = day
+            self._orders, self._refs_by_order_id = OrderedDict(), {}
+        self._apply(self._orders, self._refs_by_order_id, event)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.events_dropped += 1
+            if self.events_dropped % 1000 == 1:
+                logger.error("Order journal queue is full; %s events dropped so far.", self.events_dropped)
+
+    @staticmethod
+    def _apply(orders: OrderedDict, refs_by_order_id: dict, event: dict):
+        """Folds one journal event into the per-order index."""
+        event_type = event["type"]
+        if event_type == "request":
+            orders[event["ref"]] = {
+                "ref": event["ref"], "kind": event["kind"], "requested_at": event["ts"], "params": event["params"],
+                "status": "unknown", "order_id": None, "latency_ms": None, "error": None, "broker_status": None,
+            }
+            return
+        if event_type == "update":
+            ref = refs_by_order_id.get(event["order_id"])
+            if ref is not None:
+                entry = orders[ref]
+                entry["broker_status"] = event["status"]
+                entry["filled_quantity"] = event["filled_quantity"]
+                entry["average_price"] = event["average_price"]
+            return
+
+        entry = orders.get(event["ref"])
+        if entry is None:
+            return
+        entry["latency_ms"] = event["latency_ms"]
+        if event_type == "response":
+            entry["status"] = "sent"
+            entry["order_id"] = event["order_id"]
+            if entry["kind"] == "place":
+                refs_by_order_id[event["order_id"]] = entry["ref"]
+        else:
+            entry["status"] = "unknown" if event["error_type"] in UNKNOWN_OUTCOME_ERRORS else "failed"
+            entry["error"] = event["error"]
+
+    def orders(self, date: datetime.date = None, status: str = None) -> list:
+        """Returns one entry per journaled request for `date` (default today), oldest first."""
+        if date is None or date == self._day:
+            entries = list(self._orders.values())
+        else:
+            entries = list(self._replay(self.path_for(date))[0].values())
+        if status:
+            entries = [entry for entry in entries if entry["status"] == status]
+        return entries
+
+    def _replay(self, path: Path, truncate: bool = False):
+        orders, refs_by_order_id = OrderedDict(), {}
+        if not path.exists():
+            return orders, refs_by_order_id
+
+        with open(path, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if truncate and end < len(data):
+            # The last write was cut short by a crash; drop the partial line.
+            logger.warning("Truncating %s bytes of a partial record from %s.", len(data) - end, path.name)
+            with open(path, "r+b") as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+
+        for line in data[:end].splitlines():
+            try:
+                self._apply(orders, refs_by_order_id, json.loads(line))
+            except (ValueError, KeyError):
+                continue
+        return orders, refs_by_order_id
+
+    def _write_loop(self):
+        f, path = None, None
+        last_fsync = time.monotonic()
+        dirty = False
+        torn = False  # A failed write may have left a partial line at the end of the file.
+        unwritten = {}  # path -> lines of a batch whose write failed, to retry
+
+        while True:
+            if unwritten:
+                # Leave new events on the (bounded) queue until the failed batch is written.
+                stopping = self._stop.wait(_RETRY_INTERVAL)
+                batch = []
+            else:
+                # Sleep until there is work, or until unsynced writes are due for an fsync.
+                timeout = max(0.0, self.fsync_interval - (time.monotonic() - last_fsync)) if dirty else None
+                try:
+                    batch = [self._queue.get(timeout=timeout)]
+                except queue.Empty:
+                    batch = []
+                while batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = self._stop.is_set()
+
+            lines_by_path, unwritten = unwritten, {}
+            for event in batch:
+                if event is not _STOP:
+                    day = datetime.datetime.fromtimestamp(event["ts"], IST).date()
+                    lines_by_path.setdefault(self.path_for(day), []).append(json.dumps(event, separators=(",", ":")))
+
+            try:
+                for target, lines in list(lines_by_path.items()):
+                    if target != path:
+                        if f is not None:
+                            os.fsync(f.fileno())
+                            f.close()
+                        f, path = open(target, "a", encoding="utf-8"), target
+                    # After a failed write, start on a fresh line; replay skips the torn one.
+                    data = ("\n" if torn else "") + "\n".join(lines) + "\n"
+                    torn = True
+                    f.write(data)
+                    f.flush()
+                    torn = False
+                    del lines_by_path[target]
+                    dirty = True
+                    self.events_written += len(lines)
+                    self.batches_written += 1
+
+                if dirty and (stopping or time.monotonic() - last_fsync >= self.fsync_interval):
+                    os.fsync(f.fileno())
+                    self.fsyncs += 1
+                    last_fsync, dirty = time.monotonic(), False
+                if not self.healthy:
+                    logger.info("Order journal writes succeeded again.")
+                    self.healthy = True
+            except OSError as e:
+                self.write_errors += 1
+                if self.healthy:
+                    logger.error("Order journal write failed; retrying every %ss: %s", _RETRY_INTERVAL, e)
+                self.healthy = False
+                unwritten = lines_by_path
+                if f is not None:
+                    try:
+                        f.close()
+                    except OSError:
+                        pass
+                f, path, dirty = None, None, False
+
+            if stopping:
+                if unwritten:
+                    lost = sum(len(lines) for lines in unwritten.values())
+                    while True:
+                        try:
+                            lost += self._queue.get_nowait() is not _STOP
+                        except queue.Empty:
+                            break
+                    self.events_dropped += lost
+                    logger.error("Order journal stopped with %s events unwritten.", lost)
+                break
+
+        if f is not None:
+            f.close()
+
+    def stats(self) -> dict:
+        return {
+            "orders_today": len(self._orders),
+            "events_written": self.events_written,
+            "batches_written": self.batches_written,
+            "fsyncs": self.fsyncs,
+            "recovered": self.recovered,
+            "queued": self._queue.qsize(),
+            "healthy": self.healthy,
+            "write_errors": self.write_errors,
+            "events_dropped": self.events_dropped,
+        }
@@ -0,0 +1,159 @@
+# src/kite_client.py
+import asyncio
+import logging
+import os
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _kite_exceptions():
+    """kiteconnect's exception module, imported only when an error is raised; the package is slow to import."""
+    from kiteconnect import exceptions
+    return exceptions
+
+
+class AsyncKiteClient:
+    """
+    A small asyncio-native client for the Kite Connect REST API.
+
+    It keeps one persistent keep-alive connection pool for the lifetime of the server,
+    so broker calls reuse warm TLS connections instead of paying a handshake each time.
+    Errors are raised as the same `kiteconnect.exceptions` types the official client uses.
+    """
+
+    DEFAULT_ROOT = "https://api.kite.trade"
+    KITE_HEADER_VERSION = "3"
+
+    def __init__(self, api_key, access_token, root=None, pool_size=None,
+                 connect_timeout=None, read_timeout=None, transport=None):
+        self.api_key = api_key
+        self.access_token = access_token
+        self.root = root or os.getenv("KITE_API_ROOT", self.DEFAULT_ROOT)
+        self.pool_size = pool_size or int(os.getenv("KITE_HTTP_POOL_SIZE", "10"))
+
+        connect_timeout = connect_timeout or float(os.getenv("KITE_CONNECT_TIMEOUT", "3"))
+        read_timeout = read_timeout or float(os.getenv("KITE_READ_TIMEOUT", "7"))
+
+        self._http = httpx.AsyncClient(
+            base_url=self.root,
+            headers={"X-Kite-Version": self.KITE_HEADER_VERSION},
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=float(os.getenv("KITE_KEEPALIVE_EXPIRY", "60")),
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            # Tests pass an httpx.MockTransport or ASGITransport here instead of using the network.
+            transport=transport,
+        )
+
+    async def warm_up(self, connections=None):
+        """
+        Opens connections ahead of the first real request so it does not pay for DNS and TLS.
+        Any response from the server counts as success; the status code is ignored.
+        """
+        count = connections or self.pool_size
+
+        async def _touch():
+            try:
+                await self._http.get("/")
+            except httpx.HTTPError as e:
+                logger.warning("Connection warm-up request failed: %s", e)
+
+        await asyncio.gather(*[_touch() for _ in range(count)])
+
+    def set_access_token(self, access_token):
+        """
+        Switches the session for new requests. Each request reads the token once when it is sent,
+        so requests already in flight finish on the old session. Pooled connections are kept.
+        """
+        self.access_token = access_token
+
+    async def close(self):
+        """Closes every pooled connection."""
+        await self._http.aclose()
+
+    async def _request(self, method, path, params=None, data=None):
+        """Sends one authenticated request and unwraps the Kite response envelope."""
+        headers = {"Authorization": f"token {self.api_key}:{self.access_token}"}
+        try:
+            r = await self._http.request(method, path, params=params, data=data, headers=headers)
+        except httpx.TimeoutException as e:
+            # Surface timeouts the same way the worker pool does, so callers handle one type.
+            raise asyncio.TimeoutError(f"Broker call {method} {path} timed out: {e}") from e
+
+        if "json" not in r.headers.get("content-type", ""):
+            if r.status_code >= 400:
+                raise _kite_exceptions().NetworkException(
+                    f"Unexpected response from broker ({r.status_code}): {r.text[:200]}", code=r.status_code
+                )
+            return r.content
+
+        try:
+            payload = r.json()
+        except ValueError:
+            raise _kite_exceptions().DataException(
+                f"Couldn't parse the JSON response received from the server: {r.content[:200]}"
+            )
+
+        if payload.get("status") == "error" or payload.get("error_type"):
+            kite_exceptions = _kite_exceptions()
+            exception_type = getattr(kite_exceptions, payload.get("error_type") or "", kite_exceptions.GeneralException)
+            raise exception_type(payload.get("message", "Unknown broker error"), code=r.status_code)
+        if r.status_code >= 400 or "data" not in payload:
+            raise _kite_exceptions().GeneralException(
+                f"Unexpected response from broker ({r.status_code}): {r.text[:200]}", code=r.status_code
+            )
+
+        return payload["data"]
+
+    # --- Orders ---
+    async def place_order(self, variety, **params) -> str:
+        """Places an order and returns its order ID."""
+        data = await self._request("POST", f"/orders/{variety}", data=params)
+        return data["order_id"]
+
+    async def cancel_order(self, variety, order_id) -> str:
+        """Cancels an open order and returns its order ID."""
+        data = await self._request("DELETE", f"/orders/{variety}/{order_id}")
+        return data["order_id"]
+
+    async def orders(self) -> list:
+        """Returns the list of all orders for the day."""
+        return await self._request("GET", "/orders")
+
+    # --- Portfolio ---
+    async def positions(self) -> dict:
+        """Returns the `net` and `day` positions."""
+        return await self._request("GET", "/portfolio/positions")
+
+    async def holdings(self) -> list:
+        """Returns the long-term equity holdings."""
+        return await self._request("GET", "/portfolio/holdings")
+
+    # --- Instruments ---
+    async def instruments(self) -> bytes:
+        """Returns the full instruments dump as CSV bytes."""
+        return await self._request("GET", "/instruments")
+
+    async def historical(self, instrument_token, interval, from_date: str, to_date: str) -> list:
+        """
+        Returns candles as [timestamp, open, high, low, close, volume] lists.
+        Dates are 'YYYY-MM-DD HH:MM:SS' in IST.
+        """
+        data = await self._request(
+            "GET", f"/instruments/historical/{instrument_token}/{interval}",
+            params={"from": from_date, "to": to_date},
+        )
+        return data["candles"]
+
+    # --- Market quotes ---
+    async def quote(self, instruments) -> dict:
+        """Returns full market quotes for instruments given as `EXCHANGE:TRADINGSYMBOL`."""
+        return await self._request("GET", "/quote", params={"i": list(instruments)})
+
+    async def ltp(self, instruments) -> dict:
+        """Returns the last traded price for instruments given as `EXCHANGE:TRADINGSYMBOL`."""
+        return await self._request("GET", "/quote/ltp", params={"i": list(instruments)})
@@ -1,19 +1,43 @@
 # src/kite_utils.py
+import asyncio
+import hashlib
+import hmac
+import logging
 import os
+import signal
+import time
 import sys
 from pathlib import Path
-from kiteconnect import KiteConnect
-from dotenv import load_dotenv
+from typing import List
+from dotenv import load_dotenv, dotenv_values
 
 # Add the project root directory to the Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.schemas import PlaceOrderInput, GetPositionsOutput
+from src.executor import BrokerExecutor
+from src.kite_client import AsyncKiteClient
+from src.scheduler import BrokerScheduler, PRIORITY_ORDERS, PRIORITY_READS
+from src.cache import CachedValue, CacheResult
+from src.encoding import SnapshotEncoder
+from src.ticks import TickEngine
+from src.batching import QuoteBatcher
+from src.instruments import InstrumentMaster, UnknownInstrumentError, dump_date, seconds_until_publish, today_ist
+from src.history import CandleStore, format_ist
+from src.portfolio import PortfolioEngine
+from src.risk import RiskEngine
+from src.idempotency import IdempotencyCache, order_tag
+from src.journal import OrderJournal
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables from the .env file
 load_dotenv()
 
+# KiteConnect.VARIETY_REGULAR
+VARIETY_REGULAR = "regular"
+
 class KiteHelper:
     def __init__(self):
         """Initializes the KiteHelper and sets up the Kite Connect client."""
@@ -23,9 +47,278 @@ class KiteHelper:
         if not api_key or not access_token:
             raise ValueError("KITE_API_KEY and KITE_ACCESS_TOKEN must be set in the .env file.")
 
-        self.kite = KiteConnect(api_key=api_key)
-        self.kite.set_access_token(access_token)
-        print("Kite Connect client initialized successfully.")
+        # The blocking client is built on first use (see `kite`); importing kiteconnect is slow.
+        self.api_key = api_key
+        self.access_token = access_token
+        self._kite = None
+        self._kite_loader = None
+
+        # A new KITE_ACCESS_TOKEN in this file is picked up while running (see reload_credentials).
+        self.env_path = project_root / ".env"
+        self.env_watch_interval = float(os.getenv("KITE_ENV_WATCH_INTERVAL", "2"))
+        self._env_watcher = None
+
+        # Only needed to verify order postbacks.
+        self.api_secret = os.getenv("KITE_API_SECRET")
+
+        # Async handlers use the native asyncio client with a pooled connection set.
+        # Setting KITE_ASYNC_CLIENT=0 falls back to the blocking client on the worker pool.
+        self.use_async_client = os.getenv("KITE_ASYNC_CLIENT", "1") != "0"
+        self.client = AsyncKiteClient(api_key, access_token) if self.use_async_client else None
+
+        # Blocking broker calls run on this bounded pool so async handlers can await them.
+        self.executor = BrokerExecutor()
+
+        # Every broker call waits here for its rate-limit token, orders ahead of reads.
+        self.scheduler = BrokerScheduler()
+
+        # Heavy position polling is served from a short-lived cache; placing an order clears it.
+        self.positions_cache = CachedValue(ttl=float(os.getenv("KITE_POSITIONS_TTL", "1.0")))
+        # The REST endpoint serves positions as JSON bytes, encoded once per snapshot.
+        self.positions_encoder = SnapshotEncoder()
+
+        # Quote lookups from concurrent requests are merged into one broker call per window.
+        # Kite accepts up to 500 instruments per quote call and 1000 per LTP call.
+        batch_window = float(os.getenv("KITE_QUOTE_BATCH_WINDOW_MS", "10")) / 1000
+        quote_ttl = float(os.getenv("KITE_QUOTE_TTL", "0.5"))
+        self.quote_batchers = {
+            "quote": QuoteBatcher(lambda keys: self._fetch_quotes("quote", keys), batch_window, quote_ttl, max_batch=500),
+            "ltp": QuoteBatcher(lambda keys: self._fetch_quotes("ltp", keys), batch_window, quote_ttl, max_batch=1000),
+        }
+
+        # A local copy of the instruments dump lets orders for unknown symbols fail fast.
+        self.validate_symbols = os.getenv("KITE_VALIDATE_SYMBOLS", "1") != "0"
+        self.instruments = InstrumentMaster()
+        self._instrument_refresher = None
+
+        # Historical candles are cached on disk; only missing ranges are fetched from the broker.
+        self.history = CandleStore(self._fetch_historical)
+
+        # Live ticks for KITE_TICKER_INSTRUMENTS, kept in memory for LTP and bar lookups.
+        self.ticks = TickEngine(api_key, access_token)
+
+        # With KITE_PORTFOLIO_ENGINE=1, positions are kept locally from order updates and postbacks,
+        # and the broker is only read to reconcile them every KITE_RECONCILE_INTERVAL seconds.
+        self.use_portfolio_engine = os.getenv("KITE_PORTFOLIO_ENGINE", "0") == "1"
+        self.portfolio = PortfolioEngine(self.get_positions_async)
+        self._portfolio_task = None
+
+        # Pre-trade limits (KITE_RISK_*), checked in memory before each order is sent.
+        self.risk = RiskEngine()
+
+        # Orders sent with an idempotency key are remembered so client retries never duplicate them.
+        self.idempotency = IdempotencyCache(resolve=self._find_keyed_order)
+
+        # Every order request, outcome and latency is appended to a daily journal on disk.
+        self.use_journal = os.getenv("KITE_JOURNAL", "1") != "0"
+        self.journal = OrderJournal()
+        logger.info("Kite Connect client initialized successfully.")
+
+    @property
+    def kite(self):
+        """The official blocking Kite Connect client, used on the worker pool."""
+        if self._kite is None:
+            from kiteconnect import KiteConnect
+
+            # KITE_API_ROOT points both clients at another server, e.g. benchmarks/mock_kite.py.
+            kite = KiteConnect(api_key=self.api_key, root=os.getenv("KITE_API_ROOT") or None)
+            kite.set_access_token(self.access_token)
+            self._kite = kite
+        return self._kite
+
+    async def start(self):
+        """Warms the broker connection pool and starts the tick engine. Called once when the server starts."""
+        # Build the blocking client off the event loop, so neither it nor the first broker
+        # error (which needs kiteconnect's exception types) pays for the import on a request.
+        self._kite_loader = asyncio.create_task(asyncio.to_thread(lambda: self.kite))
+        if self.client:
+            await self.client.warm_up()
+            logger.info("Warmed %s broker connections to %s.", self.client.pool_size, self.client.root)
+        if self.use_journal:
+            await asyncio.to_thread(self.journal.start)
+
+        if self.use_portfolio_engine or self.risk.enabled:
+            # Order updates arrive on the ticker thread and are applied on the event loop.
+            loop = asyncio.get_running_loop()
+            self.ticks.on_order_update = lambda order: loop.call_soon_threadsafe(self._apply_order_update, order)
+        if self.use_portfolio_engine:
+            self._portfolio_task = asyncio.create_task(self.portfolio.run())
+        self.ticks.start()
+
+        if self.env_watch_interval > 0:
+            self._env_watcher = asyncio.create_task(self._watch_env_file())
+        # With --workers this helper lives in the coordinator process, so SIGHUP must be sent to
+        # the coordinator's pid; sent to the server's main process it makes uvicorn restart workers.
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload_credentials)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass  # No SIGHUP on Windows, and handlers can only be added on the main thread.
+
+        if self.validate_symbols:
+            # Loading the dump, downloads and the suggestion index build all run in the background,
+            # so the server takes requests at once; orders are validated as soon as a dump is loaded.
+            self._instrument_refresher = asyncio.create_task(self._refresh_instruments_daily())
+
+    async def close(self):
+        """Releases pooled connections and worker threads. Called once when the server stops."""
+        self.ticks.stop()
+        if self._instrument_refresher:
+            self._instrument_refresher.cancel()
+        if self._portfolio_task:
+            self._portfolio_task.cancel()
+        if self._env_watcher:
+            self._env_watcher.cancel()
+        await self.scheduler.close()
+        if self.client:
+            await self.client.close()
+        self.executor.shutdown()
+        self.journal.close()
+
+    def set_access_token(self, access_token: str) -> bool:
+        """
+        Switches every broker client to a new session without restarting the server.
+        Requests already in flight finish on the old session; connection pools, caches and the
+        tick buffers are kept. Returns False if the token is unchanged.
+        """
+        if not access_token or access_token == self.access_token:
+            return False
+        if self._kite is not None:
+            self._kite.set_access_token(access_token)
+        if self.client:
+            self.client.set_access_token(access_token)
+        self.ticks.set_access_token(access_token)
+        self.access_token = access_token
+        os.environ["KITE_ACCESS_TOKEN"] = access_token
+        logger.info("Switched to a new access token (ending ...%s).", access_token[-4:])
+        return True
+
+    def reload_credentials(self) -> bool:
+        """Reads KITE_ACCESS_TOKEN from the .env file and switches to it if it changed."""
+        try:
+            access_token = dotenv_values(self.env_path).get("KITE_ACCESS_TOKEN")
+        except OSError as e:
+            logger.error("Error reading %s: %s", self.env_path, e)
+            return False
+        return self.set_access_token(access_token)
+
+    async def update_credentials(self, access_token: str = None) -> bool:
+        """Switches to `access_token`, or to the token in the .env file if none is given."""
+        if access_token:
+            return self.set_access_token(access_token)
+        return self.reload_credentials()
+
+    async def _watch_env_file(self):
+        """Polls the .env file's modification time and reloads credentials when it changes."""
+        def modified():
+            try:
+                return self.env_path.stat().st_mtime_ns
+            except OSError:
+                return None
+
+        last = modified()
+        while True:
+            await asyncio.sleep(self.env_watch_interval)
+            current = modified()
+            if current != last:
+                last = current
+                self.reload_credentials()
+
+    async def refresh_instruments(self):
+        """
+        Downloads the newest published instruments dump, stores it and swaps it in.
+        If the download fails and nothing is loaded yet, falls back to the newest stored dump.
+        """
+        try:
+            rows = await self.scheduler.run("portfolio", self._fetch_instruments_now, priority=PRIORITY_READS)
+            path = await asyncio.to_thread(self.instruments.save, rows, dump_date())
+        except Exception as e:
+            logger.error("Error downloading the instruments dump: %s", e)
+            path = None if self.instruments.loaded else self.instruments.latest_file()
+            if path is None:
+                return
+
+        await asyncio.to_thread(self.instruments.load, path)
+        await asyncio.to_thread(self.instruments.build_suggestion_index)
+
+    async def _fetch_instruments_now(self):
+        if self.client:
+            return await self.client.instruments()
+        return await self.executor.run(self.kite.instruments)
+
+    async def _refresh_instruments_daily(self):
+        current_path = self.instruments.path_for(dump_date())
+        if current_path.exists():
+            await asyncio.to_thread(self.instruments.load, current_path)
+        if self.instruments.loaded:
+            await asyncio.to_thread(self.instruments.build_suggestion_index)
+        # A dump fetched before the broker publishes the day's is stored as the previous day's,
+        # so the new one is fetched right after publication. Checked at least hourly otherwise,
+        # e.g. to retry a failed download.
+        while True:
+            if not self.instruments.is_current():
+                await self.refresh_instruments()
+            await asyncio.sleep(min(3600, seconds_until_publish() + 60))
+
+    def _validate_order(self, order_details: PlaceOrderInput) -> PlaceOrderInput:
+        """
+        Checks the symbol against the local instrument master and normalizes it.
+        Raises UnknownInstrumentError without contacting the broker. Skipped until a dump is loaded.
+        """
+        if not (self.validate_symbols and self.instruments.loaded):
+            return order_details
+        symbol = self.instruments.normalize(order_details.exchange, order_details.tradingsymbol)
+        if symbol != order_details.tradingsymbol:
+            order_details = order_details.model_copy(update={"tradingsymbol": symbol})
+        return order_details
+
+    async def lookup_instrument(self, exchange: str, tradingsymbol: str) -> dict:
+        """
+        Returns an instrument from the local master. Raises UnknownInstrumentError if it is unknown.
+        """
+        if not self.instruments.loaded:
+            raise RuntimeError("The instrument master has not been loaded yet.")
+        return self.instruments.lookup(exchange.upper(), tradingsymbol)
+
+    def _reference_price(self, order_details: PlaceOrderInput):
+        """
+        Returns the most recent known price for an order's instrument, from live ticks or the
+        quote cache, without calling the broker. None if neither has seen it.
+        """
+        token = self.instruments.token_for(order_details.exchange, order_details.tradingsymbol) if self.instruments.loaded else None
+        if token is not None:
+            tick = self.ticks.ltp([token]).get(token)
+            if tick is not None:
+                return tick["last_price"]
+        key = f"{order_details.exchange}:{order_details.tradingsymbol}"
+        for batcher in self.quote_batchers.values():
+            price = batcher.last_price(key)
+            if price is not None:
+                return price
+        return None
+
+    def _build_order_params(self, order_details: PlaceOrderInput) -> dict:
+        """Maps Pydantic model fields to the parameters expected by the Kite order API."""
+        # The schema's literals are Kite's own constants (KiteConnect.ORDER_TYPE_MARKET is "MARKET",
+        # and so on), so they pass through as they are, without importing kiteconnect here.
+        order_params = {
+            "exchange": order_details.exchange,
+            "tradingsymbol": order_details.tradingsymbol,
+            "transaction_type": order_details.transaction_type,
+            "quantity": order_details.quantity,
+            "product": order_details.product,
+            "order_type": order_details.order_type,
+            "price": order_details.price,
+            "variety": VARIETY_REGULAR,
+        }
+
+        # The kite.place_order method requires 'price' to be absent for MARKET orders.
+        if order_params["order_type"] == "MARKET":
+            del order_params["price"]
+        # Tagged so an order whose call timed out can be found in the order book on a retry.
+        if order_details.idempotency_key:
+            order_params["tag"] = order_tag(order_details.idempotency_key)
+
+        return order_params
 
     def place_order(self, order_details: PlaceOrderInput) -> dict:
         """
@@ -33,32 +326,18 @@ class KiteHelper:
         This is a synchronous function that will be called from an async tool handler.
         """
         try:
-            # Map Pydantic model fields to the parameters expected by pykiteconnect
-            order_params = {
-                "exchange": order_details.exchange,
-                "tradingsymbol": order_details.tradingsymbol,
-                "transaction_type": self.kite.TRANSACTION_TYPE_BUY if order_details.transaction_type == 'BUY' else self.kite.TRANSACTION_TYPE_SELL,
-                "quantity": order_details.quantity,
-                "product": self.kite.PRODUCT_CNC if order_details.product == 'CNC' else self.kite.PRODUCT_MIS,
-                "order_type": self.kite.ORDER_TYPE_MARKET if order_details.order_type == 'MARKET' else self.kite.ORDER_TYPE_LIMIT,
-                "price": order_details.price,
-                "variety": self.kite.VARIETY_REGULAR,
-            }
-
-            # The kite.place_order method requires 'price' to be absent for MARKET orders.
-            if order_params["order_type"] == self.kite.ORDER_TYPE_MARKET:
-                del order_params["price"]
-
-            print(f"Placing order with params: {order_params}")
+            order_params = self._build_order_params(order_details)
+
+            logger.debug("Placing order with params: %s", order_params)
             # This is a blocking, synchronous network call.
             order_id = self.kite.place_order(**order_params)
-            print(f"Successfully placed order. Order ID: {order_id}")
-            
+            logger.info("Successfully placed order. Order ID: %s", order_id)
+
             # Ensure the returned order_id is a string to match the Pydantic schema
             return {"order_id": str(order_id)}
 
         except Exception as e:
-            print(f"Error placing order: {e}")
+            logger.error("Error placing order: %s", e)
             # Re-raise the exception to be caught by the MCP tool handler
             raise
 
@@ -69,11 +348,309 @@ class KiteHelper:
         try:
             # This is a blocking, synchronous network call.
             positions = self.kite.positions()
-            print("Successfully fetched positions.")
-            
+            logger.debug("Successfully fetched positions.")
+
             # Use Pydantic to validate the response and convert it to a dict.
             validated_positions = GetPositionsOutput.model_validate(positions)
             return validated_positions.model_dump()
         except Exception as e:
-            print(f"Error fetching positions: {e}")
+            logger.error("Error fetching positions: %s", e)
+            raise
+
+    async def place_order_async(self, order_details: PlaceOrderInput) -> dict:
+        """
+        Places an order without blocking the event loop.
+        Uses the native async client, or the broker executor's worker pool when it is disabled.
+        Orders go through the scheduler ahead of any queued read traffic.
+        Raises RiskRejectedError before contacting the broker if a risk limit would be breached.
+        A retry with the same idempotency key gets the original result without a new broker call.
+        """
+        return await self._place_validated_order(self._validate_order(order_details))
+
+    async def _place_validated_order(self, order_details: PlaceOrderInput) -> dict:
+        """Places an order whose symbol _validate_order has already checked and normalized."""
+        if order_details.idempotency_key:
+            fingerprint = order_details.model_dump(exclude={"idempotency_key"})
+            return await self.idempotency.run(
+                order_details.idempotency_key, fingerprint, self._place_order_journaled, order_details
+            )
+        return await self._place_order_journaled(order_details)
+
+    async def _find_keyed_order(self, idempotency_key: str):
+        """
+        Looks up today's order placed under an idempotency key by its tag. Returns its result,
+        or None if no such order reached the broker (a rejected one counts as not placed).
+        """
+        tag = order_tag(idempotency_key)
+        if self.client:
+            orders = await self.scheduler.run("portfolio", self.client.orders, priority=PRIORITY_ORDERS)
+        else:
+            orders = await self.scheduler.run("portfolio", self.executor.run, self.kite.orders, priority=PRIORITY_ORDERS)
+        for order in orders:
+            if order.get("tag") == tag and order.get("status") != "REJECTED":
+                return {"order_id": str(order["order_id"])}
+        return None
+
+    async def _place_order_journaled(self, order_details: PlaceOrderInput) -> dict:
+        # Journaled inside the idempotency layer: a replayed retry is not a new request, and the
+        # outcome is recorded even if the client that sent it has disconnected.
+        return await self._journaled("place", order_details.model_dump(), self._place_order_checked, order_details)
+
+    async def _journaled(self, kind: str, params: dict, func, *args, **kwargs) -> dict:
+        """Runs an order call, recording the request, outcome and latency in the order journal."""
+        if not self.use_journal:
+            return await func(*args, **kwargs)
+        ref = self.journal.record_request(kind, params)
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self.journal.record_error(ref, e, time.perf_counter() - started)
             raise
+        self.journal.record_response(ref, result["order_id"], time.perf_counter() - started)
+        return result
+
+    async def _place_order_checked(self, order_details: PlaceOrderInput) -> dict:
+        reservation = None
+        if self.risk.enabled:
+            reservation = self.risk.check(order_details, self._reference_price(order_details))
+
+        try:
+            result = await self.scheduler.run(
+                "orders", self._place_order_now, order_details, priority=PRIORITY_ORDERS
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # The order may still have reached the broker, so its exposure stays reserved.
+            raise
+        except Exception:
+            if reservation:
+                self.risk.release(reservation)
+            raise
+
+        if reservation:
+            self.risk.bind(reservation, result["order_id"])
+        return result
+
+    async def _place_order_now(self, order_details: PlaceOrderInput) -> dict:
+        if not self.client:
+            result = await self.executor.run(self.place_order, order_details)
+            self.positions_cache.invalidate()
+            return result
+
+        try:
+            order_params = self._build_order_params(order_details)
+
+            logger.debug("Placing order with params: %s", order_params)
+            order_id = await self.client.place_order(**order_params)
+            logger.info("Successfully placed order. Order ID: %s", order_id)
+
+            # The new order may change positions, so the next read must go to the broker.
+            self.positions_cache.invalidate()
+            return {"order_id": str(order_id)}
+        except Exception as e:
+            logger.error("Error placing order: %s", e)
+            raise
+
+    async def place_orders_async(self, orders: List[PlaceOrderInput]) -> dict:
+        """
+        Places a basket of orders concurrently, paced by the scheduler's order rate limit.
+        A failed leg does not stop the others; each leg reports its own order ID or error.
+        Symbols are validated for every leg before any order is sent.
+        """
+        validated = []
+        for leg, order in enumerate(orders, start=1):
+            try:
+                validated.append(self._validate_order(order))
+            except UnknownInstrumentError as e:
+                raise UnknownInstrumentError(order.exchange, f"{order.tradingsymbol.strip().upper()} (leg {leg})", e.suggestions) from e
+
+        outcomes = await asyncio.gather(
+            *[self._place_validated_order(order) for order in validated], return_exceptions=True
+        )
+
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                results.append({"order_id": None, "error": str(outcome) or type(outcome).__name__})
+            else:
+                results.append({"order_id": outcome["order_id"], "error": None})
+        return {"results": results}
+
+    async def cancel_order_async(self, order_id: str, variety: str = VARIETY_REGULAR) -> dict:
+        """
+        Cancels an open order. Cancellations share the order budget and priority.
+        """
+        return await self._journaled(
+            "cancel", {"order_id": order_id, "variety": variety},
+            self.scheduler.run, "orders", self._cancel_order_now, order_id, variety, priority=PRIORITY_ORDERS
+        )
+
+    async def _cancel_order_now(self, order_id: str, variety: str) -> dict:
+        try:
+            if self.client:
+                cancelled_id = await self.client.cancel_order(variety, order_id)
+            else:
+                cancelled_id = await self.executor.run(self.kite.cancel_order, variety=variety, order_id=order_id)
+            logger.info("Successfully cancelled order. Order ID: %s", cancelled_id)
+            return {"order_id": str(cancelled_id)}
+        except Exception as e:
+            logger.error("Error cancelling order %s: %s", order_id, e)
+            raise
+
+    async def get_positions_cached(self) -> CacheResult:
+        """
+        Returns positions from the short-lived cache, fetching them if the cache is stale.
+        Concurrent callers share a single in-flight broker call.
+        When the portfolio engine is seeded, positions come from it instead, with no broker call.
+        """
+        if self.use_portfolio_engine and self.portfolio.seeded:
+            if self.ticks.enabled:
+                prices = self.ticks.ltp(self.portfolio.tokens())
+                self.portfolio.mark({token: tick["last_price"] for token, tick in prices.items()})
+            return CacheResult(self.portfolio.snapshot(), self.portfolio.age(), "local")
+        return await self.positions_cache.get(self.get_positions_async)
+
+    async def get_positions_encoded(self, compress: bool = False) -> CacheResult:
+        """
+        Like get_positions_cached, but the value is the positions already encoded to JSON bytes
+        (an EncodedJSON), reused for as long as the snapshot is unchanged. With `compress`,
+        large bodies come with a gzipped copy as well.
+        """
+        cached = await self.get_positions_cached()
+        return cached._replace(value=self.positions_encoder.encode(cached.value, compress))
+
+    async def apply_postback(self, payload: dict) -> dict:
+        """
+        Verifies an order postback from the broker and applies it to the local positions.
+        Raises PermissionError if the checksum does not match, RuntimeError if no secret is set.
+        """
+        if not self.api_secret:
+            raise RuntimeError("KITE_API_SECRET must be set to verify postbacks.")
+        # Kite signs postbacks with SHA-256 of order_id + order_timestamp + api_secret.
+        message = f"{payload.get('order_id', '')}{payload.get('order_timestamp', '')}{self.api_secret}"
+        expected = hashlib.sha256(message.encode()).hexdigest()
+        if not hmac.compare_digest(expected, str(payload.get("checksum", ""))):
+            raise PermissionError("Postback checksum does not match.")
+
+        self.positions_cache.invalidate()
+        self._apply_order_update(payload)
+        return {"status": "ok"}
+
+    def _apply_order_update(self, order: dict):
+        """Feeds a broker order update to the portfolio and risk engines."""
+        if self.use_portfolio_engine:
+            self.portfolio.apply_order_update(order)
+        self.risk.apply_order_update(order)
+        if self.use_journal:
+            self.journal.record_update(order)
+
+    async def get_positions_async(self) -> dict:
+        """
+        Fetches positions without blocking the event loop.
+        Uses the native async client, or the broker executor's worker pool when it is disabled.
+        Reads are scheduled behind any queued orders.
+        """
+        return await self.scheduler.run("portfolio", self._get_positions_now, priority=PRIORITY_READS)
+
+    async def _get_positions_now(self) -> dict:
+        if not self.client:
+            return await self.executor.run(self.get_positions)
+
+        try:
+            positions = await self.client.positions()
+            logger.debug("Successfully fetched positions.")
+
+            validated_positions = GetPositionsOutput.model_validate(positions)
+            return validated_positions.model_dump()
+        except Exception as e:
+            logger.error("Error fetching positions: %s", e)
+            raise
+
+    async def get_quotes(self, instruments: List[str], mode: str = "quote") -> dict:
+        """
+        Returns market quotes for `EXCHANGE:TRADINGSYMBOL` keys through the micro-batching coalescer.
+        `mode` is "quote" for full quotes or "ltp" for last traded prices only.
+        """
+        return {"data": await self.quote_batchers[mode].get(instruments)}
+
+    async def _fetch_quotes(self, mode: str, instruments: List[str]) -> dict:
+        """Makes one batched quote or LTP call, scheduled against the quote rate limit."""
+        return await self.scheduler.run("quotes", self._fetch_quotes_now, mode, instruments, priority=PRIORITY_READS)
+
+    async def _fetch_quotes_now(self, mode: str, instruments: List[str]) -> dict:
+        try:
+            if self.client:
+                fetch = self.client.quote if mode == "quote" else self.client.ltp
+                quotes = await fetch(instruments)
+            else:
+                fetch = self.kite.quote if mode == "quote" else self.kite.ltp
+                quotes = await self.executor.run(fetch, instruments)
+            logger.debug("Fetched %s for %s instruments in one call.", mode, len(instruments))
+            return quotes
+        except Exception as e:
+            logger.error("Error fetching %s for %s instruments: %s", mode, len(instruments), e)
+            raise
+
+    async def get_historical(self, instrument_token: int, interval: str, start: int, end: int) -> dict:
+        """
+        Returns historical candles for [start, end] (Unix seconds) from the local candle store.
+        Only ranges that are not stored yet are fetched from the broker.
+        """
+        candles = await self.history.get(instrument_token, interval, start, end)
+        return {"instrument_token": instrument_token, "interval": interval, "candles": candles.tolist()}
+
+    async def _fetch_historical(self, instrument_token: int, interval: str, start: int, end: int):
+        """Fetches one range of candles, scheduled against the historical rate limit."""
+        return await self.scheduler.run(
+            "historical", self._fetch_historical_now, instrument_token, interval, start, end,
+            priority=PRIORITY_READS,
+        )
+
+    async def _fetch_historical_now(self, instrument_token: int, interval: str, start: int, end: int):
+        from_date, to_date = format_ist(start), format_ist(end)
+        try:
+            if self.client:
+                return await self.client.historical(instrument_token, interval, from_date, to_date)
+            return await self.executor.run(
+                self.kite.historical_data, instrument_token, from_date, to_date, interval
+            )
+        except Exception as e:
+            logger.error("Error fetching historical data for %s/%s: %s", instrument_token, interval, e)
+            raise
+
+    async def get_ltp(self, tokens: List[int]) -> dict:
+        """
+        Returns last traded prices from the tick engine. No broker call is made.
+        """
+        return {"data": self.ticks.ltp(tokens)}
+
+    async def get_bars(self, token: int, interval: str, count: int) -> dict:
+        """
+        Returns recent OHLCV bars built from live ticks. No broker call is made.
+        """
+        bars = self.ticks.bars(token, interval, count)
+        return {"instrument_token": token, "interval": interval, "bars": bars.tolist()}
+
+    async def journal_orders(self, day=None, status: str = None) -> list:
+        """
+        Returns journaled order requests for `day` (default today). Raises RuntimeError if journaling is off.
+        """
+        if not self.use_journal:
+            raise RuntimeError("The order journal is disabled (KITE_JOURNAL=0).")
+        if day is None or day == today_ist():
+            return self.journal.orders(day, status)
+        # Earlier days are read back from disk.
+        return await asyncio.to_thread(self.journal.orders, day, status)
+
+    async def scheduler_stats(self) -> dict:
+        return self.scheduler.stats()
+
+    async def render_metrics(self) -> str:
+        """Broker queue wait and call latency histograms, in the Prometheus text format."""
+        return self.scheduler.render_metrics()
+
+    async def portfolio_stats(self) -> dict:
+        return {"enabled": self.use_portfolio_engine, **self.portfolio.stats()}
+
+    async def risk_stats(self) -> dict:
+        return self.risk.stats()
@@ -0,0 +1,215 @@
+# src/logs.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from pathlib import Path
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+# Attributes every LogRecord has. Anything else on a record was passed with `extra=`.
+# uvicorn adds `color_message`, the message again with terminal colours.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "color_message"}
+
+# httpx logs every broker request at INFO.
+DEFAULT_LEVELS = {"httpx": "WARNING"}
+
+_listener = None
+_listener_pid = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger and message, plus any fields passed with `extra=`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """
+    Writes to whatever sys.stdout (or sys.stderr) is when the record is written, so output
+    follows redirections such as the GUI's, as print did.
+    """
+
+    def __init__(self, stream_name: str = "stdout"):
+        super().__init__(getattr(sys, stream_name))
+        self.stream_name = stream_name
+
+    def emit(self, record: logging.LogRecord):
+        self.stream = getattr(sys, self.stream_name)
+        super().emit(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue for the writer thread and never waits. When the queue is
+    full the record is dropped and counted.
+
+    Records are queued as they are, so the message is formatted from its arguments in the
+    writer thread, not by the caller. Pass arguments that will not change afterwards.
+    """
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class PipeHandler(logging.Handler):
+    """
+    Sends formatted lines to another process, e.g. the GUI, through a multiprocessing queue.
+    Runs in the writer thread and sends lists of (level number, text) pairs, one list each time
+    the log queue runs empty or `batch_size` lines have collected. When the reader falls behind,
+    lists are dropped, and the next one that gets through starts with a count of lost lines.
+    """
+
+    def __init__(self, pipe, batch_size=500):
+        super().__init__()
+        self.pipe = pipe
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._batch = []
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self._batch.append((record.levelno, self.format(record)))
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        lines = len(batch)
+        if self.dropped:
+            batch.insert(0, (logging.WARNING, f"{self.dropped} log lines were dropped before reaching this window."))
+        try:
+            self.pipe.put_nowait(batch)
+            self.dropped = 0
+        except queue.Full:
+            self.dropped += lines
+
+
+class _Writer(logging.handlers.QueueListener):
+    """Hands queued records to the console and file handlers, and reports records that were dropped."""
+
+    def __init__(self, record_queue: queue.Queue, source: DroppingQueueHandler, *handlers):
+        super().__init__(record_queue, *handlers, respect_handler_level=True)
+        self.source = source
+        self._reported = 0
+
+    def handle(self, record: logging.LogRecord):
+        dropped = self.source.dropped
+        if dropped != self._reported:
+            super().handle(logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": "Dropped %d log records: the log queue was full.", "args": (dropped - self._reported,),
+            }))
+            self._reported = dropped
+        super().handle(record)
+        if self.queue.empty():
+            # Caught up: hand over anything a handler is holding back, such as a batch for the GUI.
+            for handler in self.handlers:
+                handler.flush()
+
+
+def parse_levels(spec: str) -> dict:
+    """Parses per-logger levels such as "src.kite_utils=DEBUG,uvicorn.access=WARNING"."""
+    levels = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, level = item.partition("=")
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(role: str = "server", console: str = "stdout", pipe=None, data_dir=None):
+    """
+    Sends every log record through a bounded queue to a background writer thread, which writes
+    text to the console ("stdout" or "stderr") and JSON lines to a rotating `logs/<role>.log`
+    file, and with `pipe` (a multiprocessing queue) also sends batches of text lines to another process.
+    Logging never waits on the console or the disk. Calling it again in the same process does
+    nothing; a forked child gets its own queue and writer thread.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    text = logging.Formatter(TEXT_FORMAT)
+    console_handler = ConsoleHandler(console)
+    console_handler.setFormatter(text)
+    handlers = [console_handler]
+    if pipe is not None:
+        pipe_handler = PipeHandler(pipe)
+        pipe_handler.setFormatter(text)
+        handlers.append(pipe_handler)
+
+    if os.getenv("KITE_LOG_FILES", "1") != "0":
+        default_dir = Path(__file__).parent.parent / "data"
+        log_dir = Path(data_dir or os.getenv("KITE_DATA_DIR", default_dir)) / "logs"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_dir / f"{role}.log",
+            maxBytes=int(float(os.getenv("KITE_LOG_MAX_MB", "10")) * 1024 * 1024),
+            backupCount=int(os.getenv("KITE_LOG_BACKUPS", "5")),
+            encoding="utf-8",
+        )
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
+
+    record_queue = queue.Queue(maxsize=int(os.getenv("KITE_LOG_QUEUE_SIZE", "10000")))
+    queue_handler = DroppingQueueHandler(record_queue)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("KITE_LOG_LEVEL", "INFO").upper())
+    for name, level in dict(DEFAULT_LEVELS, **parse_levels(os.getenv("KITE_LOG_LEVELS", ""))).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = _Writer(record_queue, queue_handler, *handlers)
+    _listener_pid = os.getpid()
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Writes out the records still queued and stops the writer thread."""
+    global _listener
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def dropped_records() -> int:
+    """How many log records this process dropped because the queue was full."""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            return handler.dropped
+    return 0
@@ -1,8 +1,22 @@
 # src/main.py
+import time
+
+# Startup phases are timed from here, before the heavier imports below.
+_started = time.perf_counter()
+
+import argparse
 import asyncio
-from fastapi import FastAPI, HTTPException, Request
-import uvicorn
+import contextlib
+import datetime
+import functools
+import hmac
+import socket
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Request, Response, WebSocket
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.routing import APIRoute
 import json
+import logging
 import os
 import sys
 from pathlib import Path
@@ -11,19 +25,193 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.kite_utils import KiteHelper
-from src.schemas import PlaceOrderInput, PlaceOrderOutput, GetPositionsOutput
+from src.executor import ExecutorBusyError
+from src.encoding import accepts_gzip, etag_matches
+from src.streaming import PositionStream
+from src.instruments import UnknownInstrumentError, today_ist
+from src.risk import RiskRejectedError
+from src.idempotency import IdempotencyKeyReusedError
+from src.history import parse_ist
+from src.metrics import HistogramFamily, RequestTimer, current_request
+from src.profiling import Profiler, ProfilerBusyError
+from src.logs import configure_logging, dropped_records
+from src.schemas import (PlaceOrderInput, PlaceOrderOutput, PlaceOrdersInput,
+                         PlaceOrdersOutput, CancelOrderInput, CancelOrderOutput,
+                         GetPositionsOutput, QuoteOutput, InstrumentOutput, LTPOutput,
+                         BarsOutput, HistoricalOutput, JournalOutput, UpdateCredentialsInput,
+                         UpdateCredentialsOutput, ProfileInput)
+
+# Named explicitly: this module also runs as __main__.
+logger = logging.getLogger("src.main")
 
 # --- 1. Initialize API Helper ---
-# Initialize the Kite Helper once when the script starts.
-kite_helper = KiteHelper()
+# The Kite Helper is created when the server starts, not on import, so importing this module
+# stays cheap and needs no credentials. In multi-worker mode each worker process forwards
+# broker calls to the one KiteHelper owned by the coordinator process.
+kite_helper = None
+
+# Seconds from the start of this module's import to each startup phase.
+startup_times = {}
+
+def _mark(phase: str):
+    startup_times[phase] = round(time.perf_counter() - _started, 4)
+
+def get_helper():
+    """Returns this process's Kite Helper, creating it on first use."""
+    global kite_helper
+    if kite_helper is None:
+        if os.getenv("KITE_COORDINATOR"):
+            from src.coordinator import RemoteKiteHelper
+            kite_helper = RemoteKiteHelper.from_env()
+        else:
+            from src.kite_utils import KiteHelper
+            kite_helper = KiteHelper()
+        _mark("helper_created")
+    return kite_helper
+
+async def _fetch_positions():
+    return (await kite_helper.get_positions_cached()).value
+
+# Streaming clients share one poller, which reads through the positions cache.
+position_stream = PositionStream(_fetch_positions)
+
+# Profiles this process on demand, through the admin profiling endpoints.
+profiler = Profiler()
+
+async def startup():
+    """Creates the Kite Helper and opens the broker connection pool before the first request arrives."""
+    # Worker processes start here; a single-process server has set up logging already.
+    configure_logging(f"worker-{os.getpid()}" if os.getenv("KITE_COORDINATOR") else "server")
+    await get_helper().start()
+    _mark("ready")
+
+async def shutdown():
+    """Closes pooled broker connections and worker threads."""
+    await position_stream.close()
+    if kite_helper is not None:
+        await kite_helper.close()
+
+@contextlib.asynccontextmanager
+async def lifespan(_):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+class StartupTimer:
+    """Records when the first HTTP request has been served and prints the startup report."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+        if "first_request" not in startup_times and scope["type"] == "http":
+            _mark("first_request")
+            logger.info("Startup: %s", ", ".join(f"{phase} at {seconds * 1000:.0f} ms" for phase, seconds in startup_times.items()))
+
+# Per-endpoint latency of each request stage. "handler" includes "queue_wait" and "broker",
+# the time its broker calls spent waiting in the scheduler and running.
+request_stages = HistogramFamily(
+    "kite_request_stage_seconds", "Time HTTP requests spent in each stage, per endpoint.", ("endpoint", "stage")
+)
+
+class TimedRoute(APIRoute):
+    """
+    An APIRoute whose endpoint notes when it is entered and when it returns. Everything before
+    entry is request parsing and validation; everything after return, up to the response
+    headers, is response validation and serialization.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            timer = current_request.get()
+            if timer is not None:
+                timer.endpoint = path
+                timer.entered = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                if timer is not None:
+                    timer.returned = time.perf_counter()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+class MetricsMiddleware:
+    """Times every HTTP request by stage and records it in `request_stages`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timer = RequestTimer()
+        token = current_request.set(timer)
+        response_started = None
+
+        async def timed_send(message):
+            nonlocal response_started
+            if response_started is None and message["type"] == "http.response.start":
+                response_started = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            current_request.reset(token)
+            # Requests that matched no route, or failed validation, have no endpoint timings.
+            if timer.returned is not None:
+                finished = time.perf_counter()
+                endpoint = timer.endpoint
+                request_stages.labels(endpoint, "validation").observe(timer.entered - timer.started)
+                request_stages.labels(endpoint, "handler").observe(timer.returned - timer.entered)
+                if response_started is not None:
+                    request_stages.labels(endpoint, "serialization").observe(response_started - timer.returned)
+                request_stages.labels(endpoint, "total").observe(finished - timer.started)
+                for stage, seconds in timer.stages.items():
+                    request_stages.labels(endpoint, stage).observe(seconds)
+
+class ProfilingMiddleware:
+    """Hands HTTP requests to a request-scoped profiling session. Passes straight through when none is running."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        session = profiler.active
+        if session is None or not session.request_scoped or not session.matches(scope):
+            return await self.app(scope, receive, send)
+
+        session.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.request_finished()
 
 # --- 2. Create the FastAPI Server ---
 app = FastAPI(
     title="Claude Python Trading Bot",
     description="An API server to expose Zerodha trading functions for Claude LLM",
     version="1.0.0",
+    lifespan=lifespan,
 )
+app.router.route_class = TimedRoute
+app.add_middleware(StartupTimer)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+_mark("imported")
+
+def require_admin(x_admin_token: Optional[str]):
+    """Rejects admin requests unless X-Admin-Token matches KITE_ADMIN_TOKEN."""
+    expected = os.getenv("KITE_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled; set KITE_ADMIN_TOKEN to enable them.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
 
 # --- 3. Define API Endpoints ---
 @app.post("/api/place_order", response_model=PlaceOrderOutput)
@@ -31,27 +219,387 @@ async def place_order(params: PlaceOrderInput):
     """
     Places a stock order on the Zerodha trading platform.
     """
-    print(f"Endpoint 'place_order' invoked with params: {params}")
+    logger.debug("Endpoint 'place_order' invoked with params: %s", params)
     try:
-        result = kite_helper.place_order(params)
+        result = await kite_helper.place_order_async(params)
         return result
+    except IdempotencyKeyReusedError as e:
+        logger.warning("Rejected 'place_order': %s", e)
+        raise HTTPException(status_code=422, detail=str(e))
+    except (UnknownInstrumentError, RiskRejectedError) as e:
+        logger.warning("Rejected 'place_order': %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        logger.warning("Rejected 'place_order', broker queue is full: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning("The 'place_order' broker call timed out.")
+        raise HTTPException(status_code=504, detail="Broker call timed out.")
     except Exception as e:
-        print(f"An error occurred in the 'place_order' endpoint: {e}")
+        logger.error("An error occurred in the 'place_order' endpoint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/place_orders", response_model=PlaceOrdersOutput)
+async def place_orders(params: PlaceOrdersInput):
+    """
+    Places a basket of stock orders concurrently within the broker's order rate limit.
+    Returns one result per order, in input order.
+    """
+    logger.debug("Endpoint 'place_orders' invoked with %s orders.", len(params.orders))
+    try:
+        result = await kite_helper.place_orders_async(params.orders)
+        return result
+    except UnknownInstrumentError as e:
+        logger.warning("Rejected 'place_orders': %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("An error occurred in the 'place_orders' endpoint: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/cancel_order", response_model=CancelOrderOutput)
+async def cancel_order(params: CancelOrderInput):
+    """
+    Cancels an open order on the Zerodha trading platform.
+    """
+    logger.debug("Endpoint 'cancel_order' invoked with params: %s", params)
+    try:
+        result = await kite_helper.cancel_order_async(params.order_id, params.variety)
+        return result
+    except ExecutorBusyError as e:
+        logger.warning("Rejected 'cancel_order', broker queue is full: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning("The 'cancel_order' broker call timed out.")
+        raise HTTPException(status_code=504, detail="Broker call timed out.")
+    except Exception as e:
+        logger.error("An error occurred in the 'cancel_order' endpoint: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/journal", response_model=JournalOutput)
+async def journal(date: str = None, status: str = None):
+    """
+    Returns the order journal for a day (default today, 'YYYY-MM-DD'): every order and cancel
+    request with its broker outcome and latency. `status` filters to 'sent', 'failed' or 'unknown'.
+    """
+    try:
+        day = datetime.date.fromisoformat(date) if date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be 'YYYY-MM-DD'.")
+    day = day or today_ist()
+    try:
+        orders = await kite_helper.journal_orders(day, status)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"date": day.isoformat(), "orders": orders}
+
 @app.get("/api/get_positions", response_model=GetPositionsOutput)
-async def get_positions():
+async def get_positions(request: Request):
     """
     Fetches all current open trading positions from the Zerodha account.
+    Responses may come from a short-lived cache; the X-Cache and Age headers say so.
+    The JSON body is encoded once per snapshot. Send If-None-Match with the last ETag to get
+    304 Not Modified while positions are unchanged. Large bodies are gzipped when accepted, and
+    the gzipped body has its own ETag.
     """
-    print("Endpoint 'get_positions' invoked.")
+    logger.debug("Endpoint 'get_positions' invoked.")
+    gzip_accepted = accepts_gzip(request.headers.get("accept-encoding"))
     try:
-        result = kite_helper.get_positions()
-        return result
+        cached = await kite_helper.get_positions_encoded(gzip_accepted)
+    except ExecutorBusyError as e:
+        logger.warning("Rejected 'get_positions', broker queue is full: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning("The 'get_positions' broker call timed out.")
+        raise HTTPException(status_code=504, detail="Broker call timed out.")
     except Exception as e:
-        print(f"An error occurred in the 'get_positions' endpoint: {e}")
+        logger.error("An error occurred in the 'get_positions' endpoint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+    # The body was validated against GetPositionsOutput when fetched, so it is sent as it is.
+    encoded = cached.value
+    gzipped = gzip_accepted and encoded.gzipped is not None
+    etag = encoded.gzip_etag if gzipped else encoded.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "X-Cache": cached.status.upper(),
+        "Age": str(int(cached.age)),
+        "X-Cache-Age-Ms": f"{cached.age * 1000:.0f}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(encoded.gzipped, media_type="application/json", headers=headers)
+    return Response(encoded.body, media_type="application/json", headers=headers)
+
+@app.get("/api/stream/positions")
+async def stream_positions():
+    """
+    Streams positions as Server-Sent Events: a `snapshot` event, then `diff` events with only
+    the changed and removed rows. Every event carries a `seq`; on a gap, reconnect to resync.
+    """
+    logger.debug("Endpoint 'stream_positions' invoked.")
+    subscription = position_stream.subscribe()
+
+    async def event_source():
+        try:
+            async for event in position_stream.events(subscription):
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event_type, seq, data = event
+                yield f"id: {seq}\nevent: {event_type}\ndata: {data}\n\n"
+        finally:
+            position_stream.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/ws/positions")
+async def positions_websocket(websocket: WebSocket):
+    """
+    Streams the same snapshot and diff events as JSON text frames: {"type", "seq", "data"}.
+    Send {"action": "resync"} to get a fresh snapshot after detecting a sequence gap.
+    """
+    await websocket.accept()
+    logger.debug("WebSocket 'positions' connected.")
+    subscription = position_stream.subscribe()
+
+    async def read_client():
+        while True:
+            message = await websocket.receive_json()
+            if message.get("action") == "resync":
+                position_stream.resync(subscription)
+
+    async def send_events():
+        async for event in position_stream.events(subscription):
+            if event is None:
+                await websocket.send_text('{"type": "keepalive"}')
+                continue
+            event_type, seq, data = event
+            await websocket.send_text(f'{{"type": "{event_type}", "seq": {seq}, "data": {data}}}')
+
+    # Whichever side finishes first (usually the client disconnecting) ends the session.
+    tasks = [asyncio.create_task(read_client()), asyncio.create_task(send_events())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        position_stream.unsubscribe(subscription)
+        logger.debug("WebSocket 'positions' disconnected.")
+
+@app.get("/api/quote", response_model=QuoteOutput)
+async def quote(instruments: str, mode: str = "quote"):
+    """
+    Returns market quotes for comma-separated 'EXCHANGE:TRADINGSYMBOL' keys (e.g. 'NSE:INFY,NSE:TCS').
+    Lookups from concurrent requests are batched into a single broker call.
+    """
+    keys = [key.strip().upper() for key in instruments.split(",") if key.strip()]
+    if not keys:
+        raise HTTPException(status_code=400, detail="instruments must list at least one 'EXCHANGE:TRADINGSYMBOL'.")
+    if mode not in ("quote", "ltp"):
+        raise HTTPException(status_code=400, detail="mode must be 'quote' or 'ltp'.")
+    try:
+        return await kite_helper.get_quotes(keys, mode)
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning("The 'quote' broker call timed out.")
+        raise HTTPException(status_code=504, detail="Broker call timed out.")
+    except Exception as e:
+        logger.error("An error occurred in the 'quote' endpoint: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/instruments/{exchange}/{tradingsymbol}", response_model=InstrumentOutput)
+async def lookup_instrument(exchange: str, tradingsymbol: str):
+    """
+    Looks up an instrument in the local instrument master, with suggestions for unknown symbols.
+    """
+    try:
+        return await kite_helper.lookup_instrument(exchange, tradingsymbol)
+    except UnknownInstrumentError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/api/ltp", response_model=LTPOutput)
+async def ltp(instruments: str):
+    """
+    Returns last traded prices for comma-separated instrument tokens, served from live ticks.
+    Only instruments in KITE_TICKER_INSTRUMENTS that have ticked are included.
+    """
+    try:
+        tokens = [int(token) for token in instruments.split(",") if token.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="instruments must be comma-separated instrument tokens.")
+    return await kite_helper.get_ltp(tokens)
+
+@app.get("/api/bars", response_model=BarsOutput)
+async def bars(instrument_token: int, interval: str = "1m", count: int = 100):
+    """
+    Returns recent 1s or 1m OHLCV bars for a subscribed instrument, served from live ticks.
+    """
+    try:
+        return await kite_helper.get_bars(instrument_token, interval, count)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/historical", response_model=HistoricalOutput)
+async def historical(instrument_token: int, interval: str, from_date: str, to_date: str):
+    """
+    Returns historical candles for an instrument. Dates are 'YYYY-MM-DD' or ISO datetimes (IST).
+    Repeat queries are served from the local candle store without calling the broker.
+    """
+    logger.debug("Endpoint 'historical' invoked for %s/%s %s..%s.", instrument_token, interval, from_date, to_date)
+    try:
+        start, end = parse_ist(from_date), parse_ist(to_date, end_of_day=True)
+        return await kite_helper.get_historical(instrument_token, interval, start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning("The 'historical' broker call timed out.")
+        raise HTTPException(status_code=504, detail="Broker call timed out.")
+    except Exception as e:
+        logger.error("An error occurred in the 'historical' endpoint: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/postback")
+async def postback(request: Request):
+    """
+    Receives order postbacks from Kite (set this URL as the app's postback URL).
+    Verified updates are applied to the local portfolio engine and clear the positions cache.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Postback body must be JSON.")
+    try:
+        return await kite_helper.apply_postback(payload)
+    except PermissionError as e:
+        logger.warning("Rejected postback: %s", e)
+        raise HTTPException(status_code=403, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("An error occurred in the 'postback' endpoint: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/portfolio_stats")
+async def portfolio_stats():
+    """
+    Reports the local portfolio engine's update counts and its drift at the last reconciliation.
+    """
+    return await kite_helper.portfolio_stats()
+
+@app.post("/api/admin/credentials", response_model=UpdateCredentialsOutput)
+async def update_credentials(params: UpdateCredentialsInput, x_admin_token: Optional[str] = Header(None)):
+    """
+    Switches to a new access token without a restart. In-flight requests finish on the old session.
+    The server also picks up a new token written to .env, or re-reads it on SIGHUP. With --workers,
+    SIGHUP must go to the coordinator process; the server's main process restarts its workers instead.
+    """
+    require_admin(x_admin_token)
+    return {"switched": await kite_helper.update_credentials(params.access_token)}
+
+@app.post("/api/admin/profile")
+async def start_profile(params: ProfileInput, x_admin_token: Optional[str] = Header(None)):
+    """
+    Starts profiling this process, for a time window or for the next N requests to an endpoint.
+    Stack samples are saved in the folded format flame graph tools read, and deterministic mode
+    also saves a cProfile .prof file. Poll GET /api/admin/profile for the top functions.
+    With --workers, only the worker serving this request is profiled, and later calls may reach
+    another worker, which reports its own session (or 404).
+    """
+    require_admin(x_admin_token)
+    path_regex = None
+    if params.endpoint is not None:
+        route = next((r for r in app.routes if isinstance(r, APIRoute) and r.path == params.endpoint), None)
+        if route is None:
+            raise HTTPException(status_code=400, detail=f"Unknown endpoint: {params.endpoint}")
+        path_regex = route.path_regex
+
+    scoped = params.endpoint is not None or params.requests is not None
+    try:
+        session = profiler.start(
+            mode=params.mode,
+            duration=params.duration or (300.0 if scoped else 10.0),
+            interval=params.interval_ms / 1000,
+            endpoint=params.endpoint,
+            path_regex=path_regex,
+            requests=params.requests,
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info("Profiling started: %s, %g s limit, endpoint %s.", session.mode, session.duration, session.endpoint or 'any')
+    return session.status()
+
+@app.get("/api/admin/profile")
+async def profile_status(x_admin_token: Optional[str] = Header(None)):
+    """
+    Reports the running or last profiling session: its state, the saved files and, once done,
+    the functions that took the most time. With --workers, only this worker's sessions are seen.
+    """
+    require_admin(x_admin_token)
+    if profiler.last is None:
+        raise HTTPException(status_code=404, detail="No profiling session has been started.")
+    return profiler.last.status()
+
+@app.delete("/api/admin/profile")
+async def stop_profile(x_admin_token: Optional[str] = Header(None)):
+    """
+    Stops the running profiling session early and returns its results.
+    """
+    require_admin(x_admin_token)
+    session = await profiler.stop()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session has been started.")
+    return session.status()
+
+@app.get("/api/risk_stats")
+async def risk_stats():
+    """
+    Reports the pre-trade risk limits, rejections per rule and how long checks take.
+    """
+    return await kite_helper.risk_stats()
+
+@app.get("/api/scheduler_stats")
+async def scheduler_stats():
+    """
+    Reports broker queue depths and wait times per endpoint class.
+    High waits mean rate limiting, not the broker, is the bottleneck.
+    """
+    return await kite_helper.scheduler_stats()
+
+@app.get("/api/startup_stats")
+async def startup_stats():
+    """
+    Reports how long this process took, from importing the server module, to reach each startup phase.
+    """
+    return {"phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in startup_times.items()}}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Latency histograms in the Prometheus text format: request stages per endpoint, and broker
+    queue wait and call times per endpoint class and method, each with p50/p95/p99.
+    With --workers, request stages cover only the worker serving the scrape; broker timings come
+    from the coordinator and cover every worker.
+    """
+    body = request_stages.render() + await kite_helper.render_metrics()
+    body += f"# HELP kite_log_records_dropped_total Log records dropped because the log queue was full.\n" \
+            f"# TYPE kite_log_records_dropped_total counter\nkite_log_records_dropped_total {dropped_records()}\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     """
@@ -62,49 +610,101 @@ async def root():
         "version": "1.0.0",
         "endpoints": [
             {"path": "/api/place_order", "method": "POST", "description": "Places a stock order"},
-            {"path": "/api/get_positions", "method": "GET", "description": "Gets current positions"}
+            {"path": "/api/place_orders", "method": "POST", "description": "Places a basket of stock orders"},
+            {"path": "/api/cancel_order", "method": "POST", "description": "Cancels an open order"},
+            {"path": "/api/journal", "method": "GET", "description": "The day's journaled orders and outcomes"},
+            {"path": "/api/get_positions", "method": "GET", "description": "Gets current positions"},
+            {"path": "/api/stream/positions", "method": "GET", "description": "Streams position changes (SSE)"},
+            {"path": "/ws/positions", "method": "WEBSOCKET", "description": "Streams position changes"},
+            {"path": "/api/quote", "method": "GET", "description": "Batched market quotes"},
+            {"path": "/api/instruments/{exchange}/{tradingsymbol}", "method": "GET", "description": "Looks up an instrument"},
+            {"path": "/api/ltp", "method": "GET", "description": "Last traded prices from live ticks"},
+            {"path": "/api/bars", "method": "GET", "description": "1s/1m OHLCV bars from live ticks"},
+            {"path": "/api/historical", "method": "GET", "description": "Historical candles (cached on disk)"},
+            {"path": "/api/postback", "method": "POST", "description": "Receives order postbacks from Kite"},
+            {"path": "/api/portfolio_stats", "method": "GET", "description": "Portfolio engine updates and drift"},
+            {"path": "/api/admin/credentials", "method": "POST", "description": "Switches to a new access token (admin)"},
+            {"path": "/api/admin/profile", "method": "POST", "description": "Profiles the server for a time window or N requests (admin)"},
+            {"path": "/api/risk_stats", "method": "GET", "description": "Pre-trade risk limits and rejections"},
+            {"path": "/api/scheduler_stats", "method": "GET", "description": "Broker queue wait times"},
+            {"path": "/api/startup_stats", "method": "GET", "description": "Time taken to reach each startup phase"},
+            {"path": "/metrics", "method": "GET", "description": "Latency histograms (Prometheus format)"}
         ]
     }
 
 # --- 4. Start the Server ---
-def start_server(host="127.0.0.1", port=None):
+def _bind(host, port, requested=False):
+    """
+    Binds a listening socket for uvicorn, or returns None if the port is taken.
+    A port the operator asked for is reported as an error; a probed one only at INFO.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # IPPROTO_TCP must be explicit: asyncio only sets TCP_NODELAY on connections accepted from
+    # sockets that name it, and without it keep-alive responses stall on delayed ACKs.
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+    except OSError as e:
+        sock.close()
+        if requested:
+            logger.error("Requested port %s is not available: %s", port, e)
+        else:
+            logger.info("Port %s is not available: %s", port, e)
+        return None
+    # Worker processes inherit the socket instead of binding their own.
+    sock.set_inheritable(True)
+    return sock
+
+def start_server(host="127.0.0.1", port=None, workers=1):
     """Start the FastAPI server with uvicorn"""
-    # Try to find an available port if none is specified
-    if port is None:
-        # Try ports 8000 through 8010
-        for p in range(8000, 8011):
-            try:
-                print(f"Starting API server at http://{host}:{p}")
-                uvicorn.run(app, host=host, port=p)
-                break
-            except OSError as e:
-                print(f"Port {p} is not available. Trying next port...")
-                if p == 8010:
-                    print("All ports from 8000 to 8010 are in use. Please free up a port and try again.")
-                    sys.exit(1)
+    # Probe for a free port by binding it ourselves; uvicorn then serves on that exact socket,
+    # so there is no window for another process to take the port in between.
+    # Without a port, try ports 8000 through 8010; a requested port that is taken is an error.
+    configure_logging("server")
+    for p in ([port] if port is not None else range(8000, 8011)):
+        sock = _bind(host, p, requested=port is not None)
+        if sock is not None:
+            break
     else:
-        try:
-            print(f"Starting API server at http://{host}:{port}")
-            uvicorn.run(app, host=host, port=port)
-        except OSError as e:
-            print(f"Error starting server on port {port}: {e}")
-            sys.exit(1)
+        if port is None:
+            logger.error("All ports from 8000 to 8010 are in use. Please free up a port and try again.")
+        sys.exit(1)
+
+    import uvicorn
+    from uvicorn.supervisors import Multiprocess
+
+    logger.info("Starting API server at http://%s:%s", host, p)
+    if workers > 1:
+        # One coordinator owns the broker session, so rate limits, caches and idempotency
+        # keys are shared by all workers instead of multiplied by them.
+        from src.coordinator import start_coordinator
+        start_coordinator()
+        logger.info("Running %s API worker processes.", workers)
+        # Workers are separate processes, so uvicorn needs the app as an import string.
+        # log_config=None leaves uvicorn's loggers, access log included, to our non-blocking logging.
+        config = uvicorn.Config("src.main:app", host=host, port=p, workers=workers, log_config=None)
+        Multiprocess(config, sockets=[sock]).run()
+    else:
+        uvicorn.Server(uvicorn.Config(app, host=host, port=p, log_config=None)).run(sockets=[sock])
 
 # For the CLI script
 def main():
     """Start the server with default settings"""
+    # Settings such as KITE_WORKERS may come from .env, which the Kite Helper would only load later.
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Serve the trading API.")
     # Can take optional port from command line
-    port = None
-    if len(sys.argv) > 1:
-        try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print(f"Invalid port number: {sys.argv[1]}")
-            sys.exit(1)
-            
-    start_server(port=port)
+    parser.add_argument("port", nargs="?", type=int, default=None, help="port to listen on (default: first free of 8000-8010)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("KITE_WORKERS", "1")),
+                        help="API worker processes sharing one broker coordinator (default: KITE_WORKERS or 1)")
+    args = parser.parse_args()
+
+    start_server(host=args.host, port=args.port, workers=max(1, args.workers))
 
 if __name__ == "__main__":
     # Run the main function.
     main()
-
@@ -0,0 +1,185 @@
+# src/mcp_server.py
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+import mcp_types as types
+from mcp.server.lowlevel import Server
+from mcp.server.stdio import stdio_server
+from pydantic import BaseModel, ValidationError
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.schemas import (PlaceOrderInput, PlaceOrderOutput, PlaceOrdersInput, PlaceOrdersOutput,
+                         CancelOrderInput, CancelOrderOutput, GetPositionsOutput, QuoteInput,
+                         QuoteOutput, InstrumentLookupInput, InstrumentOutput)
+from src.logs import configure_logging
+
+# Named explicitly: this module also runs as __main__.
+logger = logging.getLogger("src.mcp_server")
+
+
+class NoInput(BaseModel):
+    """Tools that take no arguments."""
+
+
+async def _place_order(helper, params: PlaceOrderInput) -> dict:
+    return await helper.place_order_async(params)
+
+
+async def _place_orders(helper, params: PlaceOrdersInput) -> dict:
+    return await helper.place_orders_async(params.orders)
+
+
+async def _cancel_order(helper, params: CancelOrderInput) -> dict:
+    return await helper.cancel_order_async(params.order_id, params.variety)
+
+
+async def _get_positions(helper, params: NoInput) -> dict:
+    return (await helper.get_positions_cached()).value
+
+
+async def _get_quote(helper, params: QuoteInput) -> dict:
+    return await helper.get_quotes([key.strip().upper() for key in params.instruments], params.mode)
+
+
+async def _lookup_instrument(helper, params: InstrumentLookupInput) -> dict:
+    return await helper.lookup_instrument(params.exchange, params.tradingsymbol)
+
+
+# name -> (description, input model, output model, handler). Schemas come from src/schemas.py.
+TOOLS = {
+    "place_order": ("Places a stock order on the Zerodha trading platform.", PlaceOrderInput, PlaceOrderOutput, _place_order),
+    "place_orders": ("Places a basket of stock orders concurrently. Returns one result per order.", PlaceOrdersInput, PlaceOrdersOutput, _place_orders),
+    "cancel_order": ("Cancels an open order.", CancelOrderInput, CancelOrderOutput, _cancel_order),
+    "get_positions": ("Fetches all current open trading positions.", NoInput, GetPositionsOutput, _get_positions),
+    "get_quote": ("Returns market quotes for 'EXCHANGE:TRADINGSYMBOL' keys.", QuoteInput, QuoteOutput, _get_quote),
+    "lookup_instrument": ("Looks up an instrument, with suggestions for unknown symbols.", InstrumentLookupInput, InstrumentOutput, _lookup_instrument),
+}
+
+
+def build_server(helper) -> Server:
+    """
+    Creates an MCP server whose tools call `helper` (a KiteHelper) directly, in-process.
+    Tool input and output schemas are generated from the Pydantic models.
+    """
+    tools = [
+        types.Tool(
+            name=name,
+            description=description,
+            input_schema=input_model.model_json_schema(),
+            output_schema=output_model.model_json_schema(),
+        )
+        for name, (description, input_model, output_model, _) in TOOLS.items()
+    ]
+
+    async def list_tools(ctx, params) -> types.ListToolsResult:
+        return types.ListToolsResult(tools=tools)
+
+    async def call_tool(ctx, params: types.CallToolRequestParams) -> types.CallToolResult:
+        if params.name not in TOOLS:
+            return _error(f"Unknown tool '{params.name}'.")
+        _, input_model, output_model, handler = TOOLS[params.name]
+        logger.debug("MCP tool '%s' invoked.", params.name)
+        try:
+            arguments = input_model.model_validate(params.arguments or {})
+            result = output_model.model_validate(await handler(helper, arguments)).model_dump(mode="json")
+        except ValidationError as e:
+            return _error(f"Invalid arguments for '{params.name}': {e}")
+        except asyncio.TimeoutError:
+            return _error("Broker call timed out.")
+        except Exception as e:
+            logger.error("An error occurred in the '%s' tool: %s", params.name, e)
+            return _error(str(e) or type(e).__name__)
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=json.dumps(result))],
+            structured_content=result,
+        )
+
+    return Server("claude-python-trading-bot", version="1.0.0", on_list_tools=list_tools, on_call_tool=call_tool)
+
+
+def _error(message: str) -> types.CallToolResult:
+    return types.CallToolResult(content=[types.TextContent(type="text", text=message)], is_error=True)
+
+
+async def serve_stdio(api_port=None, host="127.0.0.1"):
+    """
+    Serves MCP over stdin/stdout. With `api_port`, the REST API is served from the same
+    process too, so both share one KiteHelper with its caches and connection pool.
+    """
+    async with stdio_server() as (read_stream, write_stream):
+        # Imported only now: the stdio transport has redirected stray prints away from stdout.
+        import uvicorn
+        from src.main import app, get_helper, startup, shutdown
+
+        server = build_server(get_helper())
+        await startup()
+        api = None
+        if api_port:
+            api = uvicorn.Server(uvicorn.Config(app, host=host, port=api_port, lifespan="off", log_config=None))
+            api_task = asyncio.create_task(api.serve())
+        try:
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+        finally:
+            if api:
+                api.should_exit = True
+                await api_task
+            await shutdown()
+            # Flush buffered prints while stdout still leads to stderr, not to the MCP client.
+            sys.stdout.flush()
+
+
+def serve_http(host="127.0.0.1", port=8000):
+    """
+    Serves MCP over streamable HTTP at /mcp, next to the REST API on the same port and KiteHelper.
+    """
+    import contextlib
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from src.main import app, get_helper, startup, shutdown
+
+    server = build_server(get_helper())
+    mcp_app = server.streamable_http_app(host=host)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        await startup()
+        try:
+            async with server.session_manager.run():
+                yield
+        finally:
+            await shutdown()
+
+    combined = Starlette(routes=mcp_app.routes + [Mount("/", app=app)], lifespan=lifespan)
+    logger.info("Serving MCP at http://%s:%s/mcp and the REST API at http://%s:%s/", host, port, host, port)
+    uvicorn.run(combined, host=host, port=port, log_config=None)
+
+
+def main():
+    """Runs the MCP server. Claude Desktop launches it with the default stdio transport."""
+    parser = argparse.ArgumentParser(description="Serve the trading tools over the Model Context Protocol.")
+    parser.add_argument("--transport", choices=["stdio", "http"], default="stdio",
+                        help="stdio for Claude Desktop, or streamable HTTP (default: stdio)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP port for --transport http (default: 8000)")
+    parser.add_argument("--api-port", type=int, default=None,
+                        help="with stdio, also serve the REST API on this port from the same process")
+    args = parser.parse_args()
+
+    # With stdio, stdout carries the protocol, so log lines go to stderr.
+    configure_logging("mcp", console="stderr" if args.transport == "stdio" else "stdout")
+    if args.transport == "stdio":
+        asyncio.run(serve_stdio(args.api_port, args.host))
+    else:
+        serve_http(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
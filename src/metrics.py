@@ -0,0 +1,107 @@
+# src/metrics.py
+import bisect
+import contextvars
+import time
+
+# Histogram bucket upper bounds in seconds: four per power of ten, from 10 µs to 100 s.
+BUCKETS = tuple(float(f"{10 ** (exponent / 4):.3g}") for exponent in range(-20, 9))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+    Counts observations in fixed, logarithmically spaced buckets.
+    Recording is one bisect and three additions; quantiles are interpolated within a bucket.
+    """
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # The last bucket is +Inf.
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return BUCKETS[-1]
+
+
+class HistogramFamily:
+    """One named histogram per combination of label values, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, description: str, label_names: tuple):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._histograms = {}
+
+    def labels(self, *values) -> Histogram:
+        histogram = self._histograms.get(values)
+        if histogram is None:
+            histogram = self._histograms[values] = Histogram()
+        return histogram
+
+    def render(self) -> str:
+        """
+        The histogram (cumulative buckets, sum and count), followed by a `_quantile` gauge with
+        p50/p95/p99 per label set, so percentiles can be read without a Prometheus server.
+        """
+        name = self.name
+        lines = [f"# HELP {name} {self.description}", f"# TYPE {name} histogram"]
+        quantiles = [f"# HELP {name}_quantile Estimated quantiles of {name}.", f"# TYPE {name}_quantile gauge"]
+        for values, histogram in sorted(self._histograms.items()):
+            labels = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(self.label_names, values))
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.9g}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+            for q in QUANTILES:
+                quantiles.append(f'{name}_quantile{{{labels},quantile="{q}"}} {histogram.quantile(q):.6g}')
+        return "\n".join(lines + quantiles) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestTimer:
+    """Stage timings for one HTTP request, filled in as the request passes through each stage."""
+
+    __slots__ = ("started", "endpoint", "entered", "returned", "stages")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.endpoint = None
+        self.entered = None
+        self.returned = None
+        self.stages = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+# The timer of the request being handled, visible to everything it awaits.
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """Adds time spent in `stage` (e.g. queue wait or a broker call) to the current request, if any."""
+    timer = current_request.get()
+    if timer is not None:
+        timer.add(stage, seconds)
@@ -0,0 +1,232 @@
+# src/portfolio.py
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.streaming import SEGMENTS, position_key
+
+logger = logging.getLogger(__name__)
+
+
+def _new_row(order: dict) -> dict:
+    """An empty position for an instrument first traded after the book was seeded."""
+    return {
+        "tradingsymbol": order["tradingsymbol"],
+        "exchange": order["exchange"],
+        "instrument_token": order["instrument_token"],
+        "product": order["product"],
+        "quantity": 0,
+        "overnight_quantity": 0,
+        "multiplier": 1.0,
+        "average_price": 0.0,
+        "close_price": 0.0,
+        "last_price": 0.0,
+        "value": 0.0,
+        "pnl": 0.0,
+        "m2m": 0.0,
+        "unrealised": 0.0,
+        "realised": 0.0,
+    }
+
+
+class PortfolioEngine:
+    """
+    Keeps positions in memory and updates them from order updates instead of polling the broker.
+
+    It is seeded from one positions snapshot. After that, each order update (from the ticker's
+    order-update stream or a postback) is turned into a fill delta by comparing its filled
+    quantity with what was already applied for that order. Duplicate or out-of-order updates
+    are therefore harmless. Only `quantity`, `average_price`, `value` and `last_price` are kept
+    as state; `pnl`, `unrealised`, `realised` and `m2m` are derived from them the way Kite does.
+
+    A slow background reconciliation re-reads the broker's positions, records how far the local
+    book had drifted, and reseeds from the broker, which stays authoritative. Positions that got
+    a fill while the broker call was in flight keep their local rows until the next pass, since
+    the snapshot may or may not include that fill; every other position is reconciled.
+    """
+
+    def __init__(self, fetch, reconcile_interval=None):
+        self._fetch = fetch  # async () -> {"net": [...], "day": [...]}
+        self.reconcile_interval = reconcile_interval or float(os.getenv("KITE_RECONCILE_INTERVAL", "60"))
+
+        self._rows = None  # {"net": {key: row}, "day": {key: row}}
+        self._m2m_offsets = {}  # (segment, key) -> pnl - m2m at seeding, for overnight positions
+        self._orders = {}  # order_id -> (filled_quantity, filled_value) already applied
+        self._filled_during_fetch = None  # position keys filled while a reconcile fetch is in flight
+        self.reconciled_at = None
+
+        self.updates_received = 0
+        self.fills_applied = 0
+        self.updates_ignored = 0
+        self.reconciliations = 0
+        self.reconciliations_partial = 0
+        self.reconciliations_drifted = 0
+        self.last_drift = None
+
+    @property
+    def seeded(self) -> bool:
+        return self._rows is not None
+
+    def age(self) -> float:
+        """Seconds since positions were last read from the broker."""
+        return time.monotonic() - self.reconciled_at
+
+    def seed(self, positions: dict, keep=()):
+        """Replaces the local book with a broker snapshot, except the local rows for keys in `keep`."""
+        rows, offsets = {}, {}
+        for segment in SEGMENTS:
+            rows[segment] = {}
+            for position in positions[segment]:
+                key = position_key(position)
+                if key not in keep:
+                    rows[segment][key] = dict(position)
+                    offsets[(segment, key)] = position["pnl"] - position["m2m"]
+            for key in keep:
+                if key in self._rows[segment]:
+                    rows[segment][key] = self._rows[segment][key]
+                    offsets[(segment, key)] = self._m2m_offsets.get((segment, key), 0.0)
+        self._rows, self._m2m_offsets = rows, offsets
+        self.reconciled_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """Returns the current positions in the same shape as the broker's positions call."""
+        return {segment: [dict(row) for row in self._rows[segment].values()] for segment in SEGMENTS}
+
+    def tokens(self) -> list:
+        return list({key[0] for key in self._rows["net"]}) if self.seeded else []
+
+    def mark(self, prices: dict):
+        """Updates last prices ({instrument_token: price}) and the P&L derived from them."""
+        for segment in SEGMENTS:
+            for key, row in self._rows[segment].items():
+                price = prices.get(key[0])
+                if price is not None and price != row["last_price"]:
+                    row["last_price"] = price
+                    self._derive(segment, key, row)
+
+    def apply_order_update(self, order: dict):
+        """
+        Applies a Kite order update or postback payload. Only the part of `filled_quantity`
+        not seen before for this order is applied, at the price implied by `average_price`.
+        """
+        self.updates_received += 1
+        order_id = order["order_id"]
+        filled = int(order.get("filled_quantity") or 0)
+        filled_value = filled * float(order.get("average_price") or 0)
+        applied, applied_value = self._orders.get(order_id, (0, 0.0))
+        if filled <= applied:
+            self.updates_ignored += 1
+            return
+        self._orders[order_id] = (filled, filled_value)
+        if not self.seeded:
+            # The seed snapshot will include this fill; only later increases are applied on top.
+            self.updates_ignored += 1
+            return
+
+        quantity = filled - applied
+        price = (filled_value - applied_value) / quantity
+        signed = quantity if order["transaction_type"] == "BUY" else -quantity
+        key = position_key(order)
+        if self._filled_during_fetch is not None:
+            self._filled_during_fetch.add(key)
+        for segment in SEGMENTS:
+            row = self._rows[segment].get(key)
+            if row is None:
+                row = self._rows[segment][key] = _new_row(order)
+            self._fill(row, signed, price)
+            self._derive(segment, key, row)
+        self.fills_applied += 1
+
+    @staticmethod
+    def _fill(row: dict, signed: int, price: float):
+        held = row["quantity"]
+        new_quantity = held + signed
+        row["value"] -= signed * price * row["multiplier"]
+        if held == 0 or (held > 0) == (signed > 0):
+            # Opening or adding: the average cost moves towards the fill price.
+            row["average_price"] = (abs(held) * row["average_price"] + abs(signed) * price) / abs(new_quantity)
+        elif new_quantity == 0:
+            row["average_price"] = 0.0
+        elif (new_quantity > 0) != (held > 0):
+            # The fill closed the position and opened one on the other side.
+            row["average_price"] = price
+        row["quantity"] = new_quantity
+        row["last_price"] = price
+
+    def _derive(self, segment: str, key: tuple, row: dict):
+        multiplier = row["multiplier"]
+        quantity = row["quantity"]
+        row["pnl"] = row["value"] + quantity * row["last_price"] * multiplier
+        row["unrealised"] = quantity * (row["last_price"] - row["average_price"]) * multiplier
+        row["realised"] = row["pnl"] - row["unrealised"]
+        row["m2m"] = row["pnl"] - self._m2m_offsets.get((segment, key), 0.0)
+
+    def _measure_drift(self, positions: dict, skip=()) -> dict:
+        """Compares the local net positions with a broker snapshot, leaving out keys in `skip`."""
+        local = self._rows["net"]
+        broker = {position_key(position): position for position in positions["net"]}
+        mismatched = []
+        max_pnl = 0.0
+        for key in (local.keys() | broker.keys()) - set(skip):
+            ours, theirs = local.get(key), broker.get(key)
+            our_quantity = ours["quantity"] if ours else 0
+            their_quantity = theirs["quantity"] if theirs else 0
+            if our_quantity != their_quantity:
+                mismatched.append({"instrument_token": key[0], "product": key[1],
+                                   "local": our_quantity, "broker": their_quantity})
+            if ours and theirs:
+                max_pnl = max(max_pnl, abs(ours["pnl"] - theirs["pnl"]))
+        return {"positions": len(mismatched), "max_pnl": max_pnl, "mismatched": mismatched[:20]}
+
+    async def reconcile(self):
+        """Re-reads positions from the broker, records the drift and reseeds the local book."""
+        self._filled_during_fetch = set()
+        try:
+            positions = await self._fetch()
+        finally:
+            # Filled while the call was in flight: the snapshot may or may not include these fills.
+            filled, self._filled_during_fetch = self._filled_during_fetch, None
+        if not self.seeded:
+            self.seed(positions)
+            return
+
+        self.last_drift = self._measure_drift(positions, skip=filled)
+        self.reconciliations += 1
+        if filled:
+            self.reconciliations_partial += 1
+        if self.last_drift["positions"]:
+            self.reconciliations_drifted += 1
+            logger.warning("Portfolio drift: %s positions differed from the broker.", self.last_drift['positions'])
+        self.seed(positions, keep=filled)
+
+    async def run(self):
+        """Seeds the book, then reconciles it every `reconcile_interval` seconds."""
+        while True:
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error reconciling positions: %s", e)
+            await asyncio.sleep(self.reconcile_interval if self.seeded else min(self.reconcile_interval, 5))
+
+    def stats(self) -> dict:
+        return {
+            "seeded": self.seeded,
+            "age": round(self.age(), 3) if self.seeded else None,
+            "positions": len(self._rows["net"]) if self.seeded else 0,
+            "updates_received": self.updates_received,
+            "fills_applied": self.fills_applied,
+            "updates_ignored": self.updates_ignored,
+            "reconciliations": self.reconciliations,
+            "reconciliations_partial": self.reconciliations_partial,
+            "reconciliations_drifted": self.reconciliations_drifted,
+            "last_drift": self.last_drift,
+        }
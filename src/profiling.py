@@ -0,0 +1,288 @@
+# src/profiling.py
+import asyncio
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+TOP_FUNCTIONS = 20
+
+# Numbers sessions within this process, so ids stay unique however close together they start.
+_session_numbers = itertools.count(1)
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profiling session is started while another is still running."""
+
+
+class _Sampler(threading.Thread):
+    """
+    Records the stack of every other thread each `interval` seconds, while `session.recording`.
+    Stacks are kept folded ("thread;caller;callee" -> samples), the format flame graph tools read.
+    The event loop thread's stacks are also kept apart, for the summary.
+    """
+
+    def __init__(self, session, interval: float, loop_thread_id: int):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.session = session
+        self.interval = interval
+        self.loop_thread_id = loop_thread_id
+        self.stacks = Counter()
+        self.loop_stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._frame_names = {}
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            if self.session.recording:
+                self._sample()
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def _sample(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join([names.get(thread_id, str(thread_id))] + stack)] += 1
+            if thread_id == self.loop_thread_id:
+                self.loop_stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = self._frame_names[code] = f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+        return name
+
+
+class ProfileSession:
+    """
+    One profiling run. Sampling mode records stacks on a background thread; deterministic mode
+    also runs cProfile on the event loop thread, which sees every call but slows it down.
+
+    Without an endpoint or request count, the whole process is recorded for `duration` seconds.
+    Otherwise only time during which matching requests are in flight is recorded, until
+    `requests` of them have finished or `duration` runs out. Other requests served in the same
+    moments share the event loop and show up too.
+    """
+
+    def __init__(self, mode, duration, interval, out_dir: Path, endpoint=None, path_regex=None, requests=None):
+        # Workers share the output directory, so the id also names the process.
+        now = time.time()
+        self.id = (f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+                   f"-{os.getpid()}-{next(_session_numbers)}")
+        self.mode = mode
+        self.duration = duration
+        self.endpoint = endpoint
+        self.requests = requests
+        self.out_dir = out_dir
+        self.request_scoped = endpoint is not None or requests is not None
+        self.started_at = time.time()
+        self.stopped_at = None
+        self.requests_started = 0
+        self.requests_finished = 0
+        self.recording = False
+        self.summary = None
+        self.files = {}
+
+        self._path_regex = path_regex
+        self._in_flight = 0
+        self._profile = cProfile.Profile() if mode == "deterministic" else None
+        self._sampler = _Sampler(self, interval, threading.get_ident())
+        self._timer = None
+        self._saved = None
+        self._on_stop = None
+
+    def start(self, on_stop):
+        self._on_stop = on_stop
+        self._sampler.start()
+        self._timer = asyncio.get_running_loop().call_later(self.duration, self.stop)
+        if not self.request_scoped:
+            self._record(True)
+
+    def matches(self, scope) -> bool:
+        """True if the request described by an ASGI scope should be profiled."""
+        return (
+            self.stopped_at is None
+            and scope["type"] == "http"
+            and (self.requests is None or self.requests_started < self.requests)
+            and (self._path_regex is None or self._path_regex.match(scope["path"]) is not None)
+        )
+
+    def request_started(self):
+        self.requests_started += 1
+        self._in_flight += 1
+        if self._in_flight == 1:
+            self._record(True)
+
+    def request_finished(self):
+        self.requests_finished += 1
+        self._in_flight -= 1
+        if self.stopped_at is not None:
+            return
+        if self._in_flight == 0:
+            self._record(False)
+        if self.requests is not None and self.requests_finished >= self.requests:
+            self.stop()
+
+    def _record(self, on: bool):
+        self.recording = on
+        if self._profile is not None:
+            if on:
+                self._profile.enable()
+            else:
+                self._profile.disable()
+
+    def stop(self):
+        """Stops recording and saves the results on a worker thread. Safe to call more than once."""
+        if self.stopped_at is not None:
+            return
+        self.stopped_at = time.time()
+        self._record(False)
+        self._timer.cancel()
+        self._saved = asyncio.get_running_loop().run_in_executor(None, self._save)
+        self._on_stop(self)
+
+    async def wait(self):
+        """Waits until the session has stopped and its files are written."""
+        if self._saved is not None:
+            await asyncio.shield(self._saved)
+
+    def _save(self):
+        self._sampler.stop()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        base = self.out_dir / f"{self.id}-{self.mode}"
+
+        folded = base.with_suffix(".folded")
+        folded.write_text("".join(f"{stack} {count}\n" for stack, count in self._sampler.stacks.most_common()))
+        files = {"folded": str(folded)}
+
+        summary = {"samples": self._sampler.samples, **_summarize_samples(self._sampler.loop_stacks)}
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile)
+            stats.dump_stats(base.with_suffix(".prof"))
+            files["prof"] = str(base.with_suffix(".prof"))
+            summary["top_functions"] = _top_from_cprofile(stats)
+        summary_file = base.with_suffix(".json")
+        summary_file.write_text(json.dumps(dict(self.status(), **summary, files=files), indent=2))
+        files["summary"] = str(summary_file)
+        self.files = files
+        self.summary = summary
+
+    def status(self) -> dict:
+        if self.stopped_at is None:
+            state = "running"
+        elif self.summary is None:
+            state = "saving"
+        else:
+            state = "done"
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "state": state,
+            "endpoint": self.endpoint,
+            "requests": self.requests,
+            "requests_profiled": self.requests_started,
+            "started_at": self.started_at,
+            "seconds": round((self.stopped_at or time.time()) - self.started_at, 3),
+            "files": self.files,
+            **(self.summary or {}),
+        }
+
+
+def _is_idle(frame_name: str) -> bool:
+    """True for the frame an idle event loop waits in."""
+    return frame_name.startswith(("EpollSelector.select", "KqueueSelector.select", "SelectSelector.select", "PollSelector.select")) \
+        or "'select." in frame_name
+
+
+def _top_from_cprofile(stats: pstats.Stats) -> list:
+    """The functions with the most time spent in their own code, according to cProfile, leaving out waiting for I/O."""
+    rows = [(key, value) for key, value in stats.stats.items() if not _is_idle(key[2])]
+    rows.sort(key=lambda item: item[1][2], reverse=True)
+    return [
+        {
+            "function": f"{name} ({Path(filename).name}:{line})",
+            "calls": calls,
+            "self_ms": round(self_time * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, self_time, cumulative, _) in rows[:TOP_FUNCTIONS]
+    ]
+
+
+def _summarize_samples(loop_stacks: Counter) -> dict:
+    """
+    How often the event loop was idle, and the functions most often on top of its stack while busy,
+    with how often they were on it at all.
+    """
+    own, anywhere = Counter(), Counter()
+    idle = busy = 0
+    for stack, count in loop_stacks.items():
+        if not stack or _is_idle(stack[-1]):
+            idle += count
+            continue
+        busy += count
+        own[stack[-1]] += count
+        for frame in set(stack):
+            anywhere[frame] += count
+    total = idle + busy
+    return {
+        "loop_idle_pct": round(idle / total * 100, 2) if total else None,
+        "top_functions": [
+            {
+                "function": frame,
+                "self_pct": round(count / busy * 100, 2),
+                "total_pct": round(anywhere[frame] / busy * 100, 2),
+            }
+            for frame, count in own.most_common(TOP_FUNCTIONS)
+        ],
+    }
+
+
+class Profiler:
+    """
+    Starts profiling sessions on demand and keeps the last one for reporting.
+    While no session runs, `active` is None and nothing is recorded.
+    """
+
+    def __init__(self, data_dir=None):
+        default_dir = Path(__file__).parent.parent / "data"
+        self.data_dir = Path(data_dir or os.getenv("KITE_DATA_DIR", default_dir)) / "profiles"
+        self.active = None
+        self.last = None
+
+    def start(self, mode="sampling", duration=10.0, interval=0.005, endpoint=None, path_regex=None, requests=None) -> ProfileSession:
+        if self.active is not None:
+            raise ProfilerBusyError(f"Profiling session {self.active.id} is still running.")
+        session = ProfileSession(mode, duration, interval, self.data_dir, endpoint, path_regex, requests)
+        self.active = self.last = session
+        session.start(on_stop=self._stopped)
+        return session
+
+    def _stopped(self, session):
+        if self.active is session:
+            self.active = None
+
+    async def stop(self):
+        """Stops the running session, if any, and returns the latest session once its files are written."""
+        session = self.active or self.last
+        if session is not None:
+            session.stop()
+            await session.wait()
+        return session
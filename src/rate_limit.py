@@ -0,0 +1,61 @@
+# src/rate_limit.py
+import asyncio
+import math
+import time
+from collections import deque
+
+# Calls are spread so that no window of this length holds more than `rate` of them. It is a
+# millisecond longer than a second, so closed one-second windows are covered as well.
+WINDOW = 1.001
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket that paces calls to a broker rate limit.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. The bucket alone would let
+    `capacity - 1 + rate` calls into a one-second window, so the last `rate` call times are also
+    kept and no one-second window ever holds more than `rate` calls (at least one). The rate can
+    therefore be set to the broker's per-second limit. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("TokenBucket needs a positive rate and a capacity of at least 1.")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._recent = deque(maxlen=max(1, math.floor(rate)))  # times of the latest calls
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _window_wait(self) -> float:
+        """Seconds until one more call fits in the window, measured from the last refill."""
+        if len(self._recent) < self._recent.maxlen:
+            return 0.0
+        return max(0.0, self._recent[0] + WINDOW - self._updated)
+
+    def try_acquire(self) -> bool:
+        """Takes a token if one is available right now, without waiting."""
+        self._refill()
+        if self._tokens >= 1 and self._window_wait() == 0:
+            self._tokens -= 1
+            self._recent.append(self._updated)
+            return True
+        return False
+
+    def time_until_available(self) -> float:
+        """Seconds until the next token is available (0 if one is available now)."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate, self._window_wait())
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep(self.time_until_available())
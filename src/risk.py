@@ -0,0 +1,222 @@
+# src/risk.py
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.schemas import PlaceOrderInput
+from src.instruments import today_ist
+
+# Limits read from the environment when not passed in. 0 disables a limit.
+RISK_LIMITS = {
+    "max_order_quantity": "KITE_RISK_MAX_ORDER_QTY",
+    "max_order_value": "KITE_RISK_MAX_ORDER_VALUE",
+    "max_symbol_quantity": "KITE_RISK_MAX_SYMBOL_QTY",
+    "max_gross_value": "KITE_RISK_MAX_GROSS_VALUE",
+    "max_orders_per_minute": "KITE_RISK_MAX_ORDERS_PER_MIN",
+    "duplicate_window": "KITE_RISK_DUPLICATE_WINDOW",
+}
+
+
+class RiskRejectedError(ValueError):
+    """Raised when an order breaches a pre-trade risk limit. It never reaches the broker."""
+
+    def __init__(self, rule: str, message: str):
+        self.rule = rule
+        self.message = message
+        super().__init__(f"Risk check '{rule}' failed: {message}")
+
+    def __reduce__(self):
+        return (self.__class__, (self.rule, self.message))
+
+
+class Reservation:
+    """The exposure one accepted order holds until it is filled, cancelled or rejected."""
+
+    __slots__ = ("key", "quantity", "signed_quantity", "value", "fingerprint", "accepted_at", "day")
+
+    def __init__(self, key: tuple, quantity: int, signed_quantity: int, value: float,
+                 fingerprint: tuple, accepted_at: float, day):
+        self.key = key
+        self.quantity = quantity
+        self.signed_quantity = signed_quantity
+        self.value = value
+        self.fingerprint = fingerprint  # None when duplicates are not checked
+        self.accepted_at = accepted_at  # monotonic time, as kept in the recent-orders window
+        self.day = day  # the trading day whose counters it was reserved against
+
+
+class RiskEngine:
+    """
+    Pre-trade limits checked in memory before an order is sent to the broker.
+
+    Counters are kept per symbol (signed quantity) and per account (gross order value, recent
+    order times, recent order fingerprints) and updated incrementally as orders are accepted,
+    so every check is a handful of dict lookups and comparisons with no broker call.
+    Exposure covers orders sent through this server today. Orders the broker cancels or rejects
+    give back their unfilled part when their order update arrives.
+
+    Order value uses the LIMIT price, or the reference price (e.g. the last traded price) for
+    MARKET orders. A MARKET order without a reference price cannot be valued, so it is rejected
+    while a value limit is set, unless `allow_unpriced` (KITE_RISK_ALLOW_UNPRICED) lets it skip
+    the value limits. Either way it is counted.
+    """
+
+    def __init__(self, allow_unpriced=None, **limits):
+        self.limits = {
+            name: float(limits[name] if limits.get(name) is not None else os.getenv(env, "0"))
+            for name, env in RISK_LIMITS.items()
+        }
+        if allow_unpriced is None:
+            allow_unpriced = os.getenv("KITE_RISK_ALLOW_UNPRICED", "0") != "0"
+        self.allow_unpriced = allow_unpriced
+        self._day = None
+        self._reset()
+
+        self.rejections = {}
+        self.unpriced_orders = 0
+        self.checks = 0
+        self._check_ns = 0
+        self._max_check_ns = 0
+
+    @property
+    def enabled(self) -> bool:
+        return any(self.limits.values())
+
+    def _reset(self):
+        self._day = today_ist()
+        self._exposure = {}  # (exchange, tradingsymbol) -> signed quantity
+        self._gross_value = 0.0
+        self._recent = deque()  # monotonic times of recent orders
+        self._fingerprints = {}  # order fields -> monotonic time last accepted
+        self._open = {}  # order_id -> Reservation
+
+    def _reject(self, rule: str, message: str):
+        self.rejections[rule] = self.rejections.get(rule, 0) + 1
+        raise RiskRejectedError(rule, message)
+
+    def check(self, order: PlaceOrderInput, reference_price=None) -> Reservation:
+        """
+        Checks an order against every limit and reserves its exposure.
+        Raises RiskRejectedError, leaving the counters unchanged, if any limit is breached.
+        """
+        started = time.perf_counter_ns()
+        try:
+            return self._check(order, reference_price)
+        finally:
+            elapsed = time.perf_counter_ns() - started
+            self.checks += 1
+            self._check_ns += elapsed
+            self._max_check_ns = max(self._max_check_ns, elapsed)
+
+    def _check(self, order: PlaceOrderInput, reference_price) -> Reservation:
+        limits = self.limits
+        now = time.monotonic()
+        if self._day != today_ist():
+            self._reset()
+
+        quantity = order.quantity
+        if limits["max_order_quantity"] and quantity > limits["max_order_quantity"]:
+            self._reject("max_order_quantity", f"quantity {quantity} exceeds {limits['max_order_quantity']:g}.")
+
+        price = order.price if order.order_type == "LIMIT" else reference_price
+        value = quantity * price if price else 0.0
+        if not price:
+            self.unpriced_orders += 1
+            if not self.allow_unpriced and (limits["max_order_value"] or limits["max_gross_value"]):
+                self._reject("unpriced", "no reference price to value the MARKET order against the value limits.")
+        if limits["max_order_value"] and value > limits["max_order_value"]:
+            self._reject("max_order_value", f"order value {value:.2f} exceeds {limits['max_order_value']:g}.")
+
+        key = (order.exchange, order.tradingsymbol)
+        signed = quantity if order.transaction_type == "BUY" else -quantity
+        held = self._exposure.get(key, 0)
+        projected = held + signed
+        # Orders that reduce exposure are always allowed.
+        if limits["max_symbol_quantity"] and abs(projected) > limits["max_symbol_quantity"] and abs(projected) > abs(held):
+            self._reject("max_symbol_quantity",
+                         f"{order.exchange}:{order.tradingsymbol} exposure would be {projected}, limit {limits['max_symbol_quantity']:g}.")
+
+        if limits["max_gross_value"] and self._gross_value + value > limits["max_gross_value"]:
+            self._reject("max_gross_value",
+                         f"gross order value would be {self._gross_value + value:.2f}, limit {limits['max_gross_value']:g}.")
+
+        recent = self._recent
+        while recent and now - recent[0] >= 60:
+            recent.popleft()
+        if limits["max_orders_per_minute"] and len(recent) >= limits["max_orders_per_minute"]:
+            self._reject("max_orders_per_minute", f"{len(recent)} orders in the last minute.")
+
+        fingerprint = None
+        window = limits["duplicate_window"]
+        if window:
+            fingerprint = (key, order.transaction_type, order.order_type, quantity, order.product, order.price)
+            last = self._fingerprints.get(fingerprint)
+            if last is not None and now - last < window:
+                self._reject("duplicate_window", f"an identical order was sent {now - last:.1f}s ago.")
+            if len(self._fingerprints) > 10000:
+                self._fingerprints = {k: t for k, t in self._fingerprints.items() if now - t < window}
+            self._fingerprints[fingerprint] = now
+
+        self._exposure[key] = projected
+        self._gross_value += value
+        recent.append(now)
+        return Reservation(key, quantity, signed, value, fingerprint, now, self._day)
+
+    def release(self, reservation: Reservation):
+        """
+        Undoes an accepted order that never reached the broker, e.g. because the broker call
+        failed: its exposure, its place in the orders-per-minute window and its duplicate
+        fingerprint are all given back.
+        """
+        if reservation.day != self._day:
+            return  # The counters it was reserved against have been reset since.
+        self._give_back(reservation, 1.0)
+        try:
+            self._recent.remove(reservation.accepted_at)
+        except ValueError:
+            pass  # Already out of the window.
+        if reservation.fingerprint is not None and self._fingerprints.get(reservation.fingerprint) == reservation.accepted_at:
+            del self._fingerprints[reservation.fingerprint]
+
+    def _give_back(self, reservation: Reservation, fraction: float):
+        """Gives back `fraction` of a reservation's exposure."""
+        signed = round(reservation.signed_quantity * fraction)
+        self._exposure[reservation.key] = self._exposure.get(reservation.key, 0) - signed
+        self._gross_value = max(0.0, self._gross_value - reservation.value * fraction)
+
+    def bind(self, reservation: Reservation, order_id: str):
+        """Associates an accepted reservation with the broker's order ID, for later order updates."""
+        self._open[order_id] = reservation
+
+    def apply_order_update(self, order: dict):
+        """Releases the unfilled part of orders the broker cancelled or rejected."""
+        status = order.get("status")
+        if status not in ("COMPLETE", "CANCELLED", "REJECTED"):
+            return
+        reservation = self._open.pop(str(order.get("order_id")), None)
+        if reservation is None or status == "COMPLETE":
+            return
+        unfilled = reservation.quantity - int(order.get("filled_quantity") or 0)
+        # The order reached the broker, so it keeps its place in the orders-per-minute window.
+        if unfilled > 0 and reservation.day == self._day:
+            self._give_back(reservation, unfilled / reservation.quantity)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "limits": self.limits,
+            "checks": self.checks,
+            "mean_check_us": round(self._check_ns / self.checks / 1000, 2) if self.checks else 0.0,
+            "max_check_us": round(self._max_check_ns / 1000, 2),
+            "rejections": self.rejections,
+            "unpriced_orders": self.unpriced_orders,
+            "gross_value": round(self._gross_value, 2),
+            "symbols": len(self._exposure),
+            "open_orders": len(self._open),
+        }
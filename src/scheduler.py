@@ -0,0 +1,213 @@
+# src/scheduler.py
+import asyncio
+import heapq
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.rate_limit import TokenBucket
+from src.metrics import HistogramFamily, record_stage
+
+# Lower numbers run first. Order placement and cancellation always beat read traffic.
+PRIORITY_ORDERS = 0
+PRIORITY_READS = 10
+
+# Kite Connect rate limits per endpoint class, in requests per second.
+# See https://kite.trade/docs/connect/v3/exceptions/#api-rate-limit
+DEFAULT_RATE_LIMITS = {
+    "orders": 10,
+    "quotes": 1,
+    "historical": 3,
+    "portfolio": 10,
+}
+
+
+class WaitStats:
+    """
+    Tracks how long calls of one endpoint class waited in the scheduler queue.
+    Keeps running totals plus a window of recent waits for percentiles.
+    """
+
+    def __init__(self, window=1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+
+    def record(self, wait: float):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+        self._recent.append(wait)
+
+    def summary(self) -> dict:
+        recent = sorted(self._recent)
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))]
+
+        return {
+            "count": self.count,
+            "mean_wait_ms": (self.total / self.count * 1000) if self.count else 0.0,
+            "p50_wait_ms": percentile(0.50) * 1000,
+            "p95_wait_ms": percentile(0.95) * 1000,
+            "max_wait_ms": self.max * 1000,
+        }
+
+
+class BrokerScheduler:
+    """
+    The single gate every broker call passes through.
+
+    Each endpoint class ("orders", "quotes", "historical", "portfolio") has its own token bucket
+    matching Kite's limits, and at most `max_in_flight` calls run at once. Waiting calls are
+    granted in priority order, so a queued order is always dispatched before queued reads,
+    and a burst of position polling can never use up the order budget.
+    """
+
+    def __init__(self, rate_limits=None, max_in_flight=None):
+        rate_limits = rate_limits or {
+            name: float(os.getenv(f"KITE_{name.upper()}_RATE", str(rate)))
+            for name, rate in DEFAULT_RATE_LIMITS.items()
+        }
+        # A capacity of 1 paces calls evenly; the bucket keeps any one-second window within the rate.
+        self.buckets = {name: TokenBucket(rate=rate, capacity=1) for name, rate in rate_limits.items()}
+        self.max_in_flight = max_in_flight or int(os.getenv("KITE_MAX_IN_FLIGHT", "10"))
+
+        self._queues = {name: [] for name in self.buckets}
+        self._wait_stats = {name: WaitStats() for name in self.buckets}
+        self.wait_histograms = HistogramFamily(
+            "kite_broker_queue_wait_seconds", "Time broker calls waited for a rate-limit token and a slot.", ("endpoint_class",)
+        )
+        self.call_histograms = HistogramFamily(
+            "kite_broker_call_seconds", "Duration of broker calls once dispatched.", ("method",)
+        )
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._wakeup = None
+        self._dispatcher = None
+        self._loop = None
+
+    async def run(self, endpoint_class, func, *args, priority=PRIORITY_READS, **kwargs):
+        """
+        Waits for a slot and a rate-limit token for `endpoint_class`, then awaits `func(*args, **kwargs)`.
+        """
+        if endpoint_class not in self._queues:
+            raise ValueError(f"Unknown endpoint class: {endpoint_class}")
+
+        self._ensure_dispatcher()
+        grant = asyncio.get_running_loop().create_future()
+        enqueued_at = time.monotonic()
+        heapq.heappush(self._queues[endpoint_class], (priority, next(self._sequence), grant))
+        self._wakeup.set()
+
+        try:
+            await grant
+        except asyncio.CancelledError:
+            # If the slot was granted just as the caller gave up, hand it back.
+            if grant.done() and not grant.cancelled():
+                self._release()
+            else:
+                grant.cancel()
+            raise
+
+        wait = time.monotonic() - enqueued_at
+        self._wait_stats[endpoint_class].record(wait)
+        self.wait_histograms.labels(endpoint_class).observe(wait)
+        record_stage("queue_wait", wait)
+
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            # e.g. KiteHelper._place_order_now is recorded as "place_order".
+            self.call_histograms.labels(func.__name__.strip("_").removesuffix("_now")).observe(elapsed)
+            record_stage("broker", elapsed)
+            self._release()
+
+    def stats(self) -> dict:
+        """Returns queue depths and wait times per endpoint class."""
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "classes": {
+                name: {
+                    "queued": sum(1 for _, _, grant in queue if not grant.done()),
+                    "rate_per_second": self.buckets[name].rate,
+                    **self._wait_stats[name].summary(),
+                }
+                for name, queue in self._queues.items()
+            },
+        }
+
+    def render_metrics(self) -> str:
+        """Queue wait and broker call histograms in the Prometheus text format."""
+        return self.wait_histograms.render() + self.call_histograms.render()
+
+    def _release(self):
+        self._in_flight -= 1
+        self._wakeup.set()
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+
+    async def close(self):
+        """Stops the dispatcher task."""
+        if self._dispatcher and not self._dispatcher.done():
+            self._dispatcher.cancel()
+
+    async def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            delay = self._dispatch()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self):
+        """
+        Grants as many waiting calls as slots and tokens allow, most urgent first.
+        Returns how long to sleep before a token frees up, or None to wait for a wake-up.
+        """
+        while self._in_flight < self.max_in_flight:
+            best = None
+            next_token_in = None
+
+            for name, queue in self._queues.items():
+                # Drop callers that gave up while waiting.
+                while queue and queue[0][2].done():
+                    heapq.heappop(queue)
+                if not queue:
+                    continue
+
+                wait = self.buckets[name].time_until_available()
+                if wait > 0:
+                    next_token_in = wait if next_token_in is None else min(next_token_in, wait)
+                    continue
+                if best is None or queue[0][:2] < self._queues[best][0][:2]:
+                    best = name
+
+            if best is None:
+                return next_token_in
+
+            self.buckets[best].try_acquire()
+            _, _, grant = heapq.heappop(self._queues[best])
+            self._in_flight += 1
+            grant.set_result(None)
+
+        return None
@@ -1,6 +1,6 @@
 # src/schemas.py
 from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 class PlaceOrderInput(BaseModel):
     """
@@ -14,6 +14,7 @@ class PlaceOrderInput(BaseModel):
     quantity: int = Field(..., gt=0, description="The number of shares to trade.")
     product: Literal['CNC', 'MIS'] = Field(..., description="Product type: CNC (for delivery) or MIS (for intraday).")
     price: Optional[float] = Field(None, description="The price for a LIMIT order. Not required for MARKET orders.")
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=128, description="Optional client-chosen key. Retries with the same key return the first request's result instead of placing another order.")
 
 class PlaceOrderOutput(BaseModel):
     """
@@ -21,6 +22,40 @@ class PlaceOrderOutput(BaseModel):
     """
     order_id: str = Field(..., description="The unique ID of the placed order.")
 
+class CancelOrderInput(BaseModel):
+    """
+    Defines the structure for the input parameters required to cancel an open order.
+    """
+    order_id: str = Field(..., description="The ID of the order to cancel.")
+    variety: Literal['regular', 'amo', 'co', 'iceberg', 'auction'] = Field('regular', description="The variety the order was placed with.")
+
+class CancelOrderOutput(BaseModel):
+    """
+    Defines the structure for the output after cancelling an order.
+    """
+    order_id: str = Field(..., description="The ID of the cancelled order.")
+
+class PlaceOrdersInput(BaseModel):
+    """
+    Defines the structure for a basket of orders placed in one request.
+    Every leg is validated before any order is sent to the broker.
+    """
+    orders: List[PlaceOrderInput] = Field(..., min_length=1, max_length=50, description="The orders to place, at most 50 per basket.")
+
+class OrderLegResult(BaseModel):
+    """
+    Defines the outcome of a single leg in a basket order.
+    Exactly one of `order_id` and `error` is set.
+    """
+    order_id: Optional[str] = Field(None, description="The unique ID of the placed order, if it succeeded.")
+    error: Optional[str] = Field(None, description="Why the order failed, if it did.")
+
+class PlaceOrdersOutput(BaseModel):
+    """
+    Defines the structure for the output after placing a basket of orders.
+    """
+    results: List[OrderLegResult] = Field(..., description="One result per order, in the same order as the input.")
+
 class Position(BaseModel):
     """
     Defines the structure for a single trading position.
@@ -46,4 +81,114 @@ class GetPositionsOutput(BaseModel):
     Defines the structure for the list of all trading positions.
     """
     net: List[Position] = Field(..., description="List of net positions.")
-    day: List[Position] = Field(..., description="List of positions for the day.")
\ No newline at end of file
+    day: List[Position] = Field(..., description="List of positions for the day.")
+
+class QuoteInput(BaseModel):
+    """
+    Defines the structure for a market quote lookup.
+    """
+    instruments: List[str] = Field(..., min_length=1, description="Instruments as 'EXCHANGE:TRADINGSYMBOL' (e.g. 'NSE:INFY').")
+    mode: Literal['quote', 'ltp'] = Field('quote', description="'quote' for full quotes or 'ltp' for last traded prices only.")
+
+class QuoteOutput(BaseModel):
+    """
+    Defines the structure for market quotes fetched from the broker.
+    """
+    data: Dict[str, Dict[str, Any]] = Field(..., description="Quotes keyed by 'EXCHANGE:TRADINGSYMBOL'. Unknown instruments are omitted.")
+
+class InstrumentLookupInput(BaseModel):
+    """
+    Defines the structure for looking up an instrument in the local instrument master.
+    """
+    exchange: str = Field(..., description="The exchange (e.g. 'NSE').")
+    tradingsymbol: str = Field(..., description="The trading symbol (e.g. 'INFY').")
+
+class InstrumentOutput(BaseModel):
+    """
+    Defines the structure for an instrument from the local instrument master.
+    """
+    instrument_token: int
+    exchange_token: int
+    tradingsymbol: str
+    name: str
+    exchange: str
+    segment: str
+    instrument_type: str
+    expiry: Optional[str] = None
+    strike: float
+    tick_size: float
+    lot_size: int
+
+class TickLTP(BaseModel):
+    """
+    Defines the last traded price of an instrument as seen by the tick engine.
+    """
+    last_price: float = Field(..., description="The last traded price.")
+    timestamp: float = Field(..., description="Exchange time of the last tick, in Unix seconds.")
+
+class LTPOutput(BaseModel):
+    """
+    Defines the structure for last traded prices served from the tick engine.
+    """
+    data: Dict[int, TickLTP] = Field(..., description="Last traded prices keyed by instrument token.")
+
+class BarsOutput(BaseModel):
+    """
+    Defines the structure for OHLCV bars built from live ticks.
+    """
+    instrument_token: int
+    interval: Literal['1s', '1m']
+    bars: List[List[float]] = Field(..., description="Bars, oldest first, as [start, open, high, low, close, volume].")
+
+class HistoricalOutput(BaseModel):
+    """
+    Defines the structure for historical candles served from the local candle store.
+    """
+    instrument_token: int
+    interval: str
+    candles: List[List[float]] = Field(..., description="Candles, oldest first, as [timestamp, open, high, low, close, volume].")
+
+class UpdateCredentialsInput(BaseModel):
+    """
+    Defines the structure for switching the server to a new Kite session.
+    """
+    access_token: Optional[str] = Field(None, description="The new access token. If omitted, KITE_ACCESS_TOKEN is re-read from the .env file.")
+
+class UpdateCredentialsOutput(BaseModel):
+    """
+    Defines the structure for the result of a credential switch.
+    """
+    switched: bool = Field(..., description="False if the token was unchanged.")
+
+class ProfileInput(BaseModel):
+    """
+    Defines the structure for starting a profiling session on the running server.
+    """
+    mode: Literal['sampling', 'deterministic'] = Field('sampling', description="'sampling' records stacks periodically at little cost; 'deterministic' runs cProfile and sees every call.")
+    duration: Optional[float] = Field(None, gt=0, le=3600, description="Seconds to profile for. With `requests` or `endpoint`, the time limit instead (default 300).")
+    requests: Optional[int] = Field(None, gt=0, le=100000, description="Profile only while the next N matching requests are served.")
+    endpoint: Optional[str] = Field(None, description="Only profile requests to this route, e.g. '/api/get_positions'.")
+    interval_ms: float = Field(5.0, ge=1, le=1000, description="Milliseconds between stack samples.")
+
+class JournalEntry(BaseModel):
+    """
+    Defines one order request from the order journal, with its outcome.
+    """
+    ref: str = Field(..., description="Journal reference for the request.")
+    kind: Literal['place', 'cancel']
+    requested_at: float = Field(..., description="When the request was received, in Unix seconds.")
+    params: Dict[str, Any] = Field(..., description="The order or cancellation as requested.")
+    status: Literal['unknown', 'sent', 'failed'] = Field(..., description="'unknown' means the broker outcome is not known, e.g. after a timeout or crash.")
+    order_id: Optional[str] = None
+    latency_ms: Optional[float] = Field(None, description="Time from request to broker outcome.")
+    error: Optional[str] = None
+    broker_status: Optional[str] = Field(None, description="Latest status from order updates, e.g. 'COMPLETE'.")
+    filled_quantity: Optional[int] = None
+    average_price: Optional[float] = None
+
+class JournalOutput(BaseModel):
+    """
+    Defines the structure for a day's orders read from the order journal.
+    """
+    date: str
+    orders: List[JournalEntry]
@@ -0,0 +1,153 @@
+# src/streaming.py
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# The two position lists Kite returns, diffed independently.
+SEGMENTS = ("net", "day")
+
+
+def position_key(position: dict) -> tuple:
+    """Identifies a position row across snapshots."""
+    return (position["instrument_token"], position["product"])
+
+
+class Subscription:
+    """
+    One connected streaming client.
+    Holds a bounded queue of pre-encoded events and whether it needs a fresh snapshot.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.needs_snapshot = True
+
+    def request_resync(self):
+        """Drops anything queued and makes the next event a full snapshot."""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.needs_snapshot = True
+
+
+class PositionStream:
+    """
+    Pushes positions to streaming clients as an initial snapshot followed by incremental diffs.
+
+    A single background poller fetches positions (through the shared positions cache) while at
+    least one client is connected. Each change bumps a sequence number and is encoded once for
+    every subscriber. A client whose queue overflows is resynced with a new snapshot rather than
+    being sent a diff it cannot apply.
+    """
+
+    def __init__(self, fetch, interval=None, queue_size=None):
+        self._fetch = fetch
+        self.interval = interval or float(os.getenv("KITE_STREAM_INTERVAL", "1.0"))
+        self.queue_size = queue_size or int(os.getenv("KITE_STREAM_QUEUE_SIZE", "64"))
+
+        self.seq = 0
+        self._rows = None  # {"net": {key: row}, "day": {key: row}}
+        self._snapshot_event = None
+        self._subscribers = set()
+        self._poller = None
+
+    def subscribe(self) -> Subscription:
+        """Registers a client. Its first event is a snapshot, sent as soon as one is available."""
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        if self._rows is not None:
+            self._deliver(subscription, None)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return subscription
+
+    def resync(self, subscription: Subscription):
+        """Sends a fresh snapshot to a client that detected a gap."""
+        subscription.request_resync()
+        if self._rows is not None:
+            self._deliver(subscription, None)
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    async def close(self):
+        """Stops the poller."""
+        if self._poller and not self._poller.done():
+            self._poller.cancel()
+
+    async def _poll(self):
+        while self._subscribers:
+            try:
+                positions = await self._fetch()
+                self._publish(positions)
+            except Exception as e:
+                logger.warning("Position stream poll failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, positions: dict):
+        rows = {
+            segment: {position_key(row): row for row in positions.get(segment, [])}
+            for segment in SEGMENTS
+        }
+
+        diff_event = None
+        if self._rows is None:
+            self.seq += 1
+        else:
+            changed = {segment: [] for segment in SEGMENTS}
+            removed = {segment: [] for segment in SEGMENTS}
+            for segment in SEGMENTS:
+                previous, current = self._rows[segment], rows[segment]
+                for key, row in current.items():
+                    if previous.get(key) != row:
+                        changed[segment].append(row)
+                for key in previous.keys() - current.keys():
+                    removed[segment].append(list(key))
+
+            if not any(changed[s] or removed[s] for s in SEGMENTS):
+                return
+            self.seq += 1
+            diff_event = ("diff", self.seq, json.dumps(
+                {"seq": self.seq, "changed": changed, "removed": removed}
+            ))
+
+        self._rows = rows
+        self._snapshot_event = None
+        for subscription in list(self._subscribers):
+            self._deliver(subscription, diff_event)
+
+    def _snapshot(self):
+        """Encodes the current state once per sequence number and reuses it."""
+        if self._snapshot_event is None:
+            payload = {"seq": self.seq}
+            payload.update({segment: list(self._rows[segment].values()) for segment in SEGMENTS})
+            self._snapshot_event = ("snapshot", self.seq, json.dumps(payload))
+        return self._snapshot_event
+
+    def _deliver(self, subscription: Subscription, diff_event):
+        event = diff_event
+        if subscription.needs_snapshot or event is None:
+            event = self._snapshot()
+
+        try:
+            subscription.queue.put_nowait(event)
+            if event[0] == "snapshot":
+                subscription.needs_snapshot = False
+        except asyncio.QueueFull:
+            # A slow client missed events; drop its backlog and resync it with the next snapshot.
+            subscription.request_resync()
+            subscription.queue.put_nowait(self._snapshot())
+            subscription.needs_snapshot = False
+
+    async def events(self, subscription: Subscription, keepalive: float = 15.0):
+        """
+        Yields `(event_type, seq, data)` tuples for one subscriber.
+        Yields `None` after `keepalive` seconds without events, so transports can ping.
+        """
+        while True:
+            try:
+                yield await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
@@ -0,0 +1,257 @@
+# src/ticks.py
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bar intervals maintained for every subscribed instrument, in seconds.
+BAR_INTERVALS = {"1s": 1, "1m": 60}
+
+
+class TickRingBuffer:
+    """
+    A preallocated ring of the most recent ticks for one instrument.
+    Ticks are written straight into NumPy columns, so no per-tick Python objects are kept.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.volumes = np.zeros(capacity, dtype=np.int64)
+        self.count = 0  # Total ticks ever written; the write slot is count % capacity.
+
+    def append(self, timestamp: float, price: float, volume: int):
+        i = self.count % self.capacity
+        self.timestamps[i] = timestamp
+        self.prices[i] = price
+        self.volumes[i] = volume
+        self.count += 1
+
+    def latest(self, n: int) -> np.ndarray:
+        """Returns up to `n` most recent ticks, oldest first, as rows of (timestamp, price, volume)."""
+        n = min(n, self.count, self.capacity)
+        idx = np.arange(self.count - n, self.count) % self.capacity
+        return np.column_stack((self.timestamps[idx], self.prices[idx], self.volumes[idx]))
+
+
+class BarSeries:
+    """
+    OHLCV bars for one instrument and interval, updated incrementally on every tick.
+    Completed and in-progress bars live in a preallocated ring of NumPy columns.
+    """
+
+    def __init__(self, interval: int, capacity: int):
+        self.interval = interval
+        self.capacity = capacity
+        self.starts = np.zeros(capacity, dtype=np.float64)
+        self.opens = np.zeros(capacity, dtype=np.float64)
+        self.highs = np.zeros(capacity, dtype=np.float64)
+        self.lows = np.zeros(capacity, dtype=np.float64)
+        self.closes = np.zeros(capacity, dtype=np.float64)
+        self.volumes = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+
+        # The in-progress bar, mirrored as plain floats so updates avoid NumPy scalar reads.
+        self._start = None
+        self._high = 0.0
+        self._low = 0.0
+        self._volume = 0
+
+    def update(self, timestamp: float, price: float, volume: int):
+        start = timestamp - (timestamp % self.interval)
+
+        # Late ticks for an already-closed bar are folded into the current one.
+        if self._start is None or start > self._start:
+            i = self.count % self.capacity
+            self.count += 1
+            self._start, self._high, self._low, self._volume = start, price, price, volume
+            self.starts[i] = start
+            self.opens[i] = price
+            self.highs[i] = price
+            self.lows[i] = price
+            self.closes[i] = price
+            self.volumes[i] = volume
+            return
+
+        i = (self.count - 1) % self.capacity
+        if price > self._high:
+            self._high = price
+            self.highs[i] = price
+        if price < self._low:
+            self._low = price
+            self.lows[i] = price
+        self.closes[i] = price
+        if volume:
+            self._volume += volume
+            self.volumes[i] = self._volume
+
+    def latest(self, n: int) -> np.ndarray:
+        """Returns up to `n` most recent bars, oldest first, as rows of (start, open, high, low, close, volume)."""
+        n = min(n, self.count, self.capacity)
+        idx = np.arange(self.count - n, self.count) % self.capacity
+        return np.column_stack((
+            self.starts[idx], self.opens[idx], self.highs[idx],
+            self.lows[idx], self.closes[idx], self.volumes[idx],
+        ))
+
+
+class InstrumentTicks:
+    """The tick ring and every bar series for a single instrument."""
+
+    def __init__(self, tick_capacity: int, bar_capacity: int):
+        self.ticks = TickRingBuffer(tick_capacity)
+        self.bars = {name: BarSeries(seconds, bar_capacity) for name, seconds in BAR_INTERVALS.items()}
+        self.last_price = None
+        self.last_timestamp = None
+        self._last_cumulative_volume = None
+
+    def update(self, timestamp: float, price: float, cumulative_volume):
+        # Kite sends the day's cumulative traded volume; bars need the volume since the last tick.
+        volume = 0
+        if cumulative_volume is not None:
+            if self._last_cumulative_volume is not None and cumulative_volume >= self._last_cumulative_volume:
+                volume = cumulative_volume - self._last_cumulative_volume
+            self._last_cumulative_volume = cumulative_volume
+
+        self.last_price = price
+        self.last_timestamp = timestamp
+        self.ticks.append(timestamp, price, volume)
+        for series in self.bars.values():
+            series.update(timestamp, price, volume)
+
+
+class TickEngine:
+    """
+    Ingests live ticks from KiteTicker into per-instrument ring buffers and OHLCV bars.
+
+    KiteTicker delivers ticks on its own thread. Ingestion and reads share one lock, which is
+    only held for the in-memory update, so `/api/ltp` and `/api/bars` never touch the network.
+    Connections are opened and closed on the Twisted reactor thread that KiteTicker runs on.
+    """
+
+    def __init__(self, api_key, access_token, instruments=None, mode=None,
+                 tick_capacity=None, bar_capacity=None):
+        self.api_key = api_key
+        self.access_token = access_token
+        self.root = os.getenv("KITE_TICKER_ROOT")  # e.g. benchmarks/mock_ticker.py.
+        self.mode = mode or os.getenv("KITE_TICKER_MODE", "quote")
+
+        if instruments is None:
+            configured = os.getenv("KITE_TICKER_INSTRUMENTS", "")
+            instruments = [int(token) for token in configured.split(",") if token.strip()]
+        self.instruments = list(instruments)
+
+        tick_capacity = tick_capacity or int(os.getenv("KITE_TICK_BUFFER_SIZE", "4096"))
+        bar_capacity = bar_capacity or int(os.getenv("KITE_BAR_BUFFER_SIZE", "3600"))
+        self._store = {token: InstrumentTicks(tick_capacity, bar_capacity) for token in self.instruments}
+        self._lock = threading.Lock()
+        self._ticker = None
+        self._retiring = []  # tickers replaced by set_access_token, closed once the new one connects
+        self.ticks_received = 0
+
+        # Called on the ticker thread with each order update the broker pushes, if set.
+        self.on_order_update = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.instruments)
+
+    def start(self):
+        """
+        Connects to the ticker WebSocket on a background thread and subscribes to the instruments.
+        Also connects with no instruments when only order updates are wanted.
+        """
+        if not (self.enabled or self.on_order_update) or self._ticker is not None:
+            return
+
+        from kiteconnect import KiteTicker
+
+        self._ticker = KiteTicker(self.api_key, self.access_token, root=self.root)
+        self._ticker.on_ticks = lambda ws, ticks: self.ingest(ticks)
+        self._ticker.on_connect = self._on_connect
+        self._ticker.on_error = lambda ws, code, reason: logger.warning("Ticker error %s: %s", code, reason)
+        if self.on_order_update:
+            self._ticker.on_order_update = lambda ws, data: self.on_order_update(data)
+        self._in_reactor(self._ticker.connect, threaded=True)
+        logger.info("Tick engine connecting for %s instruments in '%s' mode.", len(self.instruments), self.mode)
+
+    def set_access_token(self, access_token):
+        """
+        Reconnects the ticker with a new access token, keeping every buffer and bar.
+        The old connection is only closed once the new one has connected, so no ticks are missed.
+        """
+        self.access_token = access_token
+        old, self._ticker = self._ticker, None
+        if old is not None:
+            self._retiring.append(old)
+            self.start()
+
+    def stop(self):
+        tickers, self._retiring = self._retiring, []
+        if self._ticker is not None:
+            tickers.append(self._ticker)
+            self._ticker = None
+        for ticker in tickers:
+            self._in_reactor(ticker.close)
+
+    @staticmethod
+    def _in_reactor(func, *args, **kwargs):
+        """
+        Runs a KiteTicker call on the reactor thread. Twisted is not thread-safe, so once the
+        reactor is running nothing may touch a connection from another thread. Before that,
+        the call runs here (connect then starts the reactor thread).
+        """
+        from twisted.internet import reactor
+
+        if reactor.running:
+            reactor.callFromThread(func, *args, **kwargs)
+        else:
+            func(*args, **kwargs)
+
+    def _on_connect(self, ws, response):
+        # Runs on the reactor thread.
+        if self.instruments:
+            ws.subscribe(self.instruments)
+            ws.set_mode(self.mode, self.instruments)
+        logger.info("Tick engine connected and subscribed.")
+        if ws is self._ticker and self._retiring:
+            retiring, self._retiring = self._retiring, []
+            for old in retiring:
+                old.close()
+            logger.info("Closed %s ticker connection(s) replaced by a new access token.", len(retiring))
+
+    def ingest(self, ticks):
+        """Applies a batch of parsed KiteTicker ticks to the in-memory store."""
+        now = time.time()
+        with self._lock:
+            for tick in ticks:
+                instrument = self._store.get(tick["instrument_token"])
+                if instrument is None:
+                    continue
+                exchange_time = tick.get("exchange_timestamp")
+                timestamp = exchange_time.timestamp() if exchange_time else now
+                instrument.update(timestamp, tick["last_price"], tick.get("volume_traded"))
+            self.ticks_received += len(ticks)
+
+    def ltp(self, tokens) -> dict:
+        """Returns the last traded price and its timestamp for each known instrument token."""
+        with self._lock:
+            return {
+                token: {"last_price": self._store[token].last_price, "timestamp": self._store[token].last_timestamp}
+                for token in tokens
+                if token in self._store and self._store[token].last_price is not None
+            }
+
+    def bars(self, token: int, interval: str, count: int) -> np.ndarray:
+        """Returns up to `count` recent bars for one instrument, oldest first."""
+        if token not in self._store:
+            raise KeyError(f"Instrument {token} is not subscribed.")
+        if interval not in BAR_INTERVALS:
+            raise ValueError(f"Unsupported interval '{interval}'. Use one of: {', '.join(BAR_INTERVALS)}.")
+        with self._lock:
+            return self._store[token].bars[interval].latest(count)
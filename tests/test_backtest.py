@@ -0,0 +1,116 @@
+# tests/test_backtest.py
+"""
+The backtester's fill prices, CNC and MIS rules and P&L, on small price series computed by hand.
+"""
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+from src.backtest import Intent, moving_average_crossover, run_backtest
+from src.history import CANDLE_DTYPE, parse_ist
+from src.schemas import PlaceOrderInput
+
+DAY = parse_ist("2026-10-12")
+KEY = "NSE:INFY"
+
+# Hourly (open, high, low, close) bars: four on the first day, two on the next.
+TIMESTAMPS = [DAY, DAY + 3600, DAY + 2 * 3600, DAY + 3 * 3600, DAY + 86400, DAY + 86400 + 3600]
+PRICES = [
+    (100, 101, 99, 100),
+    (102, 103, 101, 102),
+    (101, 101, 97, 98),
+    (99, 100, 98, 99),
+    (105, 106, 104, 105),
+    (106, 108, 105, 107),
+]
+
+
+def bars() -> dict:
+    records = np.zeros(len(PRICES), dtype=CANDLE_DTYPE)
+    for i, (timestamp, prices) in enumerate(zip(TIMESTAMPS, PRICES)):
+        records[i] = (timestamp, *prices, 1000)
+    return {KEY: records}
+
+
+def intent(bar: int, transaction_type: str, quantity: int, product: str, price=None) -> Intent:
+    order = PlaceOrderInput(
+        tradingsymbol="INFY", exchange="NSE", transaction_type=transaction_type, quantity=quantity, product=product,
+        order_type="LIMIT" if price else "MARKET", price=price,
+    )
+    return Intent(TIMESTAMPS[bar], order)
+
+
+def fills(result) -> list:
+    return [(int(f["bar"]), int(f["quantity"]), float(f["price"]), bool(f["squareoff"])) for f in result.fills[KEY]]
+
+
+def test_fill_prices_and_rejections():
+    result = run_backtest(bars(), [
+        intent(0, "BUY", 10, "CNC"),              # next bar's open: 102
+        intent(0, "BUY", 5, "CNC", price=98),     # bar 2 trades down to 97: filled at the limit
+        intent(0, "SELL", 5, "CNC", price=110),   # never reached that day
+        intent(2, "SELL", 20, "CNC"),             # more than the 15 held
+        intent(5, "BUY", 1, "CNC"),               # sent on the last bar
+    ])
+
+    assert fills(result) == [(1, 10, 102.0, False), (2, 5, 98.0, False)]
+    # Unfilled orders are reported in the order they were sent, then CNC oversells.
+    assert [reason for _, reason in result.rejected] == [
+        "Limit price was not reached before the end of the day.",
+        "No bar after the order was sent.",
+        "CNC sell exceeds the delivery quantity held.",
+    ]
+
+
+def test_limit_order_fills_at_a_better_open():
+    # The buy limit of 103 is already above bar 1's open of 102, so it fills at the open.
+    result = run_backtest(bars(), [intent(0, "BUY", 1, "CNC", price=103)])
+    assert fills(result) == [(1, 1, 102.0, False)]
+
+
+def test_mis_position_is_squared_off_at_the_days_close():
+    result = run_backtest(bars(), [intent(0, "BUY", 10, "MIS")])
+
+    # Bought at 102 on bar 1, squared off at the first day's last close of 99.
+    assert fills(result) == [(1, 10, 102.0, False), (3, -10, 99.0, True)]
+    assert result.equity[KEY].tolist() == [0.0, 0.0, -40.0, -30.0, -30.0, -30.0]
+    (position,) = result.positions.net
+    assert (position.product, position.quantity, position.pnl, position.realised) == ("MIS", 0, -30.0, -30.0)
+    assert result.positions.day == []
+    assert result.summary() == {"pnl": -30.0, "fills": 2, "rejected": 0, "worst_symbol_drawdown": 40.0}
+
+
+def test_cnc_position_is_carried_overnight():
+    result = run_backtest(bars(), [intent(0, "BUY", 10, "CNC")], instrument_tokens={KEY: 408065})
+
+    (position,) = result.positions.net
+    assert position.instrument_token == 408065
+    assert (position.quantity, position.overnight_quantity, position.average_price) == (10, 10, 102.0)
+    # Marked at the last close of 107; the previous day closed at 99.
+    assert (position.last_price, position.close_price) == (107.0, 99.0)
+    assert position.pnl == position.unrealised == 10 * (107 - 102)
+    assert position.m2m == 10 * (107 - 99)
+    # Nothing was traded on the last day.
+    assert result.positions.day == []
+
+
+@pytest.mark.parametrize("fast, slow", [(30, 10), (10, 10), (0, 10)])
+def test_moving_average_crossover_needs_fast_below_slow(fast, slow):
+    with pytest.raises(ValueError, match="0 < fast < slow"):
+        moving_average_crossover(bars(), fast=fast, slow=slow)
+
+
+def test_moving_average_crossover_trades_each_cross():
+    # With windows of 1 and 2 bars, the fast average is the close and the slow one is the mean of
+    # the last two closes: above on bar 1 (102 > 101), below on bar 2 (98 < 100), and above
+    # from bar 3 on (99 > 98.5).
+    intents = moving_average_crossover(bars(), fast=1, slow=2)
+    assert [(i.timestamp, i.order.transaction_type) for i in intents] == [
+        (TIMESTAMPS[2], "SELL"), (TIMESTAMPS[3], "BUY"),
+    ]
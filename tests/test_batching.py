@@ -0,0 +1,61 @@
+# tests/test_batching.py
+"""
+The quote batcher: flushed batches stay referenced until they finish, and callers are failed
+rather than left waiting when a chunk errors or the batch is cancelled.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from src.batching import QuoteBatcher
+
+
+def test_failed_chunk_fails_only_its_callers():
+    async def fetch(keys):
+        if "BAD" in keys:
+            raise ConnectionError("quote call failed")
+        return {key: {"last_price": 1.0} for key in keys}
+
+    async def run():
+        batcher = QuoteBatcher(fetch, window=0.01, ttl=1, max_batch=1)
+        good = asyncio.create_task(batcher.get(["GOOD"]))
+        bad = asyncio.create_task(batcher.get(["BAD"]))
+        assert await good == {"GOOD": {"last_price": 1.0}}
+        with pytest.raises(ConnectionError):
+            await bad
+        assert not batcher._sending
+
+    asyncio.run(run())
+
+
+def test_cancelled_batch_fails_every_waiting_caller():
+    started = []
+
+    async def fetch(keys):
+        started.append(keys)
+        await asyncio.Event().wait()
+
+    async def run():
+        batcher = QuoteBatcher(fetch, window=0, ttl=1, max_batch=2)
+        # The second caller takes the batch past max_batch, so it is flushed as [A, B] then [C].
+        callers = [asyncio.create_task(batcher.get(keys)) for keys in (["A"], ["B", "C"])]
+        while not started:
+            await asyncio.sleep(0)
+        # The batch task is held by the batcher until it finishes.
+        (sending,) = batcher._sending
+        sending.cancel()
+        for caller in callers:
+            with pytest.raises(RuntimeError, match="cancelled"):
+                await asyncio.wait_for(caller, 1)
+        await asyncio.sleep(0)
+        assert not batcher._sending
+
+    asyncio.run(run())
+    # The second chunk was never fetched, but its caller was still woken.
+    assert started == [["A", "B"]]
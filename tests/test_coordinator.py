@@ -0,0 +1,107 @@
+# tests/test_coordinator.py
+"""
+Calls forwarded from API workers to the coordinator: results, errors, calls still in flight
+when a worker's connection closes, and a coordinator that dies during startup.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from src.coordinator import Coordinator, RemoteKiteHelper, start_coordinator
+
+SECRET = b"s" * 32
+
+
+class FakeHelper:
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = asyncio.Event()
+        self.release_order = asyncio.Event()
+        self.orders_placed = []
+
+    async def start(self):
+        pass
+
+    async def get_ltp(self, tokens):
+        return {token: 100.0 for token in tokens}
+
+    async def get_bars(self, token, interval, count):
+        raise KeyError(token)
+
+    async def get_historical(self, *args):
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+    async def place_order_async(self, order):
+        self.started.set()
+        await self.release_order.wait()
+        self.orders_placed.append(order)
+        return {"order_id": "1"}
+
+
+def test_calls_are_forwarded_and_cancelled_when_the_worker_disconnects():
+    async def run():
+        helper = FakeHelper()
+        server = await Coordinator(helper, SECRET).serve()
+        remote = RemoteKiteHelper(f"127.0.0.1:{server.sockets[0].getsockname()[1]}", SECRET)
+        await remote.start()
+
+        assert await remote.get_ltp([1, 2]) == {1: 100.0, 2: 100.0}
+        with pytest.raises(KeyError):
+            await remote.get_bars(1, "1s", 5)
+
+        pending = asyncio.create_task(remote.get_historical(1))
+        await asyncio.wait_for(helper.started.wait(), 5)
+        await remote.close()
+        # The coordinator cancels the call instead of leaving an unreferenced task running.
+        await asyncio.wait_for(helper.cancelled.wait(), 5)
+        pending.cancel()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_orders_in_flight_finish_when_the_worker_disconnects():
+    async def run():
+        helper = FakeHelper()
+        server = await Coordinator(helper, SECRET).serve()
+        remote = RemoteKiteHelper(f"127.0.0.1:{server.sockets[0].getsockname()[1]}", SECRET)
+        await remote.start()
+
+        pending = asyncio.create_task(remote.place_order_async({"tradingsymbol": "INFY"}))
+        await asyncio.wait_for(helper.started.wait(), 5)
+        await remote.close()
+        await asyncio.sleep(0.05)
+        # The order is not abandoned half-way; only its reply has nowhere to go.
+        helper.release_order.set()
+        for _ in range(100):
+            if helper.orders_placed:
+                break
+            await asyncio.sleep(0.01)
+        assert helper.orders_placed == [{"tradingsymbol": "INFY"}]
+        assert not helper.cancelled.is_set()
+        pending.cancel()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_coordinator_that_dies_during_startup_raises_instead_of_hanging(monkeypatch, tmp_path):
+    # Without credentials KiteHelper raises in the coordinator process before it listens.
+    monkeypatch.delenv("KITE_API_KEY", raising=False)
+    monkeypatch.delenv("KITE_ACCESS_TOKEN", raising=False)
+    monkeypatch.setenv("KITE_DATA_DIR", str(tmp_path))
+    with pytest.raises(RuntimeError, match="exited during startup"):
+        start_coordinator()
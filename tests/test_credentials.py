@@ -0,0 +1,50 @@
+# tests/test_credentials.py
+"""
+Switching KiteHelper to a new access token read from .env: the REST client and the ticker both
+move to the new session, and an unchanged token switches nothing.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from src.kite_client import AsyncKiteClient
+from src.kite_utils import KiteHelper
+
+
+def test_reload_switches_the_rest_client_and_the_ticker(monkeypatch, tmp_path):
+    monkeypatch.setenv("KITE_API_KEY", "key")
+    monkeypatch.setenv("KITE_ACCESS_TOKEN", "old-token")
+    monkeypatch.setenv("KITE_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("KITE_ENV_WATCH_INTERVAL", "0")
+    authorizations = []
+
+    def handler(request):
+        authorizations.append(request.headers["authorization"])
+        return httpx.Response(200, json={"status": "success", "data": []})
+
+    helper = KiteHelper()
+    helper.env_path = tmp_path / ".env"
+    helper.client = AsyncKiteClient("key", "old-token", root="http://broker.test", transport=httpx.MockTransport(handler))
+    # Stands in for a connected ticker; reconnecting is covered against the mock ticker in test_ticks.
+    old_ticker = object()
+    helper.ticks._ticker = old_ticker
+    reconnects = []
+    monkeypatch.setattr(helper.ticks, "start", lambda: reconnects.append(helper.ticks.access_token))
+
+    helper.env_path.write_text('KITE_ACCESS_TOKEN="old-token"\n')
+    assert helper.reload_credentials() is False
+    assert reconnects == []
+
+    helper.env_path.write_text('KITE_API_KEY="key"\nKITE_ACCESS_TOKEN="new-token"\n')
+    assert helper.reload_credentials() is True
+    assert helper.access_token == "new-token"
+    assert reconnects == ["new-token"] and helper.ticks._retiring == [old_ticker]
+
+    asyncio.run(helper.client.orders())
+    assert authorizations == ["token key:new-token"]
@@ -0,0 +1,79 @@
+# tests/test_encoding.py
+"""
+Pre-encoded positions: Accept-Encoding q-values decide gzip, and the gzipped body has its own
+ETag, so a client's cached plain body is never revalidated against the gzipped one.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import orjson
+import pytest
+
+from src.encoding import accepts_gzip
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, GZIP;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.000, identity", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("gzip;q=0, *", False),
+    ("*;q=0, gzip;q=0.1", True),
+    ("gzip;q=high", False),
+    ("identity", False),
+    ("", False),
+    (None, False),
+])
+def test_accepts_gzip_reads_q_values(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+def test_plain_and_gzipped_positions_have_different_etags(monkeypatch, tmp_path):
+    monkeypatch.setenv("KITE_API_KEY", "key")
+    monkeypatch.setenv("KITE_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("KITE_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("KITE_ENV_WATCH_INTERVAL", "0")
+    monkeypatch.setenv("KITE_GZIP_MIN_BYTES", "0")
+    import src.main
+    from benchmarks.mock_kite import MockBroker, create_app
+    from src.kite_client import AsyncKiteClient
+    from src.kite_utils import KiteHelper
+
+    helper = KiteHelper()
+    broker = create_app(MockBroker(latency_ms=0, jitter_ms=0, rate_limits=False))
+    helper.client = AsyncKiteClient("key", "token", root="http://mock", transport=httpx.ASGITransport(app=broker))
+    monkeypatch.setattr(src.main, "kite_helper", helper)
+
+    async def run():
+        transport = httpx.ASGITransport(app=src.main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def get(accept_encoding, etag=None):
+                headers = {"Accept-Encoding": accept_encoding}
+                if etag:
+                    headers["If-None-Match"] = etag
+                return await client.get("/api/get_positions", headers=headers)
+
+            plain, refused, zipped = await get("identity"), await get("gzip;q=0"), await get("gzip")
+            revalidated = await get("gzip", zipped.headers["etag"])
+            crossed = await get("gzip", plain.headers["etag"])
+            return plain, refused, zipped, revalidated, crossed
+
+    plain, refused, zipped, revalidated, crossed = asyncio.run(run())
+    assert "content-encoding" not in plain.headers and "content-encoding" not in refused.headers
+    assert refused.headers["etag"] == plain.headers["etag"]
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gz"'
+    # httpx decodes gzip itself; the decoded body is the plain one.
+    assert orjson.loads(zipped.content) == orjson.loads(plain.content)
+    assert revalidated.status_code == 304
+    # The plain body's ETag does not validate the gzipped representation.
+    assert crossed.status_code == 200 and crossed.headers["content-encoding"] == "gzip"
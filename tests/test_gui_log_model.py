@@ -0,0 +1,72 @@
+# tests/test_gui_log_model.py
+"""
+The GUI's bounded log model, run headless. Skipped when PyQt5 (an optional extra) is missing.
+"""
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt5.QtWidgets")
+
+from PyQt5.QtWidgets import QApplication
+
+from src.gui_window import LogModel
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def lines(*numbers, level=logging.INFO):
+    return [(level, f"line {n}") for n in numbers]
+
+
+def texts(model):
+    return [model.data(model.index(row)) for row in range(model.rowCount())]
+
+
+def test_rows_past_capacity_are_evicted_oldest_first(app):
+    model = LogModel(3)
+    removed, inserted = [], []
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    model.append_batch(lines(1, 2))
+    assert model.rowCount() == 2
+    model.append_batch(lines(3, 4, 5))
+    assert model.rowCount() == 3
+    assert texts(model) == ["line 3", "line 4", "line 5"]
+    # One removal and one insert per batch, matching what the view is told.
+    assert removed == [(0, 1)]
+    assert inserted == [(0, 1), (0, 2)]
+
+    # A batch larger than the capacity keeps only its newest lines.
+    model.append_batch(lines(*range(6, 12)))
+    assert model.rowCount() == 3
+    assert texts(model) == ["line 9", "line 10", "line 11"]
+
+
+def test_filter_applies_to_kept_and_new_lines(app):
+    model = LogModel(4)
+    model.append_batch(lines(1, 2) + lines(3, level=logging.ERROR) + lines(4))
+    model.set_filter("", logging.ERROR)
+    assert texts(model) == ["line 3"]
+
+    model.append_batch(lines(5) + lines(6, level=logging.WARNING) + lines(7, level=logging.ERROR))
+    assert texts(model) == ["line 3", "line 7"]
+
+    # Clearing the filter shows only what the ring buffer still holds.
+    model.set_filter("", logging.NOTSET)
+    assert texts(model) == ["line 4", "line 5", "line 6", "line 7"]
+
+    model.clear()
+    assert model.rowCount() == 0
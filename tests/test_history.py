@@ -0,0 +1,76 @@
+# tests/test_history.py
+"""
+The on-disk candle store: only missing ranges are fetched, stored files are rewritten while
+mapped, and a series with a fetch in flight is never evicted.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from src.history import CandleStore, format_ist, parse_ist
+
+DAY = parse_ist("2026-10-12")
+
+
+def candles_between(start: int, end: int) -> list:
+    """One-hour candles in REST form for every IST hour starting in [start, end]."""
+    first = start + (DAY - start) % 3600
+    return [[format_ist(t).replace(" ", "T") + "+0530", 100, 101, 99, 100.5, 10] for t in range(first, end + 1, 3600)]
+
+
+def test_only_missing_ranges_are_fetched_and_files_are_rewritten(tmp_path):
+    fetched = []
+
+    async def fetch(token, interval, start, end):
+        fetched.append((start, end))
+        return candles_between(start, end)
+
+    async def run():
+        store = CandleStore(fetch, data_dir=tmp_path)
+        first = await store.get(1, "60minute", DAY, DAY + 6 * 3600 - 1)
+        assert isinstance(store._series[(1, "60minute")].candles, np.memmap)
+        again = await store.get(1, "60minute", DAY + 3600, DAY + 4 * 3600)
+        # Extending the range rewrites the file the series currently maps.
+        wider = await store.get(1, "60minute", DAY, DAY + 12 * 3600 - 1)
+        return first, again, wider
+
+    first, again, wider = asyncio.run(run())
+    assert len(first) == 6 and len(again) == 4 and len(wider) == 12
+    assert fetched == [(DAY, DAY + 6 * 3600 - 1), (DAY + 6 * 3600, DAY + 12 * 3600 - 1)]
+    assert np.all(np.diff(wider["timestamp"]) == 3600)
+
+
+def test_series_with_a_fetch_in_flight_is_not_evicted(tmp_path):
+    release = None
+    calls = []
+
+    async def fetch(token, interval, start, end):
+        calls.append(token)
+        if token == 1:
+            await release.wait()
+        return candles_between(start, end)
+
+    async def run():
+        nonlocal release
+        release = asyncio.Event()
+        store = CandleStore(fetch, data_dir=tmp_path, max_open=1)
+        slow = asyncio.create_task(store.get(1, "60minute", DAY, DAY + 3599))
+        await asyncio.sleep(0)
+        # Opening another series goes over max_open while series 1 is fetching.
+        await store.get(2, "60minute", DAY, DAY + 3599)
+        assert (1, "60minute") in store._series
+        # A second request for series 1 waits on the same lock instead of fetching again.
+        duplicate = asyncio.create_task(store.get(1, "60minute", DAY, DAY + 3599))
+        await asyncio.sleep(0)
+        release.set()
+        return await slow, await duplicate
+
+    first, second = asyncio.run(run())
+    assert calls == [1, 2]
+    assert len(first) == len(second) == 1
@@ -0,0 +1,150 @@
+# tests/test_idempotency.py
+"""
+The idempotency cache: expiry behind a long in-flight call, and settling timed-out orders
+through the order book.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from src.idempotency import IdempotencyCache
+
+
+def test_finished_entries_expire_behind_an_in_flight_call():
+    calls = []
+
+    async def place(name, wait=None):
+        calls.append(name)
+        if wait is not None:
+            await wait.wait()
+        return {"order_id": name}
+
+    async def run():
+        cache = IdempotencyCache(ttl=0.05)
+        slow = asyncio.Event()
+        pending = asyncio.create_task(cache.run("slow", 1, place, "slow", slow))
+        await asyncio.sleep(0)
+        await cache.run("fast", 1, place, "fast")
+        await asyncio.sleep(0.1)
+
+        # "fast" has expired even though "slow", inserted before it, is still in flight.
+        assert await cache.run("fast", 1, place, "fast") == {"order_id": "fast"}
+        # A retry of "slow" still waits on the first call.
+        retry = asyncio.create_task(cache.run("slow", 1, place, "slow", slow))
+        await asyncio.sleep(0)
+        slow.set()
+        assert await retry == await pending == {"order_id": "slow"}
+        return cache
+
+    cache = asyncio.run(run())
+    assert calls == ["slow", "fast", "fast"]
+    assert cache.stats()["attached"] == 1
+
+
+def test_timed_out_order_is_resolved_from_the_order_book_before_a_retry():
+    calls = []
+    order_book = {}
+
+    async def place(key):
+        calls.append(key)
+        if len(calls) == 1:
+            order_book[key] = {"order_id": "1"}  # Reached the broker, but the reply was lost.
+            raise asyncio.TimeoutError()
+        return {"order_id": str(len(calls))}
+
+    async def resolve(key):
+        return order_book.get(key)
+
+    async def run():
+        cache = IdempotencyCache(ttl=60, resolve=resolve)
+        with pytest.raises(asyncio.TimeoutError):
+            await cache.run("placed", 1, place, "placed")
+        assert cache.stats()["unknown"] == 1
+        # Any later retry finds the order instead of placing it again.
+        assert await cache.run("placed", 1, place, "placed") == {"order_id": "1"}
+        assert await cache.run("placed", 1, place, "placed") == {"order_id": "1"}
+        return cache
+
+    cache = asyncio.run(run())
+    assert calls == ["placed"]
+    assert cache.stats()["resolved"] == 1 and cache.stats()["unknown"] == 0
+
+
+def test_timed_out_order_missing_from_the_order_book_is_sent_again():
+    calls = []
+
+    async def place():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()
+        return {"order_id": str(len(calls))}
+
+    async def missing(key):
+        return None
+
+    async def unreachable(key):
+        raise ConnectionError("order book unavailable")
+
+    async def run():
+        cache = IdempotencyCache(ttl=60, resolve=unreachable)
+        with pytest.raises(asyncio.TimeoutError):
+            await cache.run("key", 1, place)
+        # While the order book cannot be checked, the outcome stays unknown.
+        with pytest.raises(asyncio.TimeoutError):
+            await cache.run("key", 1, place)
+        assert cache.stats()["unknown"] == 1
+
+        cache.resolve = missing
+        return await cache.run("key", 1, place)
+
+    assert asyncio.run(run()) == {"order_id": "2"}
+    assert calls == [0, 1]
+
+
+def test_timed_out_order_without_a_resolver_replays_the_timeout():
+    calls = []
+
+    async def place():
+        calls.append(1)
+        raise asyncio.TimeoutError()
+
+    async def run():
+        cache = IdempotencyCache(ttl=60)
+        for _ in range(3):
+            with pytest.raises(asyncio.TimeoutError):
+                await cache.run("key", 1, place)
+
+    asyncio.run(run())
+    assert calls == [1]
+
+
+def test_keyed_orders_are_tagged_and_found_in_the_order_book(monkeypatch, tmp_path):
+    monkeypatch.setenv("KITE_API_KEY", "key")
+    monkeypatch.setenv("KITE_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("KITE_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("KITE_ENV_WATCH_INTERVAL", "0")
+    import httpx
+
+    from benchmarks.mock_kite import MockBroker, create_app
+    from src.kite_client import AsyncKiteClient
+    from src.kite_utils import KiteHelper
+    from src.schemas import PlaceOrderInput
+
+    order = PlaceOrderInput(tradingsymbol="INFY", exchange="NSE", transaction_type="BUY", order_type="MARKET",
+                            quantity=1, product="MIS", idempotency_key="tagged")
+
+    async def run():
+        helper = KiteHelper()
+        app = create_app(MockBroker(latency_ms=0, jitter_ms=0, rate_limits=False))
+        helper.client = AsyncKiteClient("key", "token", root="http://mock", transport=httpx.ASGITransport(app=app))
+        placed = await helper.place_order_async(order)
+        return placed, await helper._find_keyed_order("tagged"), await helper._find_keyed_order("other")
+
+    placed, found, missing = asyncio.run(run())
+    assert found == placed and missing is None
@@ -0,0 +1,82 @@
+# tests/test_instruments.py
+"""
+The instrument master's daily dump: replacing a loaded dump, removing old ones only after the
+new one is loaded, multi-byte names, and which day's dump a fetch gets.
+"""
+import datetime
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import pytest
+
+import src.instruments
+from src.instruments import IST, InstrumentMaster, UnknownInstrumentError, dump_date
+
+CSV = (
+    "instrument_token,exchange_token,tradingsymbol,name,last_price,expiry,strike,tick_size,lot_size,instrument_type,segment,exchange\n"
+    "408065,1594,INFY,INFOSYS,0,,0,0.05,1,EQ,NSE,NSE\n"
+    "2953217,11536,TCS,TATA CONSULTANCY SERV LT,0,,0,0.05,1,EQ,NSE,NSE\n"
+)
+DAY = datetime.date(2026, 10, 16)
+
+
+def test_new_dump_replaces_the_old_one_after_loading(tmp_path):
+    master = InstrumentMaster(data_dir=tmp_path)
+    yesterday = master.save(CSV, DAY - datetime.timedelta(days=1))
+    master.load(yesterday)
+
+    today = master.save(CSV + "738561,2885,RELIANCE,RELIANCE INDUSTRIES,0,,0,0.05,1,EQ,NSE,NSE\n", DAY)
+    # Still serving yesterday's dump until the new one is loaded.
+    assert yesterday.exists()
+    with pytest.raises(UnknownInstrumentError):
+        master.lookup("NSE", "RELIANCE")
+
+    master.load(today)
+    assert master.lookup("NSE", "RELIANCE")["instrument_token"] == 738561
+    assert not yesterday.exists()
+    assert master.latest_file() == today
+
+
+def test_saving_over_the_loaded_dump_releases_the_memory_map(tmp_path):
+    master = InstrumentMaster(data_dir=tmp_path)
+    path = master.save(CSV, DAY)
+    master.load(path)
+    assert isinstance(master.records, np.memmap)
+
+    assert master.save(CSV, DAY) == path
+    # Served from an in-memory copy until the rewritten file is loaded again.
+    assert not isinstance(master.records, np.memmap)
+    assert master.lookup("NSE", "tcs")["tradingsymbol"] == "TCS"
+
+    master.load(path)
+    assert isinstance(master.records, np.memmap)
+    assert master.token_for("NSE", "INFY") == 408065
+
+
+def test_long_names_are_cut_on_a_character_boundary(tmp_path):
+    master = InstrumentMaster(data_dir=tmp_path)
+    # 47 ASCII bytes, then a 3-byte character that would straddle the 48-byte field.
+    name = "A" * 47 + "\u20b9" + "B"
+    csv_text = CSV + f"738561,2885,RELIANCE,{name},0,,0,0.05,1,EQ,NSE,NSE\n"
+    master.load(master.save(csv_text, DAY))
+    assert master.lookup("NSE", "RELIANCE")["name"] == "A" * 47
+
+
+def test_a_fetch_before_the_publish_time_is_the_previous_days_dump(monkeypatch, tmp_path):
+    early = datetime.datetime(2026, 10, 16, 7, 0, tzinfo=IST)
+    late = datetime.datetime(2026, 10, 16, 9, 0, tzinfo=IST)
+    assert dump_date(early) == DAY - datetime.timedelta(days=1)
+    assert dump_date(late) == DAY
+
+    master = InstrumentMaster(data_dir=tmp_path)
+    master.load(master.save(CSV, dump_date(early)))
+    # The early fetch is current until the day's dump is published, then it is refreshed.
+    monkeypatch.setattr(src.instruments, "dump_date", lambda: dump_date(early))
+    assert master.is_current()
+    monkeypatch.setattr(src.instruments, "dump_date", lambda: dump_date(late))
+    assert not master.is_current()
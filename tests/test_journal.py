@@ -0,0 +1,85 @@
+# tests/test_journal.py
+"""
+The order journal: idempotent retries are journaled once, the writer survives failed writes,
+and its queue is bounded.
+"""
+import asyncio
+import datetime
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+
+from benchmarks.mock_kite import MockBroker, create_app
+from src.instruments import today_ist
+from src.journal import OrderJournal
+from src.kite_client import AsyncKiteClient
+from src.schemas import PlaceOrderInput
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_replayed_retries_are_not_journaled(monkeypatch, tmp_path):
+    monkeypatch.setenv("KITE_API_KEY", "key")
+    monkeypatch.setenv("KITE_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("KITE_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("KITE_ENV_WATCH_INTERVAL", "0")
+    from src.kite_utils import KiteHelper
+
+    order = PlaceOrderInput(tradingsymbol="INFY", exchange="NSE", transaction_type="BUY", order_type="MARKET",
+                            quantity=1, product="MIS", idempotency_key="retry-me")
+
+    async def run():
+        helper = KiteHelper()
+        app = create_app(MockBroker(latency_ms=0, jitter_ms=0, rate_limits=False))
+        helper.client = AsyncKiteClient("key", "token", root="http://mock", transport=httpx.ASGITransport(app=app))
+        helper.instruments.load(helper.instruments.save(await helper.client.instruments(), today_ist()))
+        first = await helper.place_order_async(order)
+        retry = await helper.place_order_async(order)
+        return helper, first, retry
+
+    helper, first, retry = asyncio.run(run())
+    assert retry == first
+    assert helper.idempotency.stats()["replays"] == 1
+    entries = helper.journal.orders()
+    assert [(entry["kind"], entry["status"], entry["order_id"]) for entry in entries] == [("place", "sent", first["order_id"])]
+
+
+def test_writer_retries_a_failed_write_and_reports_health(tmp_path):
+    journal = OrderJournal(data_dir=tmp_path, fsync_interval=0)
+    journal.start()
+    # A directory where today's file should be makes every open fail.
+    path = journal.path_for(journal._day)
+    path.mkdir()
+    ref = journal.record_request("place", {"tradingsymbol": "INFY"})
+    wait_for(lambda: journal.stats()["write_errors"])
+    assert journal.stats()["healthy"] is False
+    journal.record_response(ref, "1", 0.01)
+
+    path.rmdir()
+    wait_for(lambda: journal.stats()["healthy"] and journal.stats()["events_written"] == 2)
+    journal.close()
+    assert [json.loads(line)["type"] for line in path.read_text().splitlines()] == ["request", "response"]
+    assert journal.stats()["events_dropped"] == 0
+
+
+def test_events_beyond_the_queue_size_are_dropped_and_counted(tmp_path):
+    journal = OrderJournal(data_dir=tmp_path, queue_size=2)
+    journal._day = datetime.date.today()
+    for _ in range(3):
+        journal.record_request("place", {})
+    stats = journal.stats()
+    assert stats["queued"] == 2 and stats["events_dropped"] == 1
+    # The in-memory index still has every request.
+    assert stats["orders_today"] == 3
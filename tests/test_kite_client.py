@@ -0,0 +1,139 @@
+# tests/test_kite_client.py
+"""
+AsyncKiteClient against canned responses (httpx.MockTransport) and against the mock broker app
+(benchmarks/mock_kite.py) served in-process, so no network is involved.
+"""
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import pytest
+from kiteconnect import exceptions
+
+from benchmarks.mock_kite import MockBroker, create_app
+from src.history import IST, parse_ist, to_candle_records
+from src.instruments import InstrumentMaster
+from src.kite_client import AsyncKiteClient
+
+
+def client_for(handler) -> AsyncKiteClient:
+    return AsyncKiteClient("key", "token", root="http://broker.test", transport=httpx.MockTransport(handler))
+
+
+def mock_broker_client(**settings) -> AsyncKiteClient:
+    broker = MockBroker(**dict({"latency_ms": 0, "jitter_ms": 0, "rate_limits": False}, **settings))
+    return AsyncKiteClient("key", "token", root="http://broker.test", transport=httpx.ASGITransport(create_app(broker)))
+
+
+def error(status, error_type, message="failed"):
+    return httpx.Response(status, json={"status": "error", "message": message, "data": None, "error_type": error_type})
+
+
+@pytest.mark.parametrize("status, error_type, expected", [
+    (403, "TokenException", exceptions.TokenException),
+    (400, "InputException", exceptions.InputException),
+    (503, "NetworkException", exceptions.NetworkException),
+    (429, "NetworkException", exceptions.NetworkException),
+    (500, "SomethingNew", exceptions.GeneralException),
+])
+def test_error_envelopes_raise_kiteconnect_exceptions(status, error_type, expected):
+    client = client_for(lambda request: error(status, error_type, "Too many requests"))
+    with pytest.raises(expected) as raised:
+        asyncio.run(client.positions())
+    assert raised.value.code == status
+    assert str(raised.value) == "Too many requests"
+
+
+def test_non_json_error_is_a_network_exception():
+    client = client_for(lambda request: httpx.Response(502, text="<html>Bad gateway</html>"))
+    with pytest.raises(exceptions.NetworkException) as raised:
+        asyncio.run(client.orders())
+    assert raised.value.code == 502
+
+
+def test_timeouts_raise_asyncio_timeout_error():
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client_for(handler).positions())
+
+
+def test_place_order_sends_form_encoded_params_and_auth_header():
+    seen = {}
+
+    def handler(request):
+        seen["method"], seen["path"] = request.method, request.url.path
+        seen["content_type"] = request.headers["content-type"]
+        seen["authorization"] = request.headers["authorization"]
+        seen["version"] = request.headers["x-kite-version"]
+        seen["form"] = {key: values[0] for key, values in parse_qs(request.content.decode()).items()}
+        return httpx.Response(200, json={"status": "success", "data": {"order_id": "151220000000000"}})
+
+    order_id = asyncio.run(client_for(handler).place_order(
+        "regular", tradingsymbol="INFY", exchange="NSE", transaction_type="BUY",
+        order_type="LIMIT", quantity=5, product="CNC", price=1500.5,
+    ))
+
+    assert order_id == "151220000000000"
+    assert seen["method"] == "POST" and seen["path"] == "/orders/regular"
+    assert seen["content_type"] == "application/x-www-form-urlencoded"
+    assert seen["authorization"] == "token key:token"
+    assert seen["version"] == "3"
+    assert seen["form"] == {
+        "tradingsymbol": "INFY", "exchange": "NSE", "transaction_type": "BUY",
+        "order_type": "LIMIT", "quantity": "5", "product": "CNC", "price": "1500.5",
+    }
+
+
+def test_quotes_repeat_the_instrument_param():
+    seen = {}
+
+    def handler(request):
+        seen["i"] = request.url.params.get_list("i")
+        return httpx.Response(200, json={"status": "success", "data": {}})
+
+    asyncio.run(client_for(handler).ltp(["NSE:INFY", "NSE:TCS"]))
+    assert seen["i"] == ["NSE:INFY", "NSE:TCS"]
+
+
+def test_mock_broker_rate_limit_surfaces_as_429():
+    async def burst():
+        client = mock_broker_client(rate_limits=True)
+        await client.ltp(["NSE:INFY"])
+        await client.ltp(["NSE:INFY"])
+
+    with pytest.raises(exceptions.NetworkException) as raised:
+        asyncio.run(burst())
+    assert raised.value.code == 429
+
+
+def test_instruments_csv_loads_into_the_instrument_master(tmp_path):
+    csv_bytes = asyncio.run(mock_broker_client(symbols=20).instruments())
+    assert isinstance(csv_bytes, bytes)
+
+    master = InstrumentMaster(data_dir=tmp_path)
+    master.load(master.save(csv_bytes, datetime.datetime.now(IST).date()))
+
+    assert len(master.records) == 40  # 20 symbols on each of NSE and BSE
+    row = master.lookup("NSE", "infy")
+    assert row["tradingsymbol"] == "INFY" and row["exchange"] == "NSE"
+    assert master.lookup_token(row["instrument_token"])["tradingsymbol"] == "INFY"
+
+
+def test_historical_candles_parse_to_records():
+    candles = asyncio.run(mock_broker_client().historical(100001, "60minute", "2026-10-12 09:00:00", "2026-10-12 16:00:00"))
+    records = to_candle_records(candles)
+
+    # One trading day of 60-minute candles from 09:15 to 15:15.
+    assert len(records) == 7
+    assert records["timestamp"][0] == parse_ist("2026-10-12T09:15:00")
+    assert (records["high"] >= records["low"]).all()
+    assert records["volume"].tolist() == [1000] * 7
@@ -0,0 +1,87 @@
+# tests/test_portfolio.py
+"""
+Reconciling the in-memory positions with the broker while fills keep arriving.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.portfolio import PortfolioEngine, _new_row
+
+INFY, TCS = 408065, 2953217
+
+
+def position(token: int, quantity: int, price: float = 100.0) -> dict:
+    row = _new_row({"tradingsymbol": str(token), "exchange": "NSE", "instrument_token": token, "product": "MIS"})
+    row.update(quantity=quantity, average_price=price, last_price=price, value=-quantity * price)
+    return row
+
+
+def positions(*rows) -> dict:
+    return {"net": list(rows), "day": [dict(row) for row in rows]}
+
+
+def fill(order_id: str, token: int, quantity: int, price: float = 100.0) -> dict:
+    return {
+        "order_id": order_id, "instrument_token": token, "product": "MIS", "tradingsymbol": str(token),
+        "exchange": "NSE", "transaction_type": "BUY", "filled_quantity": quantity, "average_price": price,
+    }
+
+
+def net_quantities(engine: PortfolioEngine) -> dict:
+    return {row["instrument_token"]: row["quantity"] for row in engine.snapshot()["net"]}
+
+
+def test_fills_during_every_fetch_do_not_stop_other_positions_reconciling():
+    snapshots = [positions(position(INFY, 10), position(TCS, 5))]
+    engine = PortfolioEngine(None, reconcile_interval=60)
+
+    async def fetch():
+        snapshot = snapshots[-1]
+        # A fill on INFY lands while every call is in flight and is not in its snapshot.
+        engine.apply_order_update(fill(f"order-{len(snapshots)}", INFY, 1))
+        return snapshot
+
+    async def run():
+        engine._fetch = lambda: asyncio.sleep(0, snapshots[0])
+        await engine.reconcile()
+        engine._fetch = fetch
+        for tcs_quantity in (7, 9):
+            # The broker also knows of TCS fills the local book missed.
+            snapshots.append(positions(position(INFY, 10), position(TCS, tcs_quantity)))
+            await engine.reconcile()
+
+    asyncio.run(run())
+    assert engine.reconciliations == engine.reconciliations_partial == 2
+    assert engine.reconciliations_drifted == 2
+    assert engine.last_drift["mismatched"] == [{"instrument_token": TCS, "product": "MIS", "local": 7, "broker": 9}]
+    # TCS follows the broker; INFY keeps its local fills until a pass without one.
+    assert net_quantities(engine) == {INFY: 12, TCS: 9}
+
+    async def quiet():
+        engine._fetch = lambda: asyncio.sleep(0, positions(position(INFY, 12), position(TCS, 9)))
+        await engine.reconcile()
+
+    asyncio.run(quiet())
+    assert engine.reconciliations == 3 and engine.reconciliations_partial == 2
+    assert engine.last_drift["positions"] == 0
+
+
+def test_update_seen_before_the_seed_is_not_applied_again_after_it():
+    engine = PortfolioEngine(None, reconcile_interval=60)
+    # The first ticker update arrives before the book is seeded; the snapshot already has it.
+    engine.apply_order_update(fill("order-1", INFY, 5))
+    engine.seed(positions(position(INFY, 5)))
+
+    # The same update again (its postback, or a replay after a reconnect) changes nothing.
+    engine.apply_order_update(fill("order-1", INFY, 5))
+    assert net_quantities(engine) == {INFY: 5}
+    assert engine.fills_applied == 0
+
+    # A later partial fill of the same order applies only the new part.
+    engine.apply_order_update(fill("order-1", INFY, 8))
+    assert net_quantities(engine) == {INFY: 8}
@@ -0,0 +1,62 @@
+# tests/test_rate_limit.py
+"""
+Token-bucket pacing: no one-second window, closed at both ends, ever holds more than `rate` calls,
+whether calls take tokens directly or are granted by the broker scheduler.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+from src.rate_limit import TokenBucket
+from src.scheduler import BrokerScheduler
+
+RATE = 20
+
+
+def busiest_window(times: list) -> int:
+    """
+    The most calls in any closed one-second window. Starting windows at calls is enough, and a
+    microsecond of slack absorbs float rounding in the fake clock.
+    """
+    return max(sum(1 for t in times if start <= t <= start + 1.000001) for start in times)
+
+
+@pytest.mark.parametrize("capacity", [1, RATE])
+def test_bucket_allows_at_most_rate_calls_in_any_second(monkeypatch, capacity):
+    # A fake clock moved by the wait the bucket asks for, so calls land right on the boundaries.
+    clock = [0.0]
+    monkeypatch.setattr("src.rate_limit.time", SimpleNamespace(monotonic=lambda: clock[0]))
+    bucket = TokenBucket(rate=RATE, capacity=capacity)
+    times = []
+    for _ in range(3 * RATE):
+        while not bucket.try_acquire():
+            # The floor stops float rounding from leaving the clock short of the boundary forever.
+            clock[0] += max(bucket.time_until_available(), 1e-9)
+        times.append(clock[0])
+
+    assert busiest_window(times) == RATE
+    # Throughput still keeps up with the rate.
+    assert times[-1] < 3.1
+
+
+def test_scheduler_grants_at_most_rate_calls_in_any_second():
+    times = []
+
+    async def call():
+        times.append(time.monotonic())
+
+    async def run():
+        scheduler = BrokerScheduler(rate_limits={"orders": RATE}, max_in_flight=RATE)
+        await asyncio.gather(*[scheduler.run("orders", call) for _ in range(2 * RATE)])
+        await scheduler.close()
+
+    asyncio.run(run())
+    assert busiest_window(times) == RATE
@@ -0,0 +1,83 @@
+# tests/test_risk.py
+"""
+The pre-trade risk engine: unpriced MARKET orders under value limits, and what releasing a
+reservation gives back, including across a trading-day reset.
+"""
+import datetime
+import sys
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import pytest
+
+import src.risk
+from src.risk import RiskEngine, RiskRejectedError
+from src.schemas import PlaceOrderInput
+
+
+def order(order_type="LIMIT", quantity=10, price=100.0, transaction_type="BUY") -> PlaceOrderInput:
+    return PlaceOrderInput(
+        tradingsymbol="INFY", exchange="NSE", transaction_type=transaction_type, order_type=order_type,
+        quantity=quantity, product="MIS", price=price if order_type == "LIMIT" else None,
+    )
+
+
+def test_unpriced_market_order_is_rejected_while_a_value_limit_is_set():
+    risk = RiskEngine(allow_unpriced=False, max_gross_value=50000)
+    with pytest.raises(RiskRejectedError) as error:
+        risk.check(order("MARKET"))
+    assert error.value.rule == "unpriced"
+
+    # Priced from a reference price, or with the value limits off, it passes.
+    risk.check(order("MARKET"), reference_price=100.0)
+    RiskEngine(allow_unpriced=False, max_order_quantity=100).check(order("MARKET"))
+    assert risk.stats()["unpriced_orders"] == 1
+
+
+def test_unpriced_market_order_skips_value_limits_when_allowed():
+    risk = RiskEngine(allow_unpriced=True, max_order_value=500)
+    risk.check(order("MARKET"))
+    assert risk.stats()["unpriced_orders"] == 1
+    assert risk.stats()["gross_value"] == 0.0
+
+
+def test_release_gives_back_the_rate_slot_and_duplicate_fingerprint():
+    risk = RiskEngine(max_orders_per_minute=1, duplicate_window=60, max_gross_value=5000)
+    reservation = risk.check(order())
+    with pytest.raises(RiskRejectedError):
+        risk.check(order())
+
+    # The broker call failed, so the order may be sent again straight away.
+    risk.release(reservation)
+    assert risk.stats()["gross_value"] == 0.0
+    risk.check(order())
+    assert risk.stats()["gross_value"] == 1000.0
+
+
+def test_cancelled_order_keeps_its_rate_slot():
+    risk = RiskEngine(max_orders_per_minute=1, max_symbol_quantity=10)
+    risk.bind(risk.check(order()), "1")
+    risk.apply_order_update({"order_id": "1", "status": "CANCELLED", "filled_quantity": 4})
+    assert risk._exposure[("NSE", "INFY")] == 4
+    with pytest.raises(RiskRejectedError) as error:
+        risk.check(order(quantity=1))
+    assert error.value.rule == "max_orders_per_minute"
+
+
+def test_release_from_a_previous_trading_day_is_ignored(monkeypatch):
+    day = datetime.date(2026, 10, 16)
+    monkeypatch.setattr(src.risk, "today_ist", lambda: day)
+    risk = RiskEngine(max_symbol_quantity=100, max_gross_value=5000)
+    yesterday = risk.check(order())
+
+    day = datetime.date(2026, 10, 17)
+    today = risk.check(order(quantity=5))
+    risk.release(yesterday)
+    assert risk._exposure[("NSE", "INFY")] == 5
+    assert risk.stats()["gross_value"] == 500.0
+
+    risk.release(today)
+    assert risk._exposure[("NSE", "INFY")] == 0
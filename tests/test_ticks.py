@@ -0,0 +1,175 @@
+# tests/test_ticks.py
+"""
+The tick engine's bars and volumes for known tick sequences, fed both as parsed ticks and as Kite
+binary messages decoded by KiteTicker, and served through /api/ltp and /api/bars; and rotating
+the access token on a live ticker connection to benchmarks/mock_ticker.py.
+"""
+import asyncio
+import datetime
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the project root directory to the Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import httpx
+import pytest
+
+from benchmarks.bench_ticks import check_bars, decoder, free_port
+from benchmarks.mock_ticker import DEFAULT_TOKENS, generate_ticks, pack_message, pack_tick
+from src.ticks import TickEngine
+
+TOKEN = 408065
+T0 = 1759999980  # A whole minute, so 1m bars start on it.
+
+
+def tick(seconds, price, cumulative_volume):
+    return {
+        "instrument_token": TOKEN, "last_price": price, "volume_traded": cumulative_volume,
+        "exchange_timestamp": datetime.datetime.fromtimestamp(T0 + seconds),
+    }
+
+
+def engine(**kwargs) -> TickEngine:
+    return TickEngine("key", "token", instruments=[TOKEN], **kwargs)
+
+
+def test_bars_from_a_known_sequence():
+    ticks = engine()
+    ticks.ingest([
+        tick(0.0, 100.0, 5000),   # first tick: no earlier cumulative volume, so volume 0
+        tick(0.4, 101.5, 5010),
+        tick(0.9, 99.0, 5025),
+        tick(1.2, 99.5, 5030),
+        tick(61.0, 102.0, 5100),
+    ])
+
+    assert ticks.bars(TOKEN, "1s", 10).tolist() == [
+        [T0, 100.0, 101.5, 99.0, 99.0, 25],
+        [T0 + 1, 99.5, 99.5, 99.5, 99.5, 5],
+        [T0 + 61, 102.0, 102.0, 102.0, 102.0, 70],
+    ]
+    assert ticks.bars(TOKEN, "1m", 10).tolist() == [
+        [T0, 100.0, 101.5, 99.0, 99.5, 30],
+        [T0 + 60, 102.0, 102.0, 102.0, 102.0, 70],
+    ]
+    assert ticks.ltp([TOKEN]) == {TOKEN: {"last_price": 102.0, "timestamp": T0 + 61.0}}
+
+
+def test_cumulative_volume_reset_counts_no_volume():
+    ticks = engine()
+    ticks.ingest([tick(0, 100.0, 5000), tick(0.5, 100.0, 5040), tick(0.7, 100.0, 10), tick(0.8, 100.0, 25)])
+    # The drop to 10 (e.g. a new session) adds nothing; counting resumes from it.
+    assert ticks.bars(TOKEN, "1s", 1)[0][5] == 40 + 15
+
+
+def test_late_tick_is_folded_into_the_current_bar():
+    ticks = engine()
+    ticks.ingest([tick(0, 100.0, 0), tick(2, 101.0, 10), tick(1, 90.0, 15)])
+    assert ticks.bars(TOKEN, "1s", 10).tolist() == [
+        [T0, 100.0, 100.0, 100.0, 100.0, 0],
+        [T0 + 2, 101.0, 101.0, 90.0, 90.0, 15],
+    ]
+
+
+def test_bar_ring_keeps_the_most_recent_bars():
+    ticks = engine(bar_capacity=3)
+    ticks.ingest([tick(i, 100.0 + i, i * 10) for i in range(5)])
+    assert ticks.bars(TOKEN, "1s", 10)[:, 0].tolist() == [T0 + 2, T0 + 3, T0 + 4]
+
+
+def test_unsubscribed_tokens_are_ignored():
+    ticks = engine()
+    ticks.ingest([dict(tick(0, 100.0, 0), instrument_token=1)])
+    assert ticks.ltp([1, TOKEN]) == {}
+    with pytest.raises(KeyError):
+        ticks.bars(1, "1s", 1)
+
+
+def test_binary_replay_matches_bars_computed_from_the_sequence():
+    sequence = list(generate_ticks(DEFAULT_TOKENS, 20000, start=T0))
+    parse = decoder()
+    ticks = TickEngine("key", "token", instruments=DEFAULT_TOKENS, mode="full")
+    for i in range(0, len(sequence), 50):
+        ticks.ingest(parse(pack_message([pack_tick("full", *t) for t in sequence[i:i + 50]])))
+
+    assert ticks.ticks_received == len(sequence)
+    assert check_bars(ticks, sequence) == []
+
+
+def test_new_access_token_reconnects_before_closing_the_old_ticker():
+    port = free_port()
+    replay = subprocess.Popen(
+        [sys.executable, str(project_root / "benchmarks" / "mock_ticker.py"), "--port", str(port), "--rate", "2000"],
+        cwd=project_root,
+    )
+
+    def wait_for(condition, timeout=20.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.01)
+
+    def listening():
+        with socket.socket() as sock:
+            return sock.connect_ex(("127.0.0.1", port)) == 0
+
+    try:
+        ticks = TickEngine("key", "token", instruments=DEFAULT_TOKENS)
+        ticks.root = f"ws://127.0.0.1:{port}"
+        wait_for(listening)
+        ticks.start()
+        wait_for(lambda: ticks.ticks_received)
+        old = ticks._ticker
+
+        ticks.set_access_token("new-token")
+        new = ticks._ticker
+        assert new is not old and ticks._retiring == [old]
+        # The old connection is closed only after the new one has connected and subscribed.
+        wait_for(lambda: not ticks._retiring)
+        assert new.is_connected()
+        wait_for(lambda: not old.is_connected())
+
+        received = ticks.ticks_received
+        wait_for(lambda: ticks.ticks_received > received)
+        ticks.stop()
+        wait_for(lambda: not new.is_connected())
+    finally:
+        replay.terminate()
+        replay.wait()
+
+
+def test_ltp_and_bars_endpoints(monkeypatch, tmp_path):
+    monkeypatch.setenv("KITE_API_KEY", "key")
+    monkeypatch.setenv("KITE_ACCESS_TOKEN", "token")
+    monkeypatch.setenv("KITE_DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("KITE_TICKER_INSTRUMENTS", str(TOKEN))
+    import src.main
+    from src.kite_utils import KiteHelper
+
+    helper = KiteHelper()
+    helper.ticks.ingest([tick(0, 100.0, 0), tick(0.5, 104.0, 20), tick(1, 103.0, 30)])
+    monkeypatch.setattr(src.main, "kite_helper", helper)
+
+    async def get(path):
+        transport = httpx.ASGITransport(app=src.main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path)
+
+    response = asyncio.run(get(f"/api/ltp?instruments={TOKEN},1"))
+    assert response.status_code == 200
+    assert response.json() == {"data": {str(TOKEN): {"last_price": 103.0, "timestamp": T0 + 1.0}}}
+
+    response = asyncio.run(get(f"/api/bars?instrument_token={TOKEN}&interval=1s&count=5"))
+    assert response.status_code == 200
+    assert response.json()["bars"] == [
+        [T0, 100.0, 104.0, 100.0, 104.0, 20],
+        [T0 + 1, 103.0, 103.0, 103.0, 103.0, 10],
+    ]
+
+    assert asyncio.run(get("/api/bars?instrument_token=1")).status_code == 404
+    assert asyncio.run(get(f"/api/bars?instrument_token={TOKEN}&interval=5m")).status_code == 400